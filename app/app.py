@@ -2,6 +2,7 @@
 import streamlit as st
 import requests
 import json
+import uuid
 
 # --- 페이지 설정 ---
 st.set_page_config(
@@ -12,6 +13,32 @@ st.set_page_config(
 
 # --- 백엔드 API 주소 ---
 BACKEND_API_URL = "http://localhost:8000/api/chat"
+BACKEND_STREAM_API_URL = "http://localhost:8000/api/chat/stream"
+BACKEND_SESSION_API_URL = "http://localhost:8000/api/chat/sessions"
+
+# 라우팅/도구 이벤트를 받았을 때 토큰이 도착하기 전까지 보여줄 진행 상태 문구
+STATUS_MESSAGES = {
+    "gmail_node": "메일을 확인하는 중...",
+    "calendar_node": "일정을 확인하는 중...",
+    "rag_node": "문서를 검색하는 중...",
+    "general_node": "생각 중...",
+}
+
+def iter_sse_events(response):
+    """SSE 응답을 (event, data) 튜플로 하나씩 반환합니다."""
+    event_name, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            # 빈 줄은 하나의 이벤트가 끝났음을 의미합니다.
+            if data_lines:
+                yield event_name, json.loads("\n".join(data_lines))
+            event_name, data_lines = "message", []
+        elif line.startswith("event:"):
+            event_name = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
 
 # --- UI 구성 ---
 st.title("🤖 AI 업무 자동화 비서")
@@ -29,6 +56,20 @@ st.markdown("""
 # 'messages'는 채팅 기록을 저장합니다.
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# 'session_id'는 서버에 저장된 대화 기록을 가리킵니다. 요청에는 이 ID와 새 메시지만 보냅니다.
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+
+# --- 새 대화 시작 ---
+with st.sidebar:
+    if st.button("새 대화 시작"):
+        try:
+            requests.delete(f"{BACKEND_SESSION_API_URL}/{st.session_state.session_id}", timeout=5)
+        except requests.exceptions.RequestException:
+            pass
+        st.session_state.messages = []
+        st.session_state.session_id = str(uuid.uuid4())
+        st.rerun()
 
 # --- 채팅 기록 표시 ---
 # 이전 대화 내용을 화면에 표시합니다.
@@ -51,23 +92,33 @@ if prompt := st.chat_input("무엇을 도와드릴까요?"):
 
         try:
             # 백엔드 API에 요청을 보냅니다.
-            # 대화 기록을 함께 보내 문맥을 유지하도록 합니다.
-            history = [
-                (msg["content"], st.session_state.messages[i+1]["content"])
-                for i, msg in enumerate(st.session_state.messages)
-                if msg["role"] == "user" and i + 1 < len(st.session_state.messages)
-            ]
-            
+            # 대화 기록은 서버가 session_id로 보관하므로 새 메시지만 보냅니다.
+            # 스트리밍 엔드포인트로 요청하여 토큰이 도착하는 대로 화면에 표시합니다.
             response = requests.post(
-                BACKEND_API_URL,
-                json={"message": prompt, "history": history}
+                BACKEND_STREAM_API_URL,
+                json={"message": prompt, "session_id": st.session_state.session_id},
+                stream=True
             )
             response.raise_for_status()  # HTTP 오류 발생 시 예외 처리
+            response.encoding = "utf-8"
+
+            ai_response = ""
+            for event, data in iter_sse_events(response):
+                if event == "route" and not ai_response:
+                    message_placeholder.markdown(STATUS_MESSAGES.get(data["node"], "생각 중..."))
+                elif event == "tool_start" and not ai_response:
+                    message_placeholder.markdown(f"`{data['tool']}` 도구를 실행하는 중...")
+                elif event == "token":
+                    ai_response += data["content"]
+                    message_placeholder.markdown(ai_response + "▌")
+                elif event == "done":
+                    # 최종 응답으로 화면을 갱신합니다. (토큰 이벤트 없이 끝나는 경우 포함)
+                    ai_response = data["response"] or ai_response
+                elif event == "error":
+                    raise RuntimeError(data["message"])
 
-            # API 응답을 받아 화면에 표시합니다.
-            ai_response = response.json()["response"]
             message_placeholder.markdown(ai_response)
-            
+
             # AI의 응답을 채팅 기록에 추가합니다.
             st.session_state.messages.append({"role": "assistant", "content": ai_response})
 
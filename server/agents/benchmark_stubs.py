@@ -0,0 +1,83 @@
+# server/agents/benchmark_stubs.py
+import asyncio
+import time
+from langchain.tools import StructuredTool
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from .chains import tool_runnable
+from .history import HistoryManager
+
+# 벤치마크에서 돌아가며 보낼 질문. 로컬 의도 분류기로 Gmail/Calendar/일반 대화 노드에 나뉘어 라우팅됩니다.
+# (RAG 질문은 벡터 저장소가 필요하므로 제외합니다.)
+SAMPLE_MESSAGES = [
+    "오늘 받은 메일 요약해줘",
+    "이번 주 일정 알려줘",
+    "안녕, 오늘 기분 어때?",
+    "내일 회의 일정 있어?",
+    "어제 온 메일 중에 중요한 거 있어?",
+    "파이썬 리스트 정렬하는 방법 알려줘",
+]
+
+def _stub_tool(name, tool_ms):
+    """googleapiclient처럼 tool_ms만큼 스레드를 막는 도구. 비동기 경로는 실제 도구처럼 asyncio.to_thread로 실행합니다."""
+    def run(query: str = "") -> str:
+        time.sleep(tool_ms / 1000)
+        return f"[{name}] '{query}' 검색 결과 1건"
+
+    async def arun(query: str = "") -> str:
+        return await asyncio.to_thread(run, query)
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=f"{name} 벤치마크용 스텁")
+
+def _stub_llm(llm_ms):
+    """llm_ms만큼 기다린 뒤 고정된 답변을 반환하는 LLM 대용 Runnable. 비동기 경로는 이벤트 루프를 막지 않습니다."""
+    def generate(_):
+        if llm_ms:
+            time.sleep(llm_ms / 1000)
+        return "벤치마크용 답변입니다."
+
+    async def agenerate(_):
+        if llm_ms:
+            await asyncio.sleep(llm_ms / 1000)
+        return "벤치마크용 답변입니다."
+
+    return RunnableLambda(generate, afunc=agenerate)
+
+class StubComponents:
+    """
+    AgentComponents와 같은 속성을 가진 벤치마크용 구성 요소입니다.
+    Gemini와 Google API를 호출하지 않으므로, 그래프/라우팅/스레드 풀 등 서버 자체의 오버헤드만 측정할 수 있습니다.
+
+    Args:
+        llm_ms (float): LLM 호출 하나의 모의 지연 시간(ms).
+        tool_ms (float): Gmail/Calendar 도구 호출 하나의 모의 지연 시간(ms). (블로킹)
+    """
+
+    def __init__(self, llm_ms=0, tool_ms=0):
+        llm = _stub_llm(llm_ms)
+        self.gmail_tool = _stub_tool("search_gmail", tool_ms)
+        self.calendar_tool = _stub_tool("get_calendar_events", tool_ms)
+        self.gmail_chain = RunnablePassthrough.assign(
+            tool_output=tool_runnable(self.gmail_tool, lambda x: x["input"])
+        ) | llm
+        self.calendar_chain = RunnablePassthrough.assign(
+            tool_output=tool_runnable(self.calendar_tool, lambda x: {"query": x["input"]})
+        ) | llm
+        self.general_chain = llm
+        self.rag_chain = llm
+        self.synthesis_chain = llm
+        self.history_summary_chain = llm
+        self.router_chain = RunnableLambda(lambda _: "general_node")
+        self.response_cache = None
+        self.context_cache = None
+        self.history_manager = HistoryManager()
+
+def install_stub_components(llm_ms=0, tool_ms=0):
+    """master_agent가 실제 구성 요소 대신 StubComponents를 사용하도록 설정하고 master_agent 모듈을 반환합니다."""
+    from . import master_agent
+    master_agent._components = StubComponents(llm_ms=llm_ms, tool_ms=tool_ms)
+    return master_agent
+
+def initial_state(message):
+    """대화 기록 없는 질문 하나의 그래프 초기 상태를 만듭니다."""
+    return {"messages": [HumanMessage(content=message)], "history": [], "user_id": None}
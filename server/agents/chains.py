@@ -1,16 +1,32 @@
 # server/agents/chains.py
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_google_genai import ChatGoogleGenerativeAI
-from server.core.config import settings
-
-# --- 공통 LLM 초기화 ---
-llm = ChatGoogleGenerativeAI(
-    model=settings.GEMINI_MODEL_NAME,
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0.7
-)
+from langchain_core.runnables import RunnableConfig, RunnablePassthrough, RunnableLambda
+from server.agents.llm import get_llm
+
+# 사용자에게 전달될 답변을 생성하는 LLM 호출에 붙이는 태그입니다.
+# 스트리밍 엔드포인트는 이 태그가 붙은 LLM의 토큰만 클라이언트로 전달합니다.
+ANSWER_STREAM_TAG = "answer"
+
+def get_answer_llm():
+    """답변 생성용 LLM(태그 ANSWER_STREAM_TAG)을 반환합니다. LLM은 체인을 만들 때 레지스트리에서 가져옵니다."""
+    return get_llm().with_config(tags=[ANSWER_STREAM_TAG])
+
+def tool_runnable(tool, get_tool_input):
+    """
+    도구 호출을 동기(invoke)/비동기(ainvoke) 양쪽을 지원하는 Runnable로 감쌉니다.
+    체인을 ainvoke로 실행하면 도구도 비동기로 호출되어 이벤트 루프를 막지 않습니다.
+
+    config(콜백)를 도구 호출에 직접 넘겨, contextvar 전파가 없는 Python 3.9/3.10에서도
+    astream_events에 tool_start/tool_end 이벤트가 나타나도록 합니다.
+    """
+    def run_tool(x, config: RunnableConfig):
+        return tool.invoke(get_tool_input(x), config=config)
+
+    async def arun_tool(x, config: RunnableConfig):
+        return await tool.ainvoke(get_tool_input(x), config=config)
+
+    return RunnableLambda(run_tool, afunc=arun_tool)
 
 def create_tool_summarizer_chain(tool, prompt_template):
     """
@@ -24,10 +40,10 @@ def create_tool_summarizer_chain(tool, prompt_template):
     # 3. LLM의 출력을 문자열로 파싱
     chain = (
         RunnablePassthrough.assign(
-            tool_output=lambda x: tool(x["input"])
+            tool_output=tool_runnable(tool, lambda x: x["input"])
         )
         | prompt
-        | llm
+        | get_answer_llm()
         | StrOutputParser()
     )
     return chain
@@ -53,10 +69,10 @@ def get_calendar_chain(tool):
     """Google Calendar 요약 체인을 생성합니다."""
     prompt_template = """
     당신은 사용자의 일정을 알려주는 AI 비서입니다.
-    아래는 사용자의 오늘 일정 검색 결과입니다. 이 내용을 바탕으로 사용자에게 친절하게 정리해서 전달해주세요.
-    만약 일정이 없다면, "오늘 예정된 일정이 없습니다." 라고 답변해주세요.
+    아래는 사용자가 질문한 기간의 일정 검색 결과입니다. 이 내용을 바탕으로 사용자에게 친절하게 정리해서 전달해주세요.
+    만약 일정이 없다면, 해당 기간에 예정된 일정이 없다고 답변해주세요.
 
-    [오늘 일정 검색 결과]
+    [일정 검색 결과]
     {tool_output}
 
     [사용자 원본 질문]
@@ -67,17 +83,17 @@ def get_calendar_chain(tool):
     prompt = ChatPromptTemplate.from_template(prompt_template)
 
     # LCEL 체인을 구성합니다.
-    # 1. 입력을 무시하고 tool({})을 호출하여 'tool_output'을 생성합니다.
+    # 1. 사용자 질문을 tool에 전달하여(기간 해석용) 'tool_output'을 생성합니다.
     # 2. 원본 입력에서 'input' 키의 값을 가져옵니다.
     # 3. 위 두 값을 프롬프트에 전달하여 LLM을 호출합니다.
     # 4. LLM의 출력을 문자열로 파싱합니다.
     chain = (
         {
-            "tool_output": lambda x: tool({}),
+            "tool_output": tool_runnable(tool, lambda x: {"query": x["input"]}),
             "input": lambda x: x["input"],
         }
         | prompt
-        | llm
+        | get_answer_llm()
         | StrOutputParser()
     )
     return chain
@@ -89,4 +105,109 @@ def get_general_chain():
         MessagesPlaceholder(variable_name="history", optional=True),
         ("user", "{input}"),
     ])
-    return prompt | llm | StrOutputParser()
+    return prompt | get_answer_llm() | StrOutputParser()
+
+# RAG 답변의 시스템 지시문. 문서 context와 함께 Gemini 컨텍스트 캐시에 등록되는 고정 앞부분입니다.
+RAG_SYSTEM_INSTRUCTION = (
+    "당신은 문서 검색 및 요약 전문가입니다."
+    "주어진 문서(context)를 기반으로 사용자의 질문에 답변하세요."
+    "문서에 없는 내용은 답변하지 말고, 정보가 없다고 솔직하게 말하세요."
+)
+
+def get_rag_chain():
+    """
+    검색된 문서(context)를 바탕으로 답변하는 RAG 답변 생성 체인을 생성합니다.
+    문서 검색은 체인 밖(rag_node)에서 수행하여 검색/생성 시간을 따로 측정합니다.
+    """
+    system_prompt = RAG_SYSTEM_INSTRUCTION + "\n\n{context}"
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        MessagesPlaceholder(variable_name="history", optional=True),
+        ("user", "{input}"),
+    ])
+    return prompt | get_answer_llm() | StrOutputParser()
+
+def get_router_chain(labels):
+    """
+    로컬 의도 분류기의 신뢰도가 낮을 때 사용할 LLM 라우터 체인을 생성합니다.
+    labels 중 하나의 이름만 출력하도록 요청합니다.
+    """
+    prompt = ChatPromptTemplate.from_template(
+        """
+    사용자의 질문을 처리할 담당자를 하나만 골라 이름만 출력하세요.
+
+    - gmail_node: 메일 검색, 받은 메일 요약 등 Gmail 관련 요청
+    - calendar_node: 일정, 회의, 약속 등 Google Calendar 관련 요청
+    - rag_node: 사내 문서, 보고서, 회의록, 규정 등 내부 문서를 찾아야 하는 질문
+    - general_node: 그 밖의 일반 대화와 질문
+
+    선택지: {labels}
+
+    [사용자 질문]
+    {input}
+
+    담당자:
+    """
+    ).partial(labels=", ".join(labels))
+    # 같은 질문에는 같은 라벨이 나오도록 temperature를 0으로 둡니다.
+    return prompt | get_llm(temperature=0) | StrOutputParser()
+
+def get_cached_rag_chain(cache_name):
+    """
+    시스템 지시문과 문서 context가 Gemini 컨텍스트 캐시(cache_name)에 등록되어 있을 때 사용하는 RAG 체인입니다.
+    캐시된 앞부분은 다시 보내지 않고 대화 기록과 질문만 전송합니다.
+    (캐시를 사용하는 요청에는 시스템 지시문을 함께 보낼 수 없습니다.)
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        MessagesPlaceholder(variable_name="history", optional=True),
+        ("user", "{input}"),
+    ])
+    return prompt | get_answer_llm().bind(cached_content=cache_name) | StrOutputParser()
+
+def get_synthesis_chain():
+    """
+    여러 분기(Gmail, Calendar, 문서 검색)의 결과를 하나의 답변으로 종합하는 체인을 생성합니다.
+    분기들은 도구만 실행하고, LLM 호출은 이 체인에서 한 번만 수행합니다.
+    """
+    system_prompt = (
+        "당신은 사용자의 업무를 돕는 AI 비서입니다. "
+        "사용자의 질문에는 여러 요청이 함께 들어 있으며, 아래는 요청별 검색 결과입니다. "
+        "각 요청에 대한 내용을 빠짐없이, 요청 순서대로 항목을 나누어 친절하게 정리해주세요. "
+        "검색 결과가 없는 요청은 결과가 없다고 답변하세요."
+        "\n\n"
+        "{sections}"
+    )
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        MessagesPlaceholder(variable_name="history", optional=True),
+        ("user", "{input}"),
+    ])
+    return prompt | get_answer_llm() | StrOutputParser()
+
+def get_history_summary_chain():
+    """
+    오래된 대화 턴을 누적 요약에 합치는 체인을 생성합니다.
+    입력: summary(이전 요약), turns(새로 요약할 대화), max_chars(요약 최대 길이)
+    """
+    prompt = ChatPromptTemplate.from_template(
+        """
+    아래는 사용자와 AI 비서의 이전 대화 요약과, 그 뒤에 이어진 대화입니다.
+    두 내용을 합쳐 이후 대화에 필요한 사실(사용자의 요청, 선호, 언급된 이름/날짜/숫자, 결정 사항)이 빠지지 않도록
+    {max_chars}자 이내의 한국어 요약으로 다시 작성하세요. 요약만 출력하세요.
+
+    [이전 요약]
+    {summary}
+
+    [이어진 대화]
+    {turns}
+
+    갱신된 요약:
+    """
+    )
+    return prompt | get_llm() | StrOutputParser()
+
+def format_documents(docs):
+    """검색된 문서 청크들을 프롬프트에 넣을 하나의 문자열로 만듭니다."""
+    return "\n\n".join(
+        f"[출처: {doc.metadata.get('source', '알 수 없음')}]\n{doc.page_content}" for doc in docs
+    )
@@ -0,0 +1,239 @@
+# server/agents/context_cache.py
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from .history import estimate_tokens
+
+# 모델별 Gemini 명시적 컨텍스트 캐시의 최소 토큰 수. 모델 이름의 접두어로 찾습니다.
+# 이보다 짧은 내용은 cachedContents 등록 요청이 거부됩니다.
+MODEL_CACHE_MIN_TOKENS = {
+    "gemini-1.5-flash": 32768,
+    "gemini-1.5-pro": 32768,
+    "gemini-2.0-flash": 4096,
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+}
+# 명시적 캐시에 버전이 고정된 모델 이름(예: gemini-1.5-flash-002)만 허용하는 모델 계열
+VERSIONED_MODEL_PREFIXES = ("gemini-1.5-", "gemini-2.0-")
+MODEL_VERSION_PATTERN = re.compile(r"-\d{3}$")
+
+def model_cache_min_tokens(model):
+    """
+    모델의 컨텍스트 캐시 최소 토큰 수를 반환합니다.
+
+    Returns:
+        tuple[int | None, str | None]: (최소 토큰 수, None) 또는 캐시를 사용할 수 없으면 (None, 이유).
+    """
+    model = model.removeprefix("models/")
+    if model.endswith("-latest"):
+        return None, f"'{model}'은(는) 별칭 모델이라 명시적 캐시를 사용할 수 없습니다. 버전이 고정된 모델(예: gemini-2.0-flash-001)을 지정하세요."
+    if model.startswith(VERSIONED_MODEL_PREFIXES) and not MODEL_VERSION_PATTERN.search(model):
+        return None, f"'{model}'은(는) 버전이 고정된 이름(예: {model}-001)으로 지정해야 명시적 캐시를 사용할 수 있습니다."
+    min_tokens = next((tokens for prefix, tokens in MODEL_CACHE_MIN_TOKENS.items() if model.startswith(prefix)), None)
+    if min_tokens is None:
+        return None, f"'{model}'의 컨텍스트 캐시 최소 토큰 수를 알 수 없습니다. (MODEL_CACHE_MIN_TOKENS)"
+    return min_tokens, None
+
+def create_context_cache(settings, system_instruction, max_context_chars):
+    """
+    설정에 맞는 GeminiContextCache를 만듭니다. 다음의 경우에는 이유를 출력하고 None을 반환합니다.
+
+    - GEMINI_CONTEXT_CACHE_ENABLED가 꺼져 있는 경우
+    - 모델이 명시적 캐시를 사용할 수 없는 경우 (-latest 별칭, 버전 없는 1.5/2.0 모델, 최소 토큰 수를 모르는 모델)
+    - 시스템 지시문 + 최대 길이의 문서 context(max_context_chars, 전부 한글이라고 가정)도
+      모델의 최소 토큰 수에 못 미쳐 등록 조건을 만족할 수 없는 경우
+
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS는 모델 최소값보다 클 때만 사용합니다. (0이면 모델 최소값)
+    """
+    if not settings.GEMINI_CONTEXT_CACHE_ENABLED:
+        return None
+    model_min_tokens, reason = model_cache_min_tokens(settings.GEMINI_MODEL_NAME)
+    if reason is not None:
+        print(f"Gemini context cache disabled: {reason}")
+        return None
+    min_tokens = max(model_min_tokens, settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS)
+    max_prefix_tokens = estimate_tokens(system_instruction) + math.ceil(max_context_chars / 1.5)
+    if max_prefix_tokens < min_tokens:
+        print(
+            f"Gemini context cache disabled: RAG 프롬프트 앞부분은 최대 약 {max_prefix_tokens}토큰으로 "
+            f"캐시 최소 크기({min_tokens}토큰)보다 작습니다. (RAG_TOP_K를 늘리거나 최소 토큰 수가 작은 모델을 사용하세요.)"
+        )
+        return None
+    return GeminiContextCache(
+        api_key=settings.GOOGLE_API_KEY,
+        model=settings.GEMINI_MODEL_NAME,
+        base_url=settings.GEMINI_API_BASE_URL,
+        ttl=settings.GEMINI_CONTEXT_CACHE_TTL,
+        min_tokens=min_tokens,
+        min_uses=settings.GEMINI_CONTEXT_CACHE_MIN_USES,
+    )
+
+class GeminiContextCache:
+    """
+    자주 반복되는 프롬프트 앞부분(시스템 프롬프트 + 문서 context)을 Gemini 명시적 컨텍스트 캐시(cachedContents)에 등록하고,
+    등록된 캐시 이름(cachedContents/...)을 TTL과 함께 관리합니다.
+
+    - 같은 앞부분이 min_uses번 이상 사용되고 어림 토큰 수가 min_tokens 이상일 때만 등록합니다.
+      (Gemini는 모델마다 캐시 최소 토큰 수가 있고, 캐시 보관 비용이 들기 때문입니다.)
+    - 등록과 TTL 연장은 백그라운드에서 수행하므로 요청 지연 시간에 더해지지 않습니다.
+      등록이 끝나기 전의 요청은 캐시 없이 처리됩니다.
+    - 만료가 refresh_margin초 이내로 다가온 캐시가 다시 사용되면 TTL을 연장합니다.
+    - 등록에 실패하면 retry_after초 동안 등록을 시도하지 않고 항상 캐시 없이 처리합니다.
+
+    Args:
+        api_key (str): Gemini API 키.
+        model (str): 모델 이름. (예: gemini-2.0-flash-001)
+        base_url (str): Gemini REST API 주소. 테스트용 로컬 엔드포인트로 바꿀 수 있습니다.
+        ttl (int): 캐시 유지 시간(초).
+        min_tokens (int): 등록할 최소 어림 토큰 수. 모델의 캐시 최소 토큰 수(MODEL_CACHE_MIN_TOKENS) 이상이어야 합니다.
+        min_uses (int): 등록 전에 같은 앞부분이 사용되어야 하는 횟수.
+        max_entries (int): 추적할 최대 앞부분 수. (LRU, 밀려난 캐시는 Gemini에서도 삭제합니다.)
+        http (requests.Session | None): REST 호출에 사용할 세션.
+    """
+
+    def __init__(self, api_key, model, base_url, ttl=3600, min_tokens=4096, min_uses=2, max_entries=256,
+                 refresh_margin=300, retry_after=600, timeout=10, http=None):
+        self.api_key = api_key
+        self.model = model if model.startswith("models/") else f"models/{model}"
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.min_uses = min_uses
+        self.max_entries = max_entries
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self._http = http or requests.Session()
+        # 앞부분 해시 -> {"uses", "name", "expire_at", "pending"}
+        self._entries = OrderedDict()
+        self._disabled_until = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-cache")
+        self._stats = {"hits": 0, "misses": 0, "created": 0, "refreshed": 0, "failures": 0, "fallbacks": 0}
+
+    def lookup(self, system_instruction, context):
+        """
+        등록된 캐시 이름을 반환합니다. 없으면 None을 반환하고, 조건을 만족하면 백그라운드 등록을 시작합니다.
+        """
+        key = self._key(system_instruction, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {"uses": 0, "name": None, "expire_at": 0.0, "pending": False}
+                self._evict()
+            self._entries.move_to_end(key)
+            entry["uses"] += 1
+
+            if entry["name"] and entry["expire_at"] > now:
+                self._stats["hits"] += 1
+                if entry["expire_at"] - now < self.refresh_margin and not entry["pending"]:
+                    entry["pending"] = True
+                    self._executor.submit(self._refresh, key, entry["name"])
+                return entry["name"]
+
+            self._stats["misses"] += 1
+            entry["name"] = None
+            if (entry["uses"] >= self.min_uses and not entry["pending"] and now >= self._disabled_until
+                    and estimate_tokens(system_instruction) + estimate_tokens(context) >= self.min_tokens):
+                entry["pending"] = True
+                self._executor.submit(self._create, key, system_instruction, context)
+        return None
+
+    def invalidate(self, name):
+        """
+        캐시를 사용한 생성 요청이 실패하면 호출합니다. 해당 캐시를 더 이상 사용하지 않고,
+        같은 실패가 반복되지 않도록 retry_after초 동안 새 등록도 하지 않습니다.
+        """
+        with self._lock:
+            self._stats["fallbacks"] += 1
+            self._disabled_until = time.time() + self.retry_after
+            for entry in self._entries.values():
+                if entry["name"] == name:
+                    entry["name"] = None
+                    entry["expire_at"] = 0.0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active"] = sum(1 for entry in self._entries.values() if entry["name"])
+        return stats
+
+    def _key(self, system_instruction, context):
+        digest = hashlib.sha256(f"{self.model}\0{system_instruction}\0{context}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            _, entry = self._entries.popitem(last=False)
+            if entry["name"]:
+                self._executor.submit(self._delete, entry["name"])
+
+    def _url(self, path):
+        return f"{self.base_url}/{path}"
+
+    def _create(self, key, system_instruction, context):
+        try:
+            response = self._http.post(
+                self._url("cachedContents"),
+                params={"key": self.api_key},
+                json={
+                    "model": self.model,
+                    "systemInstruction": {"parts": [{"text": system_instruction}]},
+                    "contents": [{"role": "user", "parts": [{"text": context}]}],
+                    "ttl": f"{self.ttl}s",
+                },
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            name = response.json()["name"]
+        except Exception as e:
+            print(f"Gemini context cache registration failed, disabling for {self.retry_after}s: {e}")
+            with self._lock:
+                self._stats["failures"] += 1
+                self._disabled_until = time.time() + self.retry_after
+                if key in self._entries:
+                    self._entries[key]["pending"] = False
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # 등록하는 동안 LRU에서 밀려났으면 바로 삭제합니다.
+                self._executor.submit(self._delete, name)
+                return
+            entry.update(name=name, expire_at=time.time() + self.ttl, pending=False)
+            self._stats["created"] += 1
+
+    def _refresh(self, key, name):
+        try:
+            response = self._http.patch(
+                self._url(name),
+                params={"key": self.api_key, "updateMask": "ttl"},
+                json={"ttl": f"{self.ttl}s"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            expire_at, refreshed = time.time() + self.ttl, True
+        except Exception as e:
+            # 연장에 실패하면 남은 TTL 동안만 사용하고, 만료 후 다시 등록합니다.
+            print(f"Gemini context cache refresh failed for {name}: {e}")
+            expire_at, refreshed = None, False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["pending"] = False
+                if expire_at is not None and entry["name"] == name:
+                    entry["expire_at"] = expire_at
+            if refreshed:
+                self._stats["refreshed"] += 1
+
+    def _delete(self, name):
+        try:
+            self._http.delete(self._url(name), params={"key": self.api_key}, timeout=self.timeout)
+        except Exception as e:
+            print(f"Gemini context cache delete failed for {name}: {e}")
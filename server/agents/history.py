@@ -0,0 +1,229 @@
+# server/agents/history.py
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from langchain_core.messages import AIMessage, HumanMessage
+
+# 모델별 대화 기록 토큰 예산. 컨텍스트 한도가 아니라 지연 시간/비용을 기준으로 잡은 값이며,
+# 느리고 비싼 모델일수록 작게 둡니다. 모델 이름의 접두어로 찾습니다.
+MODEL_HISTORY_BUDGETS = {
+    "gemini-1.5-pro": 3000,
+    "gemini-2.5-pro": 3000,
+    "gemini-1.5-flash": 6000,
+    "gemini-2.0-flash": 6000,
+    "gemini-2.5-flash": 6000,
+}
+DEFAULT_HISTORY_BUDGET = 4000
+
+SUMMARY_PREFIX = "[이전 대화 요약]"
+SUMMARY_ACK = "네, 이전 대화 내용을 참고해서 답변하겠습니다."
+
+HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+def estimate_tokens(text):
+    """
+    토크나이저 호출 없이 토큰 수를 어림합니다.
+    한글은 약 1.5글자, 그 밖의 문자(영문, 숫자, 공백 등)는 약 4글자를 1토큰으로 셉니다.
+    """
+    hangul = len(HANGUL_PATTERN.findall(text))
+    return math.ceil(hangul / 1.5 + (len(text) - hangul) / 4)
+
+def truncate_to_tokens(text, max_tokens):
+    """어림 토큰 수가 max_tokens 이하가 되도록 text의 앞부분만 남깁니다."""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = max(0, int(len(text) * max_tokens / tokens) - 1)
+    return text[:keep] + "…"
+
+def history_budget(model_name, override=0):
+    """모델의 대화 기록 토큰 예산을 반환합니다. override가 0보다 크면 그 값을 사용합니다."""
+    if override > 0:
+        return override
+    return next(
+        (budget for prefix, budget in MODEL_HISTORY_BUDGETS.items() if model_name.startswith(prefix)),
+        DEFAULT_HISTORY_BUDGET,
+    )
+
+def split_turns(messages):
+    """메시지 목록을 사용자 메시지로 시작하는 턴 단위로 묶습니다."""
+    turns = []
+    for message in messages:
+        if message.type == "human" or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+def format_turns(turns):
+    """요약 프롬프트에 넣을 수 있도록 턴 목록을 '사용자: ... / AI: ...' 형식의 문자열로 만듭니다."""
+    speaker = {"human": "사용자", "ai": "AI"}
+    return "\n".join(
+        f"{speaker.get(message.type, message.type)}: {message.content}" for turn in turns for message in turn
+    )
+
+class HistoryManager:
+    """
+    LLM 프롬프트에 넣을 대화 기록을 일정한 크기로 유지합니다.
+
+    - 최근 window_turns개의 턴은 그대로 전달합니다.
+    - 그보다 오래된 턴은 하나의 요약으로 압축하여 최근 턴 앞에 붙입니다.
+    - 최근 턴과 요약을 합친 어림 토큰 수가 max_tokens를 넘지 않도록, 필요하면 윈도우를 더 줄입니다.
+
+    요약은 '요약된 턴들의 내용 해시'를 키로 캐싱합니다. 윈도우가 한 턴 밀려나면 캐시에서 가장 긴 요약된 접두어를 찾아
+    (이전 요약 + 새로 밀려난 턴)만 다시 요약하므로, 대화가 길어져도 요약 비용은 턴마다 한 번으로 일정합니다.
+    캐시가 비어 있을 때(서버 재시작 등)는 오래된 턴을 한 번에 보내지 않고, 입력이 (max_tokens - summary_tokens)를
+    넘지 않는 묶음으로 나누어 차례로 요약에 접어 넣습니다. 묶음마다 요약을 캐싱하므로 중간에 실패해도 진행분은 남습니다.
+
+    Args:
+        summarize (Callable[[str, str], str] | None): (이전 요약, 새로 밀려난 턴) -> 갱신된 요약. None이면 오래된 턴을 버립니다.
+        asummarize (Callable[[str, str], Awaitable[str]] | None): summarize의 비동기 버전.
+        window_turns (int): 그대로 전달할 최근 턴 수.
+        max_tokens (int): 대화 기록(요약 포함)의 어림 토큰 예산.
+        summary_tokens (int): 요약에 할당할 최대 토큰 수.
+        cache_size (int): 보관할 최대 요약 수. (LRU)
+    """
+
+    def __init__(self, summarize=None, asummarize=None, window_turns=6, max_tokens=DEFAULT_HISTORY_BUDGET,
+                 summary_tokens=500, cache_size=1024):
+        self._summarize = summarize
+        self._asummarize = asummarize
+        self.window_turns = window_turns
+        self.max_tokens = max_tokens
+        self.summary_tokens = min(summary_tokens, max_tokens // 2)
+        self.cache_size = cache_size
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"summary_hits": 0, "summary_updates": 0, "summarized_turns": 0, "summary_failures": 0}
+
+    def prepare(self, messages):
+        """프롬프트에 넣을 대화 기록(요약 + 최근 턴)을 반환합니다."""
+        turns = split_turns(messages)
+        start = self._window_start(turns)
+        if start == 0:
+            return self._fit(turns)
+        return self._with_summary(self._summary(turns[:start]), self._fit(turns[start:]))
+
+    async def aprepare(self, messages):
+        turns = split_turns(messages)
+        start = self._window_start(turns)
+        if start == 0:
+            return self._fit(turns)
+        return self._with_summary(await self._asummary(turns[:start]), self._fit(turns[start:]))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_summaries"] = len(self._summaries)
+        return stats
+
+    def _window_start(self, turns):
+        """그대로 전달할 첫 턴의 인덱스를 반환합니다. (최근 턴 수와 토큰 예산을 모두 만족하는 가장 앞 위치)"""
+        start = max(0, len(turns) - self.window_turns)
+        # 윈도우 안의 턴만 토큰 수를 어림하므로, 대화가 길어져도 비용이 늘지 않습니다.
+        sizes = {index: sum(estimate_tokens(message.content) for message in turns[index]) for index in range(start, len(turns))}
+        used = sum(sizes.values())
+        while start < len(turns) - 1 and used + (self.summary_tokens if start else 0) > self.max_tokens:
+            used -= sizes[start]
+            start += 1
+        return start
+
+    def _fit(self, turns):
+        """마지막 턴 하나만으로도 예산을 넘으면 메시지마다 예산을 나누어 앞부분만 남깁니다."""
+        messages = [message for turn in turns for message in turn]
+        if sum(estimate_tokens(message.content) for message in messages) <= self.max_tokens - self.summary_tokens:
+            return messages
+        per_message = max(1, (self.max_tokens - self.summary_tokens) // max(1, len(messages)))
+        return [message.model_copy(update={"content": truncate_to_tokens(message.content, per_message)}) for message in messages]
+
+    def _with_summary(self, summary, messages):
+        if not summary:
+            return messages
+        return [HumanMessage(content=f"{SUMMARY_PREFIX}\n{summary}"), AIMessage(content=SUMMARY_ACK)] + messages
+
+    def _prefix_keys(self, turns):
+        """turns[:i+1]의 내용 해시 목록을 반환합니다."""
+        digest = hashlib.sha256()
+        keys = []
+        for turn in turns:
+            for message in turn:
+                digest.update(f"{message.type}:{message.content}\0".encode("utf-8"))
+            keys.append(digest.copy().hexdigest()[:32])
+        return keys
+
+    def _cached_prefix(self, keys):
+        """(이미 요약된 턴 수, 그 요약)을 반환합니다. 캐시에 없으면 (0, "")."""
+        with self._lock:
+            for index in range(len(keys), 0, -1):
+                summary = self._summaries.get(keys[index - 1])
+                if summary is not None:
+                    self._summaries.move_to_end(keys[index - 1])
+                    if index == len(keys):
+                        self._stats["summary_hits"] += 1
+                    return index, summary
+        return 0, ""
+
+    def _store(self, key, summary, summarized_turns):
+        summary = truncate_to_tokens(summary.strip(), self.summary_tokens)
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+            self._stats["summary_updates"] += 1
+            self._stats["summarized_turns"] += summarized_turns
+        return summary
+
+    def _chunks(self, turns, done):
+        """
+        turns[done:]을 요약 호출 한 번의 입력 예산(max_tokens - summary_tokens)에 맞게 나누어
+        (묶음의 끝 인덱스, 묶음 텍스트) 목록을 반환합니다. 한 턴만으로 예산을 넘으면 앞부분만 남깁니다.
+        """
+        limit = self.max_tokens - self.summary_tokens
+        chunks = []
+        start, used = done, 0
+        for index in range(done, len(turns)):
+            size = estimate_tokens(format_turns([turns[index]]))
+            if index > start and used + size > limit:
+                chunks.append((index, truncate_to_tokens(format_turns(turns[start:index]), limit)))
+                start, used = index, 0
+            used += size
+        chunks.append((len(turns), truncate_to_tokens(format_turns(turns[start:]), limit)))
+        return chunks
+
+    def _summary(self, turns):
+        keys = self._prefix_keys(turns)
+        done, summary = self._cached_prefix(keys)
+        if done == len(turns) or self._summarize is None:
+            return summary
+        for end, text in self._chunks(turns, done):
+            try:
+                updated = self._summarize(summary, text)
+            except Exception as e:
+                return self._summary_failed(e, summary)
+            summary = self._store(keys[end - 1], updated, end - done)
+            done = end
+        return summary
+
+    async def _asummary(self, turns):
+        keys = self._prefix_keys(turns)
+        done, summary = self._cached_prefix(keys)
+        if done == len(turns) or self._asummarize is None:
+            return summary
+        for end, text in self._chunks(turns, done):
+            try:
+                updated = await self._asummarize(summary, text)
+            except Exception as e:
+                return self._summary_failed(e, summary)
+            summary = self._store(keys[end - 1], updated, end - done)
+            done = end
+        return summary
+
+    def _summary_failed(self, error, summary):
+        # 요약에 실패하면 마지막으로 성공한 요약만 사용하고, 그 뒤의 오래된 턴은 이번 요청에서 제외합니다.
+        print(f"History summarization failed: {error}")
+        with self._lock:
+            self._stats["summary_failures"] += 1
+        return summary
@@ -0,0 +1,95 @@
+# server/agents/history_benchmark.py
+import argparse
+import time
+from langchain_core.messages import AIMessage, HumanMessage
+from server.agents.history import HistoryManager, estimate_tokens, truncate_to_tokens
+
+QUESTION = "{turn}번째 질문입니다. 다음 주 프로젝트 회의 준비 자료와 관련 메일 내용을 정리해줄 수 있을까요?"
+ANSWER = (
+    "{turn}번째 답변입니다. 다음 주 회의 안건은 일정 조율, 예산 검토, 담당자 배정이며 "
+    "관련 메일은 세 건으로 각각 자료 공유, 회의실 예약, 참석자 확인에 대한 내용입니다. " * 3
+)
+
+def build_conversation(turns):
+    """turns개의 (질문, 답변) 턴으로 이루어진 대화 메시지 목록을 만듭니다."""
+    messages = []
+    for turn in range(1, turns + 1):
+        messages.append(HumanMessage(content=QUESTION.format(turn=turn)))
+        messages.append(AIMessage(content=ANSWER.format(turn=turn)))
+    return messages
+
+def count_tokens(messages):
+    return sum(estimate_tokens(message.content) for message in messages)
+
+def local_summarizer(summary_tokens):
+    """LLM 없이 이전 요약과 새 턴을 이어 붙여 자르는 요약 함수. (HistoryManager 자체의 오버헤드 측정용)"""
+    def summarize(summary, turns):
+        return truncate_to_tokens(f"{summary}\n{turns}".strip(), summary_tokens)
+    return summarize
+
+def llm_summarizer():
+    from server.agents.master_agent import _summarize_history
+    return _summarize_history
+
+def main(lengths, window_turns, max_tokens, summary_tokens, use_llm):
+    """
+    대화 길이별로 전체 기록을 그대로 넣을 때와 HistoryManager를 거칠 때의 프롬프트 토큰 수,
+    그리고 턴마다 prepare()에 걸리는 시간을 비교합니다.
+    실제 서버처럼 대화가 한 턴씩 늘어나는 순서로 호출하므로, 요약은 윈도우가 밀려날 때만 갱신됩니다.
+    --llm을 주면 실제 Gemini로 요약하고, general 체인의 답변 생성 시간까지 함께 측정합니다.
+    """
+    summarize = llm_summarizer() if use_llm else local_summarizer(summary_tokens)
+    manager = HistoryManager(
+        summarize=summarize, window_turns=window_turns, max_tokens=max_tokens, summary_tokens=summary_tokens,
+    )
+    general_chain = None
+    if use_llm:
+        from server.agents.master_agent import get_agent_components
+        general_chain = get_agent_components().general_chain
+
+    print(f"window={window_turns} turns, budget={max_tokens} tokens, summary={summary_tokens} tokens, "
+          f"summarizer={'gemini' if use_llm else 'local'}")
+    header = f"{'turns':>6} {'full_tokens':>12} {'managed_tokens':>15} {'prepare_ms':>11} {'summaries':>10}"
+    if use_llm:
+        header += f" {'full_llm_ms':>12} {'managed_llm_ms':>15}"
+    print(header)
+
+    max_length = max(lengths)
+    conversation = build_conversation(max_length)
+    for turns in range(1, max_length + 1):
+        history = conversation[:turns * 2]
+        updates_before = manager.stats()["summary_updates"]
+        started = time.perf_counter()
+        prepared = manager.prepare(history)
+        prepare_ms = (time.perf_counter() - started) * 1000
+        if turns not in lengths:
+            continue
+
+        row = (
+            f"{turns:>6} {count_tokens(history):>12} {count_tokens(prepared):>15} "
+            f"{prepare_ms:>11.2f} {manager.stats()['summary_updates'] - updates_before:>10}"
+        )
+        if general_chain is not None:
+            question = "지금까지 이야기한 내용을 한 문장으로 요약해줘."
+            timings = []
+            for messages in (history, prepared):
+                started = time.perf_counter()
+                general_chain.invoke({"input": question, "history": messages})
+                timings.append((time.perf_counter() - started) * 1000)
+            row += f" {timings[0]:>12.0f} {timings[1]:>15.0f}"
+        print(row)
+
+    print(f"\nHistoryManager stats: {manager.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대화 길이에 따른 프롬프트 토큰 수와 대화 기록 준비 시간을 측정합니다.")
+    parser.add_argument("--lengths", default="1,5,10,20,50,100,200", help="측정할 대화 턴 수 (쉼표 구분)")
+    parser.add_argument("--window", type=int, default=6, help="그대로 넣을 최근 턴 수 (HISTORY_WINDOW_TURNS)")
+    parser.add_argument("--max-tokens", type=int, default=4000, help="대화 기록 토큰 예산 (HISTORY_MAX_TOKENS)")
+    parser.add_argument("--summary-tokens", type=int, default=500, help="요약 최대 토큰 수 (HISTORY_SUMMARY_TOKENS)")
+    parser.add_argument("--llm", action="store_true", help="Gemini로 요약하고 답변 생성 지연 시간까지 측정합니다.")
+    args = parser.parse_args()
+    main(
+        sorted({int(value) for value in args.lengths.split(",")}),
+        args.window, args.max_tokens, args.summary_tokens, args.llm,
+    )
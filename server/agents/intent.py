@@ -0,0 +1,146 @@
+# server/agents/intent.py
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from ..tools.date_range import find_date_phrases
+
+# 학습/평가용 라벨 데이터가 있는 디렉토리
+INTENT_DATA_DIR = os.path.join(os.path.dirname(__file__), "intent_data")
+INTENT_TRAIN_FILE = os.path.join(INTENT_DATA_DIR, "train.jsonl")
+INTENT_EVAL_FILE = os.path.join(INTENT_DATA_DIR, "eval.jsonl")
+
+# 문자 n-gram 범위. 한국어는 조사/어미가 붙어도 2~3글자 조각이 겹치므로 형태소 분석 없이도 잘 맞습니다.
+NGRAM_RANGE = (1, 3)
+# 중심 벡터와의 코사인 유사도를 확률처럼 바꿀 때 쓰는 softmax 온도. 작을수록 1위와 2위의 차이가 커집니다.
+SOFTMAX_TEMPERATURE = 0.05
+
+# 한 메시지에 여러 요청을 잇는 연결 표현. 예: '오늘 일정이랑 새 메일 알려줘', '메일 확인하고 일정도 보여줘'
+# 쉼표/슬래시/&는 양쪽이 공백이나 한글일 때만 나눕니다. ('10/17 일정', '3,000원 결제 메일'은 나누지 않음)
+CLAUSE_SPLIT_PATTERN = re.compile(
+    r"(?<=\S)(?:이랑|랑|하고|주고|이며)\s+|\s+(?:그리고|및|또|and)\s+|(?<=[\s가-힣])\s*[,&/]\s*(?=[\s가-힣])"
+)
+
+def split_clauses(text):
+    """
+    메시지를 연결 표현 기준으로 나눈 절 목록을 반환합니다. (빈 절 제외)
+
+    '10/17 일정이랑 새 메일 알려줘'처럼 날짜 표현이 한 절에만 있으면, 날짜가 없는 절에도 같은 날짜를 붙여
+    ('10/17 새 메일 알려줘') 분기마다 같은 기간을 조회하게 합니다. 날짜가 없는 절은 가장 가까운 앞 절의 날짜를,
+    앞 절에 날짜가 없으면 처음으로 날짜가 나오는 뒤 절의 날짜를 사용합니다.
+    """
+    clauses = [clause.strip() for clause in CLAUSE_SPLIT_PATTERN.split(text or "") if clause and clause.strip()]
+    phrases = [find_date_phrases(clause) for clause in clauses]
+    dated = [i for i, found in enumerate(phrases) if found]
+    if not dated or len(dated) == len(clauses):
+        return clauses
+    carried = []
+    for i, clause in enumerate(clauses):
+        if phrases[i]:
+            carried.append(clause)
+            continue
+        source = max((j for j in dated if j < i), default=dated[0])
+        carried.append(f"{' '.join(phrases[source])} {clause}")
+    return carried
+
+def char_ngrams(text, ngram_range=NGRAM_RANGE):
+    """
+    단어 경계를 포함한 문자 n-gram을 셉니다. (scikit-learn의 char_wb와 같은 방식)
+    예: '메일' -> ' 메', '메일', '일 ', ' 메일', '메일 ' ...
+    """
+    counts = Counter()
+    low, high = ngram_range
+    for word in (text or "").lower().split():
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            for start in range(len(padded) - n + 1):
+                gram = padded[start:start + n]
+                if gram.strip():
+                    counts[gram] += 1
+    return counts
+
+def load_intent_examples(path):
+    """{"text": ..., "label": ...} 형식의 JSONL 파일을 (text, label) 목록으로 읽습니다."""
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [(record["text"], record["label"]) for record in records]
+
+class IntentClassifier:
+    """
+    문자 n-gram TF-IDF와 최근접 중심(nearest centroid)으로 질문 의도를 분류하는 경량 분류기입니다.
+
+    학습은 라벨별 TF-IDF 벡터의 평균(중심)을 구하는 것뿐이라 수백 개 예문이면 수 밀리초에 끝나고,
+    분류는 질문 벡터와 라벨 중심 사이의 희소 내적 몇 번이므로 LLM 호출 없이 1ms 안에 처리됩니다.
+    외부 패키지 없이 표준 라이브러리만 사용합니다.
+    """
+
+    def __init__(self, ngram_range=NGRAM_RANGE, temperature=SOFTMAX_TEMPERATURE):
+        self.ngram_range = ngram_range
+        self.temperature = temperature
+        self.idf = {}
+        self.centroids = {}
+
+    @property
+    def labels(self):
+        return list(self.centroids)
+
+    def fit(self, examples):
+        """
+        Args:
+            examples (list[tuple[str, str]]): (질문, 라벨) 목록.
+        """
+        grams = [char_ngrams(text, self.ngram_range) for text, _ in examples]
+        document_frequency = Counter(gram for counts in grams for gram in counts)
+        total = len(examples)
+        # smooth idf: log((1 + N) / (1 + df)) + 1
+        self.idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        sums = defaultdict(Counter)
+        for counts, (_, label) in zip(grams, examples):
+            for gram, weight in self._vectorize(counts).items():
+                sums[label][gram] += weight
+        self.centroids = {label: _normalize(vector) for label, vector in sums.items()}
+        return self
+
+    def scores(self, text):
+        """라벨별 코사인 유사도를 반환합니다."""
+        vector = self._vectorize(char_ngrams(text, self.ngram_range))
+        return {
+            label: sum(weight * centroid.get(gram, 0.0) for gram, weight in vector.items())
+            for label, centroid in self.centroids.items()
+        }
+
+    def predict(self, text):
+        """
+        Returns:
+            tuple[str, float]: (가장 가까운 라벨, 신뢰도). 신뢰도는 유사도에 softmax를 적용한 1위 라벨의 확률입니다.
+        """
+        scores = self.scores(text)
+        top = max(scores.values())
+        exp = {label: math.exp((score - top) / self.temperature) for label, score in scores.items()}
+        label = max(scores, key=scores.get)
+        return label, exp[label] / sum(exp.values())
+
+    def _vectorize(self, counts):
+        # 학습 데이터에 없는 n-gram은 어떤 중심과도 겹치지 않으므로 버립니다.
+        vector = {gram: (1 + math.log(count)) * self.idf[gram] for gram, count in counts.items() if gram in self.idf}
+        return _normalize(vector)
+
+def _normalize(vector):
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {gram: weight / norm for gram, weight in vector.items()} if norm else {}
+
+# --- 프로세스 전역 분류기 ---
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_intent_classifier():
+    """라벨 데이터로 학습한 분류기를 반환합니다. 처음 호출할 때 한 번만 학습합니다."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier().fit(load_intent_examples(INTENT_TRAIN_FILE))
+    return _classifier
@@ -0,0 +1,68 @@
+# server/agents/intent_eval.py
+import argparse
+import time
+from collections import Counter
+from server.agents.intent import INTENT_EVAL_FILE, INTENT_TRAIN_FILE, IntentClassifier, load_intent_examples
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+def main(threshold, repeat):
+    """
+    라벨이 달린 평가 세트로 의도 분류기의 정확도와 분류 지연 시간을 측정합니다.
+    신뢰도가 threshold 미만인 질문은 서버에서 LLM 라우터로 넘어가므로, 그 비율(fallback)도 함께 보고합니다.
+    """
+    started = time.perf_counter()
+    classifier = IntentClassifier().fit(load_intent_examples(INTENT_TRAIN_FILE))
+    print(f"Trained on {INTENT_TRAIN_FILE} in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    examples = load_intent_examples(INTENT_EVAL_FILE)
+    predictions = [classifier.predict(text) for text, _ in examples]
+
+    correct = sum(label == expected for (label, _), (_, expected) in zip(predictions, examples))
+    confident = [(label, expected) for (label, confidence), (_, expected) in zip(predictions, examples) if confidence >= threshold]
+    confident_correct = sum(label == expected for label, expected in confident)
+    print(f"\nAccuracy: {correct}/{len(examples)} ({correct / len(examples):.1%})")
+    print(
+        f"Threshold {threshold}: {len(confident)} routed locally "
+        f"({confident_correct / len(confident) if confident else 0:.1%} correct), "
+        f"{len(examples) - len(confident)} sent to LLM fallback ({1 - len(confident) / len(examples):.1%})"
+    )
+
+    print(f"\n{'label':<16} {'precision':>10} {'recall':>10} {'support':>8}")
+    support = Counter(expected for _, expected in examples)
+    predicted = Counter(label for label, _ in predictions)
+    hits = Counter(expected for (label, _), (_, expected) in zip(predictions, examples) if label == expected)
+    for label in classifier.labels:
+        precision = hits[label] / predicted[label] if predicted[label] else 0.0
+        recall = hits[label] / support[label] if support[label] else 0.0
+        print(f"{label:<16} {precision:>10.3f} {recall:>10.3f} {support[label]:>8}")
+
+    errors = [
+        (text, expected, label, confidence)
+        for (label, confidence), (text, expected) in zip(predictions, examples) if label != expected
+    ]
+    if errors:
+        print("\nMisclassified:")
+        for text, expected, label, confidence in errors:
+            print(f"  {text!r}: expected {expected}, got {label} ({confidence:.2f})")
+
+    latencies = []
+    for _ in range(repeat):
+        for text, _ in examples:
+            started = time.perf_counter()
+            classifier.predict(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(
+        f"\nLatency over {len(latencies)} predictions: "
+        f"p50 {percentile(latencies, 0.5):.3f}ms, p95 {percentile(latencies, 0.95):.3f}ms, "
+        f"p99 {percentile(latencies, 0.99):.3f}ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="의도 분류기의 정확도와 분류 지연 시간을 평가 세트로 측정합니다.")
+    parser.add_argument("--threshold", type=float, default=0.6, help="로컬 라우팅에 필요한 최소 신뢰도 (INTENT_CONFIDENCE_THRESHOLD)")
+    parser.add_argument("--repeat", type=int, default=100, help="지연 시간 측정 반복 횟수")
+    args = parser.parse_args()
+    main(args.threshold, args.repeat)
@@ -0,0 +1,213 @@
+# server/agents/llm.py
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from langchain_google_genai import ChatGoogleGenerativeAI
+from server.core.config import settings
+
+class ConcurrencyLimiter:
+    """
+    동기(스레드)와 비동기(코루틴) 호출이 함께 쓰는 동시 실행 제한기입니다.
+    asyncio.Semaphore와 threading.Semaphore를 따로 두면 한도가 두 배가 되므로, 하나의 카운터와 대기열로 관리합니다.
+    빈 자리가 생기면 먼저 기다린 호출부터(FIFO) 자리를 넘겨받습니다.
+
+    Args:
+        limit (int): 동시에 실행할 최대 호출 수. 0이면 제한하지 않습니다.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._active = 0
+        # threading.Event(동기 호출) 또는 (이벤트 루프, Future)(비동기 호출)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "waited": 0, "wait_ms": 0.0, "max_active": 0}
+
+    @contextmanager
+    def slot(self):
+        if _held.get() is self:
+            yield
+            return
+        self._acquire()
+        token = _held.set(self)
+        try:
+            yield
+        finally:
+            _reset_held(token)
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        if _held.get() is self:
+            yield
+            return
+        await self._aacquire()
+        token = _held.set(self)
+        try:
+            yield
+        finally:
+            _reset_held(token)
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["wait_ms"] = round(stats["wait_ms"], 1)
+            stats.update(limit=self.limit, active=self._active, queued=len(self._waiters))
+        return stats
+
+    def _try_acquire(self):
+        self._stats["calls"] += 1
+        if self.limit and self._active >= self.limit:
+            self._stats["waited"] += 1
+            return False
+        self._active += 1
+        self._stats["max_active"] = max(self._stats["max_active"], self._active)
+        return True
+
+    def _acquire(self):
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        started = time.perf_counter()
+        event.wait()
+        self._record_wait(started)
+
+    async def _aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            # 취소되기 직전에 자리를 넘겨받았다면 다음 대기자에게 돌려줍니다.
+            if handed_over:
+                self._release()
+            raise
+        self._record_wait(started)
+
+    def _release(self):
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            # 실행 중인 수는 그대로 두고 자리를 다음 대기자에게 바로 넘깁니다.
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _record_wait(self, started):
+        with self._lock:
+            self._stats["wait_ms"] += (time.perf_counter() - started) * 1000
+
+# 현재 실행 흐름이 자리를 차지하고 있는 ConcurrencyLimiter
+# (langchain의 run_in_executor는 컨텍스트를 복사하므로 실행기에서 돌아가는 동기 구현에도 전달됩니다.)
+_held = contextvars.ContextVar("llm_limiter_held", default=None)
+
+def _reset_held(token):
+    try:
+        _held.reset(token)
+    except ValueError:
+        # 스트림 제너레이터가 다른 컨텍스트에서 닫힌 경우입니다. 그 컨텍스트에는 표시가 남지 않았으므로 무시합니다.
+        pass
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+_lock = threading.Lock()
+# 모델 이름 -> 처음 만든 클라이언트 (같은 모델의 다른 temperature 인스턴스가 전송 계층을 공유합니다)
+_clients = {}
+# (모델 이름, temperature) -> LLM 인스턴스
+_llms = {}
+# 모델 이름 -> ConcurrencyLimiter
+_limiters = {}
+
+def _get_limiter(model):
+    model = model.removeprefix("models/")
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.setdefault(model, ConcurrencyLimiter(settings.LLM_MAX_CONCURRENCY))
+    return limiter
+
+class PooledChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """
+    모델별 동시 호출 수 제한(LLM_MAX_CONCURRENCY)을 적용한 ChatGoogleGenerativeAI입니다.
+    동기/비동기 생성과 스트리밍 모두 응답이 끝날 때까지 한 자리를 차지합니다.
+    """
+
+    def _generate(self, *args, **kwargs):
+        with _get_limiter(self.model).slot():
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        async with _get_limiter(self.model).aslot():
+            return await super()._agenerate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with _get_limiter(self.model).slot():
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with _get_limiter(self.model).aslot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+def get_llm(model=None, temperature=0.7):
+    """
+    프로세스 전역에서 공유하는 Gemini 채팅 모델을 반환합니다.
+
+    - (모델, temperature)마다 인스턴스를 하나만 만들고, 처음 요청될 때 생성합니다.
+      모듈을 import하는 것만으로는 클라이언트를 만들지 않습니다.
+    - 같은 모델의 다른 temperature 인스턴스는 처음 만든 인스턴스를 복사(model_copy)하여
+      gRPC 채널 등 전송 계층을 새로 열지 않고 공유합니다.
+    - 모든 호출은 모델별 ConcurrencyLimiter를 거칩니다.
+
+    Args:
+        model (str | None): 모델 이름. None이면 GEMINI_MODEL_NAME을 사용합니다.
+        temperature (float): 샘플링 temperature.
+    """
+    model = model or settings.GEMINI_MODEL_NAME
+    key = (model, temperature)
+    llm = _llms.get(key)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                client = _clients.get(model)
+                if client is None:
+                    llm = _clients[model] = PooledChatGoogleGenerativeAI(
+                        model=model,
+                        google_api_key=settings.GOOGLE_API_KEY,
+                        temperature=temperature,
+                    )
+                else:
+                    llm = client.model_copy(update={"temperature": temperature})
+                _llms[key] = llm
+    return llm
+
+def get_llm_stats():
+    """모델별 LLM 동시 호출 통계를 반환합니다. 아직 호출된 모델이 없으면 빈 dict를 반환합니다."""
+    with _lock:
+        limiters = dict(_limiters)
+        instances = len(_llms)
+    return {"instances": instances, "models": {model: limiter.stats() for model, limiter in limiters.items()}}
@@ -1,30 +1,119 @@
 # server/agents/master_agent.py
+import threading
+import time
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from .state import AgentState
-from ..tools.google_services import get_google_services_tools
-from .chains import get_gmail_chain, get_calendar_chain, get_general_chain
-# RAG 기능은 아직 사용하지 않으므로 주석 처리 (필요시 활성화)
-# from ..rag.retriever import get_rag_retriever
+from .chains import get_gmail_chain, get_calendar_chain, get_general_chain, get_rag_chain, get_router_chain, get_synthesis_chain, get_history_summary_chain, get_cached_rag_chain, format_documents, RAG_SYSTEM_INSTRUCTION
+from .context_cache import create_context_cache
+from .history import HistoryManager, history_budget
+from .intent import get_intent_classifier, split_clauses
+from .response_cache import ResponseCache, history_key
+from ..core.config import settings
+from ..core.metrics import latency
+from ..rag.embeddings import get_embeddings
+from ..rag.retriever import get_rag_retriever
+from ..rag.store import CHUNK_SIZE
 
 # --- 1. 도구 및 체인 준비 ---
-tools = get_google_services_tools(['gmail', 'calendar'])
-gmail_tool = next((t for t in tools if t.name == 'search_gmail'), None)
-calendar_tool = next((t for t in tools if t.name == 'get_today_calendar_events'), None)
+HISTORY_SUMMARY_MAX_CHARS = settings.HISTORY_SUMMARY_TOKENS * 3 // 2
 
-# 각 작업에 맞는 체인(Chain)을 생성합니다.
-gmail_chain = get_gmail_chain(gmail_tool)
-calendar_chain = get_calendar_chain(calendar_tool)
-general_chain = get_general_chain()
-# rag_chain = ... # 필요시 RAG 체인도 여기에 정의
+class AgentComponents:
+    """
+    그래프 노드가 사용하는 도구, 체인, 캐시를 한곳에 모읍니다.
+    모듈을 import할 때가 아니라 get_agent_components()를 처음 호출할 때
+    (서버의 백그라운드 준비 단계 또는 첫 요청) 한 번만 생성합니다.
+    """
+
+    def __init__(self):
+        # Google API 클라이언트 라이브러리는 import 비용이 크므로 도구를 만들 때 불러옵니다.
+        from ..tools.google_services import get_google_services_tools
+
+        tools = get_google_services_tools(['gmail', 'calendar'])
+        self.gmail_tool = next((t for t in tools if t.name == 'search_gmail'), None)
+        self.calendar_tool = next((t for t in tools if t.name == 'get_calendar_events'), None)
+
+        # 각 작업에 맞는 체인(Chain)을 생성합니다.
+        self.gmail_chain = get_gmail_chain(self.gmail_tool)
+        self.calendar_chain = get_calendar_chain(self.calendar_tool)
+        self.general_chain = get_general_chain()
+        self.rag_chain = get_rag_chain()
+        self.synthesis_chain = get_synthesis_chain()
+        # 로컬 분류기의 신뢰도가 낮은 질문만 처리하는 LLM 라우터
+        self.router_chain = get_router_chain(ANSWER_NODES)
+
+        # general/RAG 답변 캐시. Gmail/Calendar 답변은 실시간 개인 데이터이므로 캐싱하지 않습니다.
+        self.response_cache = ResponseCache(
+            embeddings=get_embeddings,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ) if settings.RESPONSE_CACHE_ENABLED else None
+
+        # 프롬프트에 넣을 대화 기록 관리자. 최근 턴만 그대로 두고 오래된 턴은 누적 요약으로 압축합니다.
+        self.history_summary_chain = get_history_summary_chain()
+        self.history_manager = HistoryManager(
+            summarize=_summarize_history,
+            asummarize=_asummarize_history,
+            window_turns=settings.HISTORY_WINDOW_TURNS,
+            max_tokens=history_budget(settings.GEMINI_MODEL_NAME, settings.HISTORY_MAX_TOKENS),
+            summary_tokens=settings.HISTORY_SUMMARY_TOKENS,
+        )
+
+        # RAG 문서 context의 Gemini 명시적 컨텍스트 캐시. 같은 문서 묶음이 반복해서 검색되면
+        # 시스템 지시문 + 문서를 캐시에 등록해 두고, 이후 요청은 질문과 대화 기록만 전송합니다.
+        # 모델이 명시적 캐시를 지원하지 않거나 문서 context가 최소 크기에 못 미치면 None입니다.
+        self.context_cache = create_context_cache(
+            settings, RAG_SYSTEM_INSTRUCTION, max_context_chars=settings.RAG_TOP_K * CHUNK_SIZE,
+        )
+
+_components_lock = threading.Lock()
+_components = None
+
+def get_agent_components():
+    """프로세스 전역에서 공유하는 AgentComponents를 반환합니다. 최초 호출 시에만 생성합니다."""
+    global _components
+    if _components is None:
+        with _components_lock:
+            if _components is None:
+                _components = AgentComponents()
+    return _components
+
+def _summarize_history(summary, turns):
+    chain = get_agent_components().history_summary_chain
+    return chain.invoke({"summary": summary or "(없음)", "turns": turns, "max_chars": HISTORY_SUMMARY_MAX_CHARS})
+
+async def _asummarize_history(summary, turns):
+    chain = get_agent_components().history_summary_chain
+    return await chain.ainvoke({"summary": summary or "(없음)", "turns": turns, "max_chars": HISTORY_SUMMARY_MAX_CHARS})
+
+def get_history_stats():
+    """대화 기록 요약 캐시 통계를 반환합니다. 아직 준비되지 않았으면 None을 반환합니다."""
+    return _components.history_manager.stats() if _components is not None else None
+
+def get_context_cache_stats():
+    """Gemini 컨텍스트 캐시 통계를 반환합니다. 사용하지 않거나 아직 준비되지 않았으면 None을 반환합니다."""
+    if _components is None or _components.context_cache is None:
+        return None
+    return _components.context_cache.stats()
+
+def get_response_cache_stats():
+    """응답 캐시 적중 통계를 반환합니다. 캐시를 사용하지 않거나 아직 준비되지 않았으면 None을 반환합니다."""
+    if _components is None or _components.response_cache is None:
+        return None
+    return _components.response_cache.stats()
 
 # --- 2. LangGraph 노드 정의 ---
-def chain_node(state: AgentState, chain):
+def chain_node(state: AgentState, chain, with_history=True):
     """
     주어진 체인을 실행하고, 그 결과를 AIMessage로 변환하여 상태를 업데이트합니다.
+    대화 기록은 history_manager가 최근 턴 + 요약으로 줄여서 전달합니다.
+    프롬프트가 대화 기록을 쓰지 않는 체인(Gmail/Calendar 요약)은 with_history=False로 요약 비용을 아낍니다.
     """
     user_input = state['messages'][-1].content
-    history = state['messages'][:-1]
+    history = get_agent_components().history_manager.prepare(state['messages'][:-1]) if with_history else []
     
     # 체인 실행
     result = chain.invoke({
@@ -34,51 +123,447 @@ def chain_node(state: AgentState, chain):
     
     return {"messages": [AIMessage(content=result)]}
 
+async def achain_node(state: AgentState, chain, config: RunnableConfig, with_history=True):
+    """
+    chain_node의 비동기 버전입니다. 체인을 ainvoke로 실행하므로
+    LLM/도구 호출을 기다리는 동안 이벤트 루프가 다른 요청을 처리할 수 있습니다.
+
+    노드의 config(콜백)를 체인에 직접 넘깁니다. 비동기 코드에서 콜백이 contextvar로 자동 전파되는 것은
+    Python 3.11부터이므로, 넘기지 않으면 3.9/3.10에서 /chat/stream의 token/tool 이벤트가 사라집니다.
+    """
+    user_input = state['messages'][-1].content
+    history = await get_agent_components().history_manager.aprepare(state['messages'][:-1]) if with_history else []
+
+    result = await chain.ainvoke({
+        "input": user_input,
+        "history": history
+    }, config=config)
+
+    return {"messages": [AIMessage(content=result)]}
+
+def _cache_key(state: AgentState, namespace, version=""):
+    """
+    (사용자 범위, 네임스페이스, 질문, 대화 기록 해시)를 반환합니다.
+    version(예: 문서 인덱스 세대)이 있으면 대화 기록 해시에 붙여, 버전이 바뀐 뒤에는 이전 응답을 재사용하지 않습니다.
+    """
+    context = history_key(state['messages'][:-1])
+    return (
+        state.get('user_id') or "default",
+        namespace,
+        state['messages'][-1].content,
+        f"{context}@{version}" if version else context,
+    )
+
+def cached_node(state: AgentState, namespace, node, version=""):
+    """
+    응답 캐시를 먼저 조회하고, 없을 때만 node(state)를 실행하여 응답을 저장합니다.
+    같은 사용자가 같은 대화 맥락에서 같은(또는 의미가 매우 비슷한) 질문을 하면 LLM을 호출하지 않습니다.
+    """
+    response_cache = get_agent_components().response_cache
+    if response_cache is None:
+        return node(state)
+    scope, namespace, question, context = _cache_key(state, namespace, version)
+    cached, vector = response_cache.lookup(scope, namespace, question, context)
+    if cached is not None:
+        return {"messages": [AIMessage(content=cached)]}
+    result = node(state)
+    response_cache.store(scope, namespace, question, result["messages"][-1].content, context, vector)
+    return result
+
+async def acached_node(state: AgentState, namespace, anode, version=""):
+    response_cache = get_agent_components().response_cache
+    if response_cache is None:
+        return await anode(state)
+    scope, namespace, question, context = _cache_key(state, namespace, version)
+    cached, vector = await response_cache.alookup(scope, namespace, question, context)
+    if cached is not None:
+        return {"messages": [AIMessage(content=cached)]}
+    result = await anode(state)
+    response_cache.store(scope, namespace, question, result["messages"][-1].content, context, vector)
+    return result
+
 def general_node(state: AgentState):
-    return chain_node(state, general_chain)
+    return cached_node(state, "general", lambda s: chain_node(s, get_agent_components().general_chain))
+
+async def ageneral_node(state: AgentState, config: RunnableConfig):
+    return await acached_node(state, "general", lambda s: achain_node(s, get_agent_components().general_chain, config))
 
 def gmail_node(state: AgentState):
-    return chain_node(state, gmail_chain)
+    return chain_node(state, get_agent_components().gmail_chain, with_history=False)
+
+async def agmail_node(state: AgentState, config: RunnableConfig):
+    return await achain_node(state, get_agent_components().gmail_chain, config, with_history=False)
 
 def calendar_node(state: AgentState):
-    return chain_node(state, calendar_chain)
+    return chain_node(state, get_agent_components().calendar_chain, with_history=False)
+
+async def acalendar_node(state: AgentState, config: RunnableConfig):
+    return await achain_node(state, get_agent_components().calendar_chain, config, with_history=False)
+
+RAG_UNAVAILABLE_MESSAGE = (
+    "문서 저장소가 아직 준비되지 않았습니다. "
+    "'python -m server.rag.ingest'로 문서를 먼저 인덱싱해주세요."
+)
+
+def _record_rag_latency(retrieve_ms, generate_ms, doc_count):
+    latency.record("rag.retrieve", retrieve_ms)
+    latency.record("rag.generate", generate_ms)
+    print(f"[RAG] retrieve {retrieve_ms:.0f}ms ({doc_count} docs), generate {generate_ms:.0f}ms")
+
+def _index_generation(retriever):
+    # 기존 형식(LangChain FAISS) 저장소의 Retriever에는 세대 번호가 없습니다.
+    return getattr(retriever, "index_generation", "")
+
+def rag_node(state: AgentState):
+    """
+    서버 시작 시 미리 로드해 둔 Retriever로 문서를 검색한 뒤 답변을 생성합니다.
+    검색(retrieve)과 생성(generate) 시간을 각각 기록합니다.
+    """
+    try:
+        retriever = get_rag_retriever()
+    except FileNotFoundError:
+        return {"messages": [AIMessage(content=RAG_UNAVAILABLE_MESSAGE)]}
+    # 인덱스 세대를 캐시 키에 넣어 ingest로 문서가 바뀐 뒤에는 이전 문서로 만든 답변을 반환하지 않습니다.
+    return cached_node(state, "rag", lambda s: _rag_answer(s, retriever), _index_generation(retriever))
+
+async def arag_node(state: AgentState, config: RunnableConfig):
+    try:
+        retriever = get_rag_retriever()
+    except FileNotFoundError:
+        return {"messages": [AIMessage(content=RAG_UNAVAILABLE_MESSAGE)]}
+    return await acached_node(state, "rag", lambda s: _arag_answer(s, retriever, config), _index_generation(retriever))
+
+def _generate_rag_answer(user_input, history, context):
+    """
+    컨텍스트 캐시에 같은 문서 묶음이 등록되어 있으면 캐시를 사용하여 답변하고,
+    없거나 캐시 요청이 실패하면 시스템 프롬프트와 문서를 함께 보내는 기존 방식으로 답변합니다.
+    """
+    components = get_agent_components()
+    context_cache = components.context_cache
+    cache_name = context_cache.lookup(RAG_SYSTEM_INSTRUCTION, context) if context_cache is not None else None
+    if cache_name is not None:
+        try:
+            return get_cached_rag_chain(cache_name).invoke({"input": user_input, "history": history})
+        except Exception as e:
+            print(f"Cached RAG generation failed, resending context: {e}")
+            context_cache.invalidate(cache_name)
+    return components.rag_chain.invoke({"input": user_input, "history": history, "context": context})
+
+async def _agenerate_rag_answer(user_input, history, context, config=None):
+    components = get_agent_components()
+    context_cache = components.context_cache
+    cache_name = context_cache.lookup(RAG_SYSTEM_INSTRUCTION, context) if context_cache is not None else None
+    if cache_name is not None:
+        try:
+            return await get_cached_rag_chain(cache_name).ainvoke({"input": user_input, "history": history}, config=config)
+        except Exception as e:
+            print(f"Cached RAG generation failed, resending context: {e}")
+            context_cache.invalidate(cache_name)
+    return await components.rag_chain.ainvoke(
+        {"input": user_input, "history": history, "context": context}, config=config
+    )
+
+def _rag_answer(state: AgentState, retriever):
+    user_input = state['messages'][-1].content
+    history = get_agent_components().history_manager.prepare(state['messages'][:-1])
+
+    started = time.perf_counter()
+    docs = retriever.invoke(user_input)
+    retrieved = time.perf_counter()
+    result = _generate_rag_answer(user_input, history, format_documents(docs))
+    _record_rag_latency((retrieved - started) * 1000, (time.perf_counter() - retrieved) * 1000, len(docs))
+    return {"messages": [AIMessage(content=result)]}
+
+async def _arag_answer(state: AgentState, retriever, config=None):
+    user_input = state['messages'][-1].content
+    history = await get_agent_components().history_manager.aprepare(state['messages'][:-1])
+
+    started = time.perf_counter()
+    docs = await retriever.ainvoke(user_input, config=config)
+    retrieved = time.perf_counter()
+    result = await _agenerate_rag_answer(user_input, history, format_documents(docs), config)
+    _record_rag_latency((retrieved - started) * 1000, (time.perf_counter() - retrieved) * 1000, len(docs))
+    return {"messages": [AIMessage(content=result)]}
+
+# 사용자에게 최종 답변을 생성하는 노드 목록입니다.
+ANSWER_NODES = ("general_node", "gmail_node", "calendar_node", "rag_node")
+
+# --- 다중 의도 분기 ---
+# "오늘 일정이랑 새 메일 알려줘"처럼 한 메시지에 여러 요청이 있으면 의도별 분기를 병렬로 실행한 뒤
+# synthesize_node에서 한 번에 답변합니다. 분기는 도구(검색)만 실행하고 LLM은 종합 단계에서 한 번만 호출하므로,
+# 전체 지연 시간은 분기 지연 시간의 합이 아니라 가장 느린 분기 + 답변 생성 시간이 됩니다.
+BRANCH_NODES = {"gmail_node": "gmail_branch", "calendar_node": "calendar_branch", "rag_node": "rag_branch"}
+SYNTHESIS_NODE = "synthesize_node"
+BRANCH_TITLES = {"gmail_node": "이메일 검색 결과", "calendar_node": "일정 검색 결과", "rag_node": "문서 검색 결과"}
+
+def _search_documents(question):
+    try:
+        return format_documents(get_rag_retriever().invoke(question))
+    except FileNotFoundError:
+        return RAG_UNAVAILABLE_MESSAGE
+
+async def _asearch_documents(question, config=None):
+    try:
+        return format_documents(await get_rag_retriever().ainvoke(question, config=config))
+    except FileNotFoundError:
+        return RAG_UNAVAILABLE_MESSAGE
+
+# 의도별 (동기, 비동기) 검색 함수. 비동기 함수는 분기 노드의 config를 받아 도구/Retriever에 넘깁니다.
+BRANCH_SEARCHES = {
+    "gmail_node": (
+        lambda q: get_agent_components().gmail_tool.invoke(q),
+        lambda q, config: get_agent_components().gmail_tool.ainvoke(q, config=config),
+    ),
+    "calendar_node": (
+        lambda q: get_agent_components().calendar_tool.invoke({"query": q}),
+        lambda q, config: get_agent_components().calendar_tool.ainvoke({"query": q}, config=config),
+    ),
+    "rag_node": (_search_documents, _asearch_documents),
+}
+
+def _branch_result(intent, question, output, started):
+    latency.record(f"branch.{intent}", (time.perf_counter() - started) * 1000)
+    return {"partial_results": [{"intent": intent, "question": question, "output": output}]}
+
+def make_branch_node(intent):
+    """Send로 전달된 {"question": 절} 하나를 검색하여 partial_results에 추가하는 분기 노드를 만듭니다."""
+    search, asearch = BRANCH_SEARCHES[intent]
+
+    def branch(state):
+        started = time.perf_counter()
+        return _branch_result(intent, state["question"], search(state["question"]), started)
+
+    async def abranch(state, config: RunnableConfig):
+        started = time.perf_counter()
+        return _branch_result(intent, state["question"], await asearch(state["question"], config), started)
+
+    return RunnableLambda(branch, afunc=abranch)
+
+def _synthesis_input(state: AgentState, history):
+    order = list(BRANCH_NODES)
+    results = sorted(state.get("partial_results") or [], key=lambda result: order.index(result["intent"]))
+    sections = "\n\n".join(
+        f"[{BRANCH_TITLES[result['intent']]}] (요청: {result['question']})\n{result['output']}" for result in results
+    )
+    return {"input": state['messages'][-1].content, "history": history, "sections": sections}
+
+def synthesize_node(state: AgentState):
+    components = get_agent_components()
+    history = components.history_manager.prepare(state['messages'][:-1])
+    return {"messages": [AIMessage(content=components.synthesis_chain.invoke(_synthesis_input(state, history)))]}
+
+async def asynthesize_node(state: AgentState, config: RunnableConfig):
+    components = get_agent_components()
+    history = await components.history_manager.aprepare(state['messages'][:-1])
+    answer = await components.synthesis_chain.ainvoke(_synthesis_input(state, history), config=config)
+    return {"messages": [AIMessage(content=answer)]}
 
 # --- 3. 라우팅 로직 정의 ---
-def route_message(state: AgentState):
-    """사용자 메시지의 의도를 파악하여 적절한 체인으로 라우팅합니다."""
-    last_message = state['messages'][-1]
-    message_content = last_message.content.lower()
-
-    if "메일" in message_content or "gmail" in message_content:
-        print("Routing to: gmail_node")
-        return "gmail_node"
-    elif "일정" in message_content or "캘린더" in message_content or "calendar" in message_content:
-        print("Routing to: calendar_node")
-        return "calendar_node"
-    else:
-        print("Routing to: general_node")
-        return "general_node"
+# 노드별 라우팅 키워드입니다. 키워드가 바뀌면 그래프를 다시 컴파일해야 하므로
+# 직접 수정하지 말고 update_routing_config()를 통해 변경합니다.
+# 의도 분류기의 신뢰도가 낮을 때 LLM 라우터보다 먼저 확인합니다.
+ROUTING_KEYWORDS = {
+    "gmail_node": ["메일", "gmail"],
+    "calendar_node": ["일정", "캘린더", "calendar"],
+    "rag_node": ["문서", "보고서", "회의록"],
+}
+
+def keyword_route(message_content, routing_keywords):
+    """키워드가 포함된 첫 번째 노드를 반환합니다. 없으면 None."""
+    message_content = message_content.lower()
+    for node_name, keywords in routing_keywords.items():
+        if any(keyword in message_content for keyword in keywords):
+            return node_name
+    return None
+
+def _local_route(message_content, routing_keywords):
+    """
+    LLM 호출 없이 라우팅을 시도합니다.
+
+    Returns:
+        tuple[str | None, str, str]: (결정된 노드 또는 None, 결정 근거, 분류기 1순위 라벨)
+    """
+    started = time.perf_counter()
+    label, confidence = get_intent_classifier().predict(message_content)
+    latency.record("route.classifier", (time.perf_counter() - started) * 1000)
+    if confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+        return label, f"classifier {confidence:.2f}", label
+    node = keyword_route(message_content, routing_keywords)
+    if node is not None:
+        return node, "keyword", label
+    return None, f"classifier {confidence:.2f}", label
+
+def detect_intents(message_content, routing_keywords):
+    """
+    메시지를 절로 나누어 절마다 의도를 분류합니다.
+    서로 다른 분기 의도(Gmail, Calendar, 문서)가 두 개 이상이면 [(노드, 절), ...]을, 아니면 빈 목록을 반환합니다.
+    """
+    clauses = split_clauses(message_content)
+    if not settings.INTENT_MULTI_ENABLED or len(clauses) < 2:
+        return []
+    classifier = get_intent_classifier()
+    intents = {}
+    for clause in clauses:
+        label, confidence = classifier.predict(clause)
+        node = label if confidence >= settings.INTENT_CONFIDENCE_THRESHOLD else keyword_route(clause, routing_keywords)
+        if node in BRANCH_NODES and node not in intents:
+            intents[node] = clause
+    return list(intents.items()) if len(intents) > 1 else []
+
+def _fan_out(state: AgentState, intents):
+    print(f"Routing to: {' + '.join(node for node, _ in intents)} (multi-intent)")
+    return [
+        Send(BRANCH_NODES[node], {"question": clause, "user_id": state.get("user_id")})
+        for node, clause in intents
+    ]
+
+def _parse_llm_route(output, default):
+    output = output.strip().lower()
+    return next((node for node in ANSWER_NODES if node in output), default)
+
+def route_message(state: AgentState, routing_keywords=None):
+    """
+    사용자 메시지의 의도를 파악하여 적절한 체인으로 라우팅합니다.
+
+    0. 여러 요청이 함께 있으면(detect_intents) 의도별 분기로 Send 목록을 반환하여 병렬 실행합니다.
+    1. 로컬 의도 분류기(문자 n-gram TF-IDF)로 분류합니다. 신뢰도가 임계값 이상이면 그대로 사용합니다.
+    2. 신뢰도가 낮으면 라우팅 키워드를 확인합니다.
+    3. 그래도 정해지지 않으면 LLM 라우터에 묻습니다. (INTENT_LLM_FALLBACK)
+       LLM을 사용하지 않거나 호출에 실패하면 분류기의 1순위 라벨을 사용합니다.
+    """
+    routing_keywords = routing_keywords or ROUTING_KEYWORDS
+    message_content = state['messages'][-1].content
+    intents = detect_intents(message_content, routing_keywords)
+    if intents:
+        return _fan_out(state, intents)
+    node, reason, label = _local_route(message_content, routing_keywords)
+    if node is None and settings.INTENT_LLM_FALLBACK:
+        started = time.perf_counter()
+        try:
+            node, reason = _parse_llm_route(get_agent_components().router_chain.invoke({"input": message_content}), label), "llm"
+        except Exception as e:
+            print(f"LLM routing failed, using classifier label: {e}")
+        latency.record("route.llm", (time.perf_counter() - started) * 1000)
+    node = node or label
+    print(f"Routing to: {node} ({reason})")
+    return node
+
+async def aroute_message(state: AgentState, routing_keywords=None, config=None):
+    """route_message의 비동기 버전입니다. LLM 라우터를 ainvoke로 호출합니다."""
+    routing_keywords = routing_keywords or ROUTING_KEYWORDS
+    message_content = state['messages'][-1].content
+    intents = detect_intents(message_content, routing_keywords)
+    if intents:
+        return _fan_out(state, intents)
+    node, reason, label = _local_route(message_content, routing_keywords)
+    if node is None and settings.INTENT_LLM_FALLBACK:
+        started = time.perf_counter()
+        try:
+            node, reason = _parse_llm_route(await get_agent_components().router_chain.ainvoke({"input": message_content}, config=config), label), "llm"
+        except Exception as e:
+            print(f"LLM routing failed, using classifier label: {e}")
+        latency.record("route.llm", (time.perf_counter() - started) * 1000)
+    node = node or label
+    print(f"Routing to: {node} ({reason})")
+    return node
 
 # --- 4. 그래프(Graph) 구성 ---
-def get_agent_executor():
-    """LangGraph 워크플로우를 생성하고 컴파일하여 실행기를 반환합니다."""
+def build_agent_executor(routing_keywords=None):
+    """
+    LangGraph 워크플로우를 생성하고 컴파일하여 실행기를 반환합니다.
+    컴파일 시점의 라우팅 설정을 그래프에 고정하므로, 설정이 바뀌어도
+    이미 실행 중인 요청의 라우팅은 달라지지 않습니다.
+    """
+    routing_snapshot = dict(routing_keywords or ROUTING_KEYWORDS)
+
+    def route(state: AgentState):
+        return route_message(state, routing_snapshot)
+
+    async def aroute(state: AgentState, config: RunnableConfig):
+        return await aroute_message(state, routing_snapshot, config)
+
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("general_node", general_node)
-    workflow.add_node("gmail_node", gmail_node)
-    workflow.add_node("calendar_node", calendar_node)
+    # 각 노드는 동기/비동기 구현을 모두 가지므로 invoke와 ainvoke 어느 쪽으로도 실행할 수 있습니다.
+    workflow.add_node("general_node", RunnableLambda(general_node, afunc=ageneral_node))
+    workflow.add_node("gmail_node", RunnableLambda(gmail_node, afunc=agmail_node))
+    workflow.add_node("calendar_node", RunnableLambda(calendar_node, afunc=acalendar_node))
+    workflow.add_node("rag_node", RunnableLambda(rag_node, afunc=arag_node))
+    # 다중 의도 분기: 라우터가 반환한 Send 목록대로 병렬 실행된 뒤 종합 노드에서 합쳐집니다.
+    for intent, branch_name in BRANCH_NODES.items():
+        workflow.add_node(branch_name, make_branch_node(intent))
+        workflow.add_edge(branch_name, SYNTHESIS_NODE)
+    workflow.add_node(SYNTHESIS_NODE, RunnableLambda(synthesize_node, afunc=asynthesize_node))
 
     workflow.set_conditional_entry_point(
-        route_message,
+        RunnableLambda(route, afunc=aroute),
         {
             "general_node": "general_node",
             "gmail_node": "gmail_node",
             "calendar_node": "calendar_node",
+            "rag_node": "rag_node",
         },
     )
 
     workflow.add_edge("general_node", END)
     workflow.add_edge("gmail_node", END)
     workflow.add_edge("calendar_node", END)
+    workflow.add_edge("rag_node", END)
+    workflow.add_edge(SYNTHESIS_NODE, END)
 
     return workflow.compile()
+
+# --- 5. 컴파일된 그래프 레지스트리 ---
+# 컴파일은 요청마다 반복할 필요가 없으므로 프로세스당 한 번만 수행하고 재사용합니다.
+# 라우팅 설정이 바뀌면 새 그래프를 컴파일한 뒤 버전을 올려 원자적으로 교체합니다.
+# 이미 실행 중인 요청은 이전 그래프 객체를 그대로 사용하므로 안전합니다.
+_registry_lock = threading.Lock()
+_registry = {"version": 0, "executor": None}
+
+def _swap_agent_executor(routing_keywords=None):
+    """새 그래프를 컴파일하여 레지스트리에 등록합니다. 호출 측에서 잠금을 잡아야 합니다."""
+    executor = build_agent_executor(routing_keywords)
+    _registry["executor"] = executor
+    _registry["version"] += 1
+    print(f"Agent graph compiled (version {_registry['version']})")
+    return executor
+
+def get_agent_executor():
+    """
+    프로세스 전역에서 공유하는 컴파일된 그래프를 반환합니다.
+    아직 컴파일되지 않았다면 이 시점에 한 번만 컴파일합니다.
+    """
+    executor = _registry["executor"]
+    if executor is not None:
+        return executor
+    with _registry_lock:
+        if _registry["executor"] is None:
+            _swap_agent_executor()
+        return _registry["executor"]
+
+def get_agent_executor_version():
+    """현재 레지스트리에 등록된 그래프의 버전을 반환합니다. (0이면 아직 미컴파일)"""
+    return _registry["version"]
+
+def update_routing_config(routing_keywords):
+    """
+    라우팅 키워드를 교체하고 그래프를 다시 컴파일하여 핫스왑합니다.
+
+    Args:
+        routing_keywords (dict): {노드 이름: [키워드, ...]} 형태의 라우팅 설정.
+
+    Returns:
+        int: 교체된 그래프의 버전.
+    """
+    unknown = set(routing_keywords) - (set(ANSWER_NODES) - {"general_node"})
+    if unknown:
+        raise ValueError(f"Unknown routing nodes: {sorted(unknown)}")
+
+    global ROUTING_KEYWORDS
+    with _registry_lock:
+        ROUTING_KEYWORDS = {
+            node: [keyword.lower() for keyword in keywords]
+            for node, keywords in routing_keywords.items()
+        }
+        _swap_agent_executor(ROUTING_KEYWORDS)
+        return _registry["version"]
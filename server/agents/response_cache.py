@@ -0,0 +1,130 @@
+# server/agents/response_cache.py
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+def normalize_question(text):
+    """정확 일치 비교를 위해 질문을 정규화합니다. (대소문자, 공백, 끝 문장부호 무시)"""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?!.~ ")
+
+def history_key(history):
+    """이전 대화가 같은 경우에만 캐시를 재사용하도록 대화 기록의 해시를 만듭니다."""
+    digest = hashlib.sha256()
+    for message in history:
+        digest.update(f"{message.type}:{message.content}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+class ResponseCache:
+    """
+    LLM 체인 응답을 캐싱합니다. 정확 일치(정규화된 질문)를 먼저 찾고,
+    없으면 질문 임베딩의 코사인 유사도가 similarity_threshold 이상인 응답을 재사용합니다.
+
+    항목은 (범위, 네임스페이스, 대화 기록 해시)로 구분합니다. 범위에는 사용자 ID를 넣어
+    한 사용자의 응답이 다른 사용자에게 반환되지 않도록 하고, 네임스페이스는 노드(general/rag)를 구분합니다.
+
+    Args:
+        embeddings (Callable[[], Embeddings] | None): 의미 검색에 사용할 임베딩 모델을 반환하는 함수. (지연 로드)
+        ttl (int): 응답 유효 시간(초).
+        similarity_threshold (float): 의미 일치로 인정할 최소 코사인 유사도. 1보다 크면 정확 일치만 사용합니다.
+        max_entries (int): 보관할 최대 응답 수. (초과 시 오래된 항목부터 삭제)
+    """
+
+    def __init__(self, embeddings=None, ttl=3600, similarity_threshold=0.95, max_entries=2000):
+        self._get_embeddings = embeddings
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        # (범위, 네임스페이스, 대화 기록 해시, 정규화된 질문) -> (응답, 정규화된 임베딩 또는 None, 만료 시각)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @property
+    def semantic_enabled(self):
+        return self._get_embeddings is not None and self.similarity_threshold <= 1
+
+    def lookup(self, scope, namespace, question, context=""):
+        """캐시된 응답을 반환합니다. 없으면 (None, 질문 임베딩)을 반환하여 store()에서 재사용합니다."""
+        key = (scope, namespace, context, normalize_question(question))
+        response = self._lookup_exact(key)
+        if response is not None:
+            return response, None
+        vector = self._embed(question) if self.semantic_enabled else None
+        return self._lookup_semantic(key, vector), vector
+
+    async def alookup(self, scope, namespace, question, context=""):
+        key = (scope, namespace, context, normalize_question(question))
+        response = self._lookup_exact(key)
+        if response is not None:
+            return response, None
+        vector = await self._aembed(question) if self.semantic_enabled else None
+        return self._lookup_semantic(key, vector), vector
+
+    def store(self, scope, namespace, question, response, context="", vector=None):
+        """응답을 저장합니다. vector는 lookup()이 반환한 질문 임베딩입니다."""
+        key = (scope, namespace, context, normalize_question(question))
+        with self._lock:
+            self._entries[key] = (response, vector, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace=None):
+        """네임스페이스(예: 문서 인덱스가 바뀐 rag)의 항목을 삭제합니다. None이면 전체 삭제."""
+        with self._lock:
+            for key in [key for key in self._entries if namespace is None or key[1] == namespace]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / total if total else 0.0
+        return stats
+
+    def _lookup_exact(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.monotonic():
+                self._stats["exact_hits"] += 1
+                return entry[0]
+        return None
+
+    def _lookup_semantic(self, key, vector):
+        scope, namespace, context, _ = key
+        now = time.monotonic()
+        with self._lock:
+            if vector is not None:
+                candidates = [
+                    (response, cached_vector)
+                    for (s, n, c, _), (response, cached_vector, expires_at) in self._entries.items()
+                    if s == scope and n == namespace and c == context and cached_vector is not None and expires_at > now
+                ]
+                if candidates:
+                    similarities = np.stack([cached_vector for _, cached_vector in candidates]) @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        self._stats["semantic_hits"] += 1
+                        return candidates[best][0]
+            self._stats["misses"] += 1
+            # 만료된 항목을 정리합니다.
+            for expired in [k for k, entry in self._entries.items() if entry[2] <= now]:
+                del self._entries[expired]
+        return None
+
+    def _embed(self, question):
+        return self._normalize(self._get_embeddings().embed_query(question))
+
+    async def _aembed(self, question):
+        return self._normalize(await self._get_embeddings().aembed_query(question))
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -1,17 +1,9 @@
 # server/agents/specialist_agents.py
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from server.core.config import settings
-
-# --- 공통 LLM 초기화 ---
-llm = ChatGoogleGenerativeAI(
-    model=settings.GEMINI_MODEL_NAME,
-    google_api_key=settings.GOOGLE_API_KEY,
-    temperature=0.7
-)
+from server.agents.llm import get_llm
 
 # --- 1. 일반 대화 에이전트 ---
 def create_general_agent():
@@ -20,7 +12,7 @@ def create_general_agent():
         MessagesPlaceholder(variable_name="history", optional=True),
         ("user", "{input}"),
     ])
-    chain = prompt | llm
+    chain = prompt | get_llm()
     return chain
 
 # --- 2. ReAct (Tool-Calling) 기반 에이전트 생성 함수 ---
@@ -34,7 +26,7 @@ def create_react_agent(tools, system_prompt):
         ("user", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
     ])
-    agent = create_tool_calling_agent(llm, tools, prompt)
+    agent = create_tool_calling_agent(get_llm(), tools, prompt)
     executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
     return executor
 
@@ -53,9 +45,9 @@ def create_calendar_agent(tools):
     # --- FIX: 도구 사용을 강력하게 지시하는 프롬프트로 변경 ---
     system_prompt = """
     당신은 Google Calendar API와 직접 연결된 AI 에이전트입니다.
-    당신의 유일한 임무는 사용자의 질문에 답하기 위해 'get_today_calendar_events' 도구를 사용하는 것입니다.
+    당신의 유일한 임무는 사용자의 질문에 답하기 위해 'get_calendar_events' 도구를 사용하는 것입니다.
     절대 추측하거나 일반적인 지식으로 답변해서는 안 됩니다. "일정을 확인할 수 없다" 또는 "권한이 없다"와 같은 답변을 해서는 안됩니다.
-    사용자가 일정에 대해 질문하면, 당신은 반드시 'get_today_calendar_events' 도구를 호출하여 그 결과를 바탕으로 답변해야 합니다. 이것이 당신의 유일한 기능입니다.
+    사용자가 일정에 대해 질문하면, 당신은 반드시 'get_calendar_events' 도구를 호출하여 그 결과를 바탕으로 답변해야 합니다. 이것이 당신의 유일한 기능입니다.
     """
     return create_react_agent(tools, system_prompt)
 
@@ -74,7 +66,7 @@ def create_rag_agent(retriever):
         ("user", "{input}"),
     ])
     
-    question_answer_chain = create_stuff_documents_chain(llm, prompt)
+    question_answer_chain = create_stuff_documents_chain(get_llm(), prompt)
     rag_chain = create_retrieval_chain(retriever, question_answer_chain)
     
     def invoke_rag_chain(state):
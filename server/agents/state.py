@@ -1,5 +1,5 @@
 # server/agents/state.py
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, List, Optional
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -16,6 +16,13 @@ class AgentState(TypedDict):
         history (list):
             LangChain 모델에 전달될 이전 대화 기록입니다.
             주로 (human_message, ai_message) 튜플의 리스트 형태로 사용됩니다.
+        user_id (Optional[str]):
+            요청한 사용자의 ID입니다. 응답 캐시 등 사용자별 데이터를 구분하는 데 사용합니다.
+        partial_results (Annotated[List[dict], operator.add]):
+            한 메시지에 여러 의도가 있을 때 병렬로 실행한 분기들의 결과입니다.
+            각 분기가 {"intent", "question", "output"}을 추가하고, 종합 노드가 하나의 답변으로 합칩니다.
     """
     messages: Annotated[List[BaseMessage], operator.add]
     history: list
+    user_id: Optional[str]
+    partial_results: Annotated[List[dict], operator.add]
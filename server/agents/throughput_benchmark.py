@@ -0,0 +1,58 @@
+# server/agents/throughput_benchmark.py
+import argparse
+import contextlib
+import io
+import time
+from server.agents.benchmark_stubs import SAMPLE_MESSAGES, initial_state, install_stub_components
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+def run(master_agent, mode, requests):
+    """
+    requests개의 질문을 차례로 처리하고 요청별 소요 시간(ms) 목록을 반환합니다.
+
+    mode:
+        compile: 요청마다 StateGraph를 만들고 compile()합니다. (레지스트리 도입 전 방식)
+        reuse: 프로세스 전역에서 한 번 컴파일한 그래프를 재사용합니다. (get_agent_executor)
+    """
+    timings = []
+    # 라우팅 로그(print)가 측정에 섞이지 않도록 출력을 버립니다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        master_agent.get_agent_executor()
+        for i in range(requests):
+            started = time.perf_counter()
+            if mode == "compile":
+                executor = master_agent.build_agent_executor()
+            else:
+                executor = master_agent.get_agent_executor()
+            executor.invoke(initial_state(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]))
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main(requests, llm_ms, warmup):
+    """
+    요청마다 그래프를 컴파일할 때와 컴파일된 그래프를 재사용할 때의 초당 처리량을 비교합니다.
+    LLM과 Google API는 스텁(benchmark_stubs)으로 대체하므로, --llm-ms가 0이면 순수한 서버 CPU 비용만 측정됩니다.
+    """
+    master_agent = install_stub_components(llm_ms=llm_ms)
+    # 의도 분류기 학습, 모듈 초기화 등 첫 호출 비용을 측정에서 제외합니다.
+    run(master_agent, "reuse", warmup)
+
+    print(f"requests={requests}, stub llm={llm_ms}ms")
+    print(f"{'mode':<8} {'req/s':>9} {'avg_ms':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for mode in ("compile", "reuse"):
+        timings = run(master_agent, mode, requests)
+        print(
+            f"{mode:<8} {len(timings) / (sum(timings) / 1000):>9.1f} {sum(timings) / len(timings):>8.2f} "
+            f"{percentile(timings, 0.5):>8.2f} {percentile(timings, 0.95):>8.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="그래프를 요청마다 컴파일할 때와 재사용할 때의 처리량을 비교합니다.")
+    parser.add_argument("--requests", type=int, default=200, help="방식별 요청 수")
+    parser.add_argument("--llm-ms", type=float, default=0, help="스텁 LLM 호출의 모의 지연 시간(ms)")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 요청 수")
+    args = parser.parse_args()
+    main(args.requests, args.llm_ms, args.warmup)
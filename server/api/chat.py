@@ -1,9 +1,54 @@
 # server/api/chat.py
+import asyncio
+import json
+import threading
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Tuple
-from langchain_core.messages import HumanMessage, AIMessage
-from server.agents.master_agent import get_agent_executor
+from typing import List, Optional, Tuple
+from server.core.config import settings
+
+# 이 모듈은 server.main이 시작할 때 import하므로, LangChain/LangGraph 등 무거운 모듈은
+# 처음 필요할 때(백그라운드 준비 단계 또는 첫 요청) 불러옵니다.
+_lock = threading.Lock()
+_agent = None
+_session_store = None
+
+def load_agent():
+    """
+    master_agent 모듈을 불러오고 그래프와 도구/체인을 준비한 뒤 모듈을 반환합니다.
+    서버의 백그라운드 준비 단계에서 먼저 호출되므로 보통은 바로 반환됩니다.
+    """
+    global _agent
+    if _agent is None:
+        from server.agents import master_agent
+        master_agent.get_agent_executor()
+        master_agent.get_agent_components()
+        _agent = master_agent
+    return _agent
+
+async def aload_agent():
+    """load_agent의 비동기 버전입니다. 아직 준비 중이면 스레드에서 기다려 이벤트 루프를 막지 않습니다."""
+    if _agent is not None:
+        return _agent
+    return await asyncio.to_thread(load_agent)
+
+def get_session_store():
+    """
+    서버 측 대화 기록 저장소를 반환합니다. 최초 호출 시에만 생성합니다.
+    session_id를 보낸 클라이언트는 전체 history 대신 새 메시지만 보내면 됩니다.
+    """
+    global _session_store
+    if _session_store is None:
+        with _lock:
+            if _session_store is None:
+                from server.core.session_store import create_session_store
+                _session_store = create_session_store(settings)
+    return _session_store
+
+def get_session_store_stats():
+    """대화 기록 저장소의 세션 수와 조회/추가 횟수를 반환합니다. 아직 만들지 않았으면 None을 반환합니다."""
+    return _session_store.stats() if _session_store is not None else None
 
 # API 라우터 생성
 router = APIRouter()
@@ -11,56 +56,76 @@ router = APIRouter()
 # 요청 본문(Request Body) 모델 정의
 class ChatRequest(BaseModel):
     message: str
-    history: List[Tuple[str, str]] # (human_message, ai_message) 형태의 리스트
+    history: List[Tuple[str, str]] = [] # (human_message, ai_message) 형태의 리스트 (session_id가 없을 때만 사용)
+    user_id: Optional[str] = None # 사용자별 캐시 범위를 구분하는 ID (없으면 "default")
+    session_id: Optional[str] = None # 서버에 저장된 대화 기록을 이어갈 세션 ID
 
 # 응답 본문(Response Body) 모델 정의
 class ChatResponse(BaseModel):
     response: str
 
+def build_initial_state(request: ChatRequest):
+    """요청 본문을 LangGraph 실행에 사용할 초기 상태로 변환합니다."""
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    if request.session_id:
+        # 서버에 저장해 둔 메시지 객체를 그대로 사용합니다. (요청마다 전체 기록을 받거나 다시 만들지 않음)
+        chat_history = get_session_store().get_messages(request.session_id)
+    else:
+        # Streamlit에서 받은 튜플 형태의 history를 HumanMessage와 AIMessage로 변환합니다.
+        chat_history = []
+        for human, ai in request.history:
+            chat_history.append(HumanMessage(content=human))
+            chat_history.append(AIMessage(content=ai))
+
+    # 현재 사용자 메시지를 HumanMessage로 추가합니다.
+    current_message = HumanMessage(content=request.message)
+
+    # AgentState는 'messages'와 'history'를 모두 가질 수 있습니다.
+    # 에이전트 프롬프트가 'history'를 요구하므로, 여기서 명시적으로 전달해줍니다.
+    return {
+        "messages": chat_history + [current_message],
+        "history": chat_history,
+        "user_id": request.user_id,
+    }
+
+def save_turn(request: ChatRequest, response: str):
+    """세션을 사용하는 요청이면 이번 턴을 대화 기록 저장소에 추가합니다."""
+    if request.session_id and response:
+        get_session_store().append(request.session_id, request.message, response)
+
+def extract_response(last_message):
+    """LangGraph 최종 상태의 마지막 메시지에서 응답 문자열을 추출합니다."""
+    # --- FIX: 다양한 출력 형태에 대응하도록 응답 추출 로직 수정 ---
+    if hasattr(last_message, 'content'):
+        # 마지막 메시지가 AIMessage와 같은 표준 메시지 객체인 경우
+        return last_message.content
+    if isinstance(last_message, dict):
+        # 마지막 메시지가 AgentExecutor의 출력값인 딕셔너리인 경우
+        # 'output' 키 또는 다른 잠재적 키에서 응답을 추출합니다.
+        return last_message.get('output') or last_message.get('answer') or str(last_message)
+    # 그 외의 경우, 문자열로 변환합니다.
+    return str(last_message)
+
 @router.post("/chat", response_model=ChatResponse)
 async def handle_chat(request: ChatRequest):
     """
     사용자의 채팅 메시지를 받아 AI 에이전트의 응답을 반환하는 엔드포인트.
     """
     try:
-        # LangGraph로 구성된 에이전트 실행기(executor)를 가져옵니다.
-        agent_executor = get_agent_executor()
-        
-        # Streamlit에서 받은 튜플 형태의 history를 HumanMessage와 AIMessage로 변환합니다.
-        chat_history = []
-        for human, ai in request.history:
-            chat_history.append(HumanMessage(content=human))
-            chat_history.append(AIMessage(content=ai))
-        
-        # 현재 사용자 메시지를 HumanMessage로 추가합니다.
-        current_message = HumanMessage(content=request.message)
-        
-        # AgentState는 'messages'와 'history'를 모두 가질 수 있습니다.
-        # 에이전트 프롬프트가 'history'를 요구하므로, 여기서 명시적으로 전달해줍니다.
-        initial_state = {
-            "messages": chat_history + [current_message],
-            "history": chat_history
-        }
-
-        # 에이전트를 완전한 초기 상태와 함께 실행합니다.
-        result = agent_executor.invoke(initial_state)
-        
-        # --- FIX: 다양한 출력 형태에 대응하도록 응답 추출 로직 수정 ---
+        # 서버 시작 시 컴파일해 둔 LangGraph 에이전트 실행기(executor)를 가져옵니다.
+        agent = await aload_agent()
+        agent_executor = agent.get_agent_executor()
+        initial_state = build_initial_state(request)
+
+        # 에이전트를 완전한 초기 상태와 함께 비동기로 실행합니다.
+        # LLM/Google API 응답을 기다리는 동안 이벤트 루프는 다른 요청을 처리합니다.
+        result = await agent_executor.ainvoke(initial_state)
+
         # LangGraph의 최종 상태(state)에서 마지막 메시지를 가져옵니다.
-        last_message = result['messages'][-1]
-        
-        ai_response = ""
-        if hasattr(last_message, 'content'):
-            # 마지막 메시지가 AIMessage와 같은 표준 메시지 객체인 경우
-            ai_response = last_message.content
-        elif isinstance(last_message, dict):
-            # 마지막 메시지가 AgentExecutor의 출력값인 딕셔너리인 경우
-            # 'output' 키 또는 다른 잠재적 키에서 응답을 추출합니다.
-            ai_response = last_message.get('output') or last_message.get('answer') or str(last_message)
-        else:
-            # 그 외의 경우, 문자열로 변환합니다.
-            ai_response = str(last_message)
-        
+        ai_response = extract_response(result['messages'][-1])
+        save_turn(request, ai_response)
+
         return ChatResponse(response=ai_response)
     except Exception as e:
         # 에러 발생 시 로그를 남기고, 사용자에게 에러 메시지를 반환할 수 있습니다.
@@ -69,3 +134,80 @@ async def handle_chat(request: ChatRequest):
         import traceback
         traceback.print_exc()
         return ChatResponse(response=f"죄송합니다, 요청을 처리하는 중 오류가 발생했습니다: {e}")
+
+# --- Server-Sent Events 스트리밍 ---
+def format_sse(event: str, data: dict) -> str:
+    """하나의 SSE 이벤트 문자열을 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_chat_events(request: ChatRequest):
+    """
+    LangGraph 실행 이벤트(astream_events)를 SSE 이벤트로 변환하여 순서대로 내보냅니다.
+
+    이벤트 종류:
+        route: 라우팅된 노드 이름 ({"node": ...}). 여러 요청이 함께 있으면 분기마다 한 번씩 보냅니다.
+        tool_start / tool_end: 도구 실행 시작/종료 ({"tool": ...})
+        token: 응답 토큰 조각 ({"content": ...})
+        done: 최종 응답 전체 ({"response": ...})
+        error: 처리 중 오류 ({"message": ...})
+    """
+    try:
+        agent = await aload_agent()
+        from server.agents.chains import ANSWER_STREAM_TAG
+        branch_intents = {branch: intent for intent, branch in agent.BRANCH_NODES.items()}
+        agent_executor = agent.get_agent_executor()
+        initial_state = build_initial_state(request)
+
+        final_response = None
+        async for event in agent_executor.astream_events(initial_state, version="v2"):
+            kind = event["event"]
+            name = event.get("name")
+
+            if kind == "on_chain_start" and name in agent.ANSWER_NODES:
+                yield format_sse("route", {"node": name})
+            elif kind == "on_chain_start" and name in branch_intents:
+                yield format_sse("route", {"node": branch_intents[name]})
+            elif kind == "on_tool_start":
+                yield format_sse("tool_start", {"tool": name})
+            elif kind == "on_tool_end":
+                yield format_sse("tool_end", {"tool": name})
+            elif kind == "on_retriever_start":
+                yield format_sse("tool_start", {"tool": "document_search"})
+            elif kind == "on_retriever_end":
+                yield format_sse("tool_end", {"tool": "document_search"})
+            elif kind == "on_chat_model_stream" and ANSWER_STREAM_TAG in event.get("tags", []):
+                # 답변을 생성하는 LLM의 토큰만 전달합니다. (라우팅/요약 등 내부 LLM 호출 제외)
+                content = event["data"]["chunk"].content
+                if content:
+                    yield format_sse("token", {"content": content})
+            elif kind == "on_chain_end" and (name in agent.ANSWER_NODES or name == agent.SYNTHESIS_NODE):
+                output = event["data"].get("output") or {}
+                messages = output.get("messages") if isinstance(output, dict) else None
+                if messages:
+                    final_response = extract_response(messages[-1])
+
+        save_turn(request, final_response)
+        yield format_sse("done", {"response": final_response or ""})
+    except Exception as e:
+        print(f"Error during chat streaming: {e}")
+        import traceback
+        traceback.print_exc()
+        yield format_sse("error", {"message": f"죄송합니다, 요청을 처리하는 중 오류가 발생했습니다: {e}"})
+
+@router.delete("/chat/sessions/{session_id}")
+async def clear_session(session_id: str):
+    """서버에 저장된 세션의 대화 기록을 삭제합니다. (새 대화 시작)"""
+    get_session_store().clear(session_id)
+    return {"session_id": session_id, "cleared": True}
+
+@router.post("/chat/stream")
+async def handle_chat_stream(request: ChatRequest):
+    """
+    사용자의 채팅 메시지를 받아 AI 에이전트의 응답을 토큰 단위로 스트리밍하는 엔드포인트.
+    응답은 text/event-stream(SSE) 형식이며, 라우팅/도구 진행 이벤트가 토큰 사이에 섞여 전달됩니다.
+    """
+    return StreamingResponse(
+        stream_chat_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
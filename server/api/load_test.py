@@ -0,0 +1,132 @@
+# server/api/load_test.py
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from server.core.config import settings
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+async def post_json(app, path, payload):
+    """
+    uvicorn 없이 ASGI 앱에 POST 요청 하나를 직접 보내고 (상태 코드, JSON 본문)을 반환합니다.
+    라우팅, 요청 본문 검증, 응답 직렬화는 실제 서버와 같은 경로를 거칩니다.
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"loadtest"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("loadtest", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = None
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # 응답이 끝날 때까지 연결을 유지합니다.
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, json.loads(b"".join(chunks) or b"null")
+
+async def run(app, messages, requests, concurrency, threads):
+    """
+    동시에 최대 concurrency개씩 /api/chat 요청을 보내고 (전체 소요 시간 ms, 요청별 지연 시간 ms 목록, 실패 수)를 반환합니다.
+
+    threads가 None이면 asyncio 기본 실행기(min(32, CPU+4))를, 아니면 server.main의 lifespan처럼
+    threads 크기의 ThreadPoolExecutor를 기본 실행기로 사용합니다. (동기 Google API 호출은 asyncio.to_thread로 실행됨)
+    """
+    executor = None
+    if threads:
+        executor = ThreadPoolExecutor(max_workers=threads)
+        asyncio.get_running_loop().set_default_executor(executor)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            status, payload = await post_json(app, "/api/chat", {"message": messages[i % len(messages)]})
+            timings.append((time.perf_counter() - started) * 1000)
+            # handle_chat은 오류가 나도 200과 사과 문구를 반환하므로 본문까지 확인합니다.
+            if status != 200 or not payload or payload.get("response", "").startswith("죄송합니다"):
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if executor is not None:
+        executor.shutdown(wait=False)
+    return elapsed_ms, timings, failures
+
+def main(rounds, concurrency_levels, llm_ms, tool_ms, threads, warmup):
+    """
+    LLM과 Google API를 스텁(benchmark_stubs)으로 대체한 서버에 동시 /api/chat 요청을 보내고,
+    asyncio 기본 실행기와 BLOCKING_IO_THREADS 크기 실행기의 처리량과 지연 시간을 동시 요청 수별로 비교합니다.
+
+    Gmail/Calendar 스텁 도구는 tool_ms만큼 스레드를 막으므로(googleapiclient와 같음),
+    동시 요청이 실행기 크기보다 많아지면 도구 호출이 스레드를 기다리며 처리량이 포화됩니다.
+    """
+    from server.agents.benchmark_stubs import SAMPLE_MESSAGES, install_stub_components
+    from server.api import chat
+    from server.main import app
+
+    install_stub_components(llm_ms=llm_ms, tool_ms=tool_ms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # 그래프 컴파일, 의도 분류기 학습 등 첫 요청 비용을 측정에서 제외합니다.
+        chat.load_agent()
+        asyncio.run(run(app, SAMPLE_MESSAGES, warmup, 1, None))
+
+    executors = [("default", None), (f"threads={threads}", threads)]
+    print(f"requests=concurrency x {rounds}, stub llm={llm_ms}ms, stub tool={tool_ms}ms (blocking)")
+    print(f"{'executor':<12} {'concurrency':>11} {'req/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'failed':>7}")
+    for concurrency in concurrency_levels:
+        requests = concurrency * rounds
+        for label, size in executors:
+            # 실행마다 새 이벤트 루프를 만들어 기본 실행기를 초기 상태로 되돌립니다.
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed_ms, timings, failures = asyncio.run(run(app, SAMPLE_MESSAGES, requests, concurrency, size))
+            print(
+                f"{label:<12} {concurrency:>11} {len(timings) / (elapsed_ms / 1000):>9.1f} "
+                f"{percentile(timings, 0.5):>8.1f} {percentile(timings, 0.95):>8.1f} {failures:>7}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스텁 도구를 사용하는 서버에 동시 /api/chat 요청을 보내 실행기 크기별 처리량을 측정합니다.")
+    parser.add_argument("--rounds", type=int, default=10, help="동시 요청 하나당 보낼 요청 수 (전체 요청 수 = 동시 요청 수 x rounds)")
+    parser.add_argument("--concurrency", default="1,10,50,200", help="동시 요청 수 (쉼표 구분)")
+    parser.add_argument("--llm-ms", type=float, default=300, help="스텁 LLM 호출의 모의 지연 시간(ms) (비동기)")
+    parser.add_argument("--tool-ms", type=float, default=200, help="스텁 Google API 호출의 모의 지연 시간(ms) (블로킹)")
+    parser.add_argument("--threads", type=int, default=settings.BLOCKING_IO_THREADS, help="비교할 실행기 스레드 수")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 요청 수")
+    args = parser.parse_args()
+    main(
+        args.rounds, [int(value) for value in args.concurrency.split(",")],
+        args.llm_ms, args.tool_ms, args.threads, args.warmup,
+    )
@@ -0,0 +1,38 @@
+# server/api/metrics.py
+import sys
+from fastapi import APIRouter
+from server.api.chat import get_session_store_stats
+from server.core.metrics import latency
+from server.core.startup import startup
+
+# API 라우터 생성
+router = APIRouter()
+
+def loaded_stats(module_name, getter_name):
+    """
+    이미 import된 모듈의 통계 함수를 호출합니다.
+    지표 조회가 무거운 모듈(LangChain, Google API 클라이언트 등)을 불러오지 않도록, 아직 import되지 않았으면 None을 반환합니다.
+    """
+    # 다른 스레드에서 import 중인 모듈은 아직 함수가 정의되지 않았을 수 있습니다.
+    getter = getattr(sys.modules.get(module_name), getter_name, None)
+    return getter() if getter is not None else None
+
+@router.get("/metrics")
+async def read_metrics():
+    """
+    캐시 적중률 등 서버 내부 성능 지표를 반환하는 엔드포인트.
+    아직 초기화되지 않은 구성 요소의 지표는 null로 표시됩니다.
+    """
+    return {
+        "startup": startup.summary(),
+        "embedding_cache": loaded_stats("server.rag.embeddings", "get_embedding_cache_stats"),
+        "response_cache": loaded_stats("server.agents.master_agent", "get_response_cache_stats"),
+        "history": loaded_stats("server.agents.master_agent", "get_history_stats"),
+        "context_cache": loaded_stats("server.agents.master_agent", "get_context_cache_stats"),
+        "sessions": get_session_store_stats(),
+        "llm": loaded_stats("server.agents.llm", "get_llm_stats"),
+        "tool_cache": loaded_stats("server.tools.google_services", "get_tool_cache_stats"),
+        "calendar_sync": loaded_stats("server.tools.google_services", "get_calendar_sync_stats"),
+        "gmail_sync": loaded_stats("server.tools.google_services", "get_gmail_sync_stats"),
+        "latency": latency.summary(),
+    }
@@ -9,22 +9,161 @@ class Settings(BaseSettings):
 
     Attributes:
         GOOGLE_API_KEY (str): Google AI (Gemini) 및 기타 Google 서비스용 API 키.
-        GEMINI_MODEL_NAME (str): 사용할 Gemini 모델의 이름.
+        GEMINI_MODEL_NAME (str): 사용할 Gemini 모델의 이름. 컨텍스트 캐시를 사용하려면 버전이 고정된 이름이어야 합니다. (-latest 별칭 불가)
         EMBEDDING_MODEL_NAME (str): RAG에 사용할 텍스트 임베딩 모델의 이름.
         VECTOR_STORE_PATH (str): 생성된 FAISS 벡터 DB가 저장될 로컬 경로.
         DOCUMENT_SOURCE_DIR (str): RAG가 참조할 원본 문서들이 위치한 디렉토리.
         GOOGLE_CREDENTIALS_PATH (str): Google OAuth 2.0 인증 정보(JSON) 파일 경로.
         TOKEN_PATH (str): 생성된 OAuth 토큰이 저장될 파일 경로.
         REDIRECT_URI (str): OAuth 2.0 인증 시 사용될 리디렉션 URI.
+        BLOCKING_IO_THREADS (int): 동기 Google API 호출 등 블로킹 작업을 실행할 스레드 풀 크기.
+        GMAIL_MAX_RESULTS (int): Gmail 검색 시 기본으로 가져올 최대 메일 수.
+        GMAIL_BATCH_SIZE (int): Gmail batch 요청 하나에 묶을 최대 요청 수. (Gmail 권장 최대 50)
+        GOOGLE_SERVICE_POOL_SIZE (int): 캐시할 Google API 서비스 클라이언트의 최대 개수.
+        GOOGLE_SERVICE_IDLE_TTL (int): 사용하지 않는 서비스 클라이언트를 보관할 시간(초).
+        EMBEDDING_CACHE_PATH (str): 임베딩 캐시(SQLite) 파일 경로. 빈 값이면 캐시를 사용하지 않습니다.
+        EMBEDDING_CACHE_MEMORY_SIZE (int): 메모리(LRU)에 보관할 최대 임베딩 벡터 수.
+        EMBEDDING_BATCH_SIZE (int): 임베딩 요청 하나에 담을 최대 텍스트 수. (Gemini API 최대 100)
+        EMBEDDING_MAX_CONCURRENCY (int): ingest 시 동시에 진행할 최대 임베딩 요청 수.
+        EMBEDDING_REQUESTS_PER_MINUTE (int): 임베딩 API 분당 최대 요청 수.
+        EMBEDDING_MAX_RETRIES (int): 일시적인 오류 발생 시 배치당 최대 재시도 횟수.
+        INGEST_BATCH_SIZE (int): ingest 시 한 번에 임베딩하여 인덱스에 추가할 청크 수.
+        INGEST_WORKERS (int): 파일 읽기/분할에 사용할 프로세스 수. 0이면 CPU 코어 수를 사용합니다.
+        INGEST_CHECKPOINT_EVERY (int): 몇 번의 배치마다 인덱스와 매니페스트를 저장할지 정합니다.
+        RAG_RETRIEVAL_MODE (str): 문서 검색 방식. "hybrid"(BM25 + 벡터), "vector", "bm25" 중 하나.
+        RAG_TOP_K (int): 답변 생성에 사용할 문서 청크 수.
+        RAG_FETCH_K (int): hybrid 결합 전에 각 검색기에서 가져올 후보 청크 수.
+        RAG_RRF_K (int): Reciprocal Rank Fusion의 순위 보정 상수.
+        RAG_LEXICAL_CONFIDENCE (float): BM25 1위 문서가 질문 검색어를 이 비율 이상 포함하면
+            임베딩 호출 없이 BM25 결과를 사용합니다. 1보다 크게 설정하면 항상 결합 검색을 합니다.
+        RAG_INDEX_TYPE (str): 벡터 검색 인덱스 타입. "flat"(정확 검색), "ivf_flat", "ivf_pq", "hnsw" 중 하나.
+        RAG_IVF_NLIST (int): IVF 클러스터 수. 0이면 청크 수에 맞춰 자동(4 × √N)으로 정합니다.
+        RAG_IVF_NPROBE (int): IVF 검색 시 탐색할 클러스터 수. (클수록 정확하고 느림)
+        RAG_PQ_M (int): IVF-PQ 서브벡터 수. (임베딩 차원의 약수로 조정됨)
+        RAG_PQ_NBITS (int): IVF-PQ 서브벡터당 비트 수.
+        RAG_HNSW_M (int): HNSW 노드당 연결 수.
+        RAG_HNSW_EF_CONSTRUCTION (int): HNSW 인덱스 생성 시 탐색 폭.
+        RAG_HNSW_EF_SEARCH (int): HNSW 검색 시 탐색 폭. (클수록 정확하고 느림)
+        RAG_INDEX_TRAIN_SIZE (int): IVF/PQ 학습에 무작위 추출할 최대 벡터 수.
+        RAG_ANN_MIN_VECTORS (int): 청크 수가 이보다 적으면 ANN 인덱스 대신 Flat 인덱스를 사용합니다.
+        RAG_SHARDING (str): 벡터 저장소 샤딩 방식. "none"(단일 저장소), "directory"(원본 하위 디렉토리별),
+            "hash"(파일 경로 해시) 중 하나.
+        RAG_HASH_SHARDS (int): "hash" 샤딩에서 사용할 샤드 수.
+        RAG_SHARD_SEARCH_THREADS (int): 샤드를 병렬로 검색할 최대 스레드 수.
+        RESPONSE_CACHE_ENABLED (bool): general/RAG 답변 캐시 사용 여부.
+        RESPONSE_CACHE_TTL (int): 캐시된 답변의 유효 시간(초).
+        RESPONSE_CACHE_SIMILARITY (float): 질문 임베딩의 코사인 유사도가 이 값 이상이면 같은 질문으로 봅니다.
+            1보다 크게 설정하면 정확히 같은 질문만 캐시에서 찾습니다. (임베딩 호출 없음)
+        RESPONSE_CACHE_MAX_ENTRIES (int): 메모리에 보관할 최대 답변 수.
+        TOOL_CACHE_ENABLED (bool): Gmail API 검색 결과 캐시 사용 여부. (검색 연산자가 있는 검색, 로컬 색인 준비 전의 검색)
+        TOOL_CACHE_TTL (int): 도구 결과를 그대로 사용할 시간(초).
+        TOOL_CACHE_STALE_TTL (int): 이전 결과를 먼저 반환하고 백그라운드에서 갱신할 최대 시간(초).
+        TOOL_CACHE_MAX_ENTRIES (int): 보관할 최대 도구 결과 수.
+        CALENDAR_LOCAL_STORE_ENABLED (bool): Calendar 로컬 일정 저장소 사용 여부.
+            끄면 로컬 파일 없이 일정 조회마다 Calendar API로 해당 기간의 일정을 직접 가져옵니다.
+        CALENDAR_STORE_PATH (str): 동기화한 Calendar 일정을 저장할 로컬 SQLite 파일 경로.
+        CALENDAR_SYNC_INTERVAL (int): Calendar 증분 동기화 최소 간격(초). 이 시간 안의 조회는 로컬 저장소만 사용합니다.
+        GMAIL_LOCAL_INDEX_ENABLED (bool): Gmail 메타데이터 로컬 색인 사용 여부.
+            Gmail 검색 연산자(from:, label: 등)가 없는 검색은 로컬 색인에서 처리합니다.
+        GMAIL_STORE_PATH (str): Gmail 메타데이터 색인을 저장할 로컬 SQLite 파일 경로.
+        GMAIL_SYNC_INTERVAL (int): Gmail history 증분 동기화 최소 간격(초).
+        GMAIL_BACKFILL_LIMIT (int): 처음 색인을 만들 때 내려받을 최근 메일 수.
+        GMAIL_LOCAL_MAX_RESULTS (int): 로컬 색인 검색 시 기본으로 반환할 최대 메일 수.
+        INTENT_CONFIDENCE_THRESHOLD (float): 로컬 의도 분류기의 결과를 그대로 사용할 최소 신뢰도(0~1).
+        INTENT_LLM_FALLBACK (bool): 신뢰도가 낮고 라우팅 키워드도 없을 때 LLM 라우터를 사용할지 여부.
+        INTENT_MULTI_ENABLED (bool): 한 메시지의 여러 요청(예: 일정과 메일)을 병렬 분기로 처리할지 여부.
+        HISTORY_WINDOW_TURNS (int): 프롬프트에 그대로 넣을 최근 대화 턴 수. 그보다 오래된 턴은 요약합니다.
+        HISTORY_MAX_TOKENS (int): 대화 기록(요약 포함)의 토큰 예산. 0이면 모델별 기본값을 사용합니다.
+        HISTORY_SUMMARY_TOKENS (int): 오래된 대화 요약에 할당할 최대 토큰 수.
+        SESSION_STORE_BACKEND (str): 서버 측 대화 기록 저장소. memory(프로세스 내 LRU) 또는 sqlite(디스크 + LRU).
+        SESSION_STORE_PATH (str): sqlite 저장소를 사용할 때의 SQLite 파일 경로.
+        SESSION_MAX_SESSIONS (int): 메모리에 보관할 최대 세션 수. (LRU)
+        SESSION_TTL (int): 마지막 사용 후 세션을 유지할 시간(초). 0이면 만료하지 않습니다.
+        SESSION_MAX_TURNS (int): 세션마다 보관할 최대 대화 턴 수.
+        GEMINI_API_BASE_URL (str): Gemini REST API 주소. (컨텍스트 캐시 등록/연장에 사용)
+        GEMINI_CONTEXT_CACHE_ENABLED (bool): 반복되는 RAG 문서 context를 Gemini 명시적 컨텍스트 캐시에 등록할지 여부.
+        GEMINI_CONTEXT_CACHE_TTL (int): 컨텍스트 캐시 유지 시간(초). 만료가 가까울 때 다시 사용되면 연장합니다.
+        GEMINI_CONTEXT_CACHE_MIN_TOKENS (int): 캐시에 등록할 최소 토큰 수. 0이면 모델별 Gemini 최소값을 사용하며,
+            모델 최소값보다 작은 값은 무시합니다. (명시적 캐시는 gemini-2.0-flash-001처럼 버전이 고정된 모델에서만 사용합니다.)
+        GEMINI_CONTEXT_CACHE_MIN_USES (int): 같은 문서 묶음이 이 횟수 이상 사용되었을 때 캐시에 등록합니다.
+        LLM_MAX_CONCURRENCY (int): 모델별로 동시에 진행할 최대 Gemini 호출 수. 0이면 제한하지 않습니다.
+        STARTUP_BACKGROUND_WARMUP (bool): 그래프 컴파일, 도구/체인 생성, RAG 인덱스 로드 등을 백그라운드에서 수행할지 여부.
+            False이면 준비가 모두 끝난 뒤에 요청을 받기 시작합니다.
     """
     GOOGLE_API_KEY: str
-    GEMINI_MODEL_NAME: str = "gemini-1.5-flash-latest"
+    GEMINI_MODEL_NAME: str = "gemini-2.5-flash"
     EMBEDDING_MODEL_NAME: str = "text-embedding-004"
     VECTOR_STORE_PATH: str = "./vector_store/faiss_index"
     DOCUMENT_SOURCE_DIR: str = "./documents"
     GOOGLE_CREDENTIALS_PATH: str = "./credentials.json"
     TOKEN_PATH: str = "./token.json"
     REDIRECT_URI: str = "http://localhost:8501"
+    BLOCKING_IO_THREADS: int = 64
+    GMAIL_MAX_RESULTS: int = 5
+    GMAIL_BATCH_SIZE: int = 50
+    GOOGLE_SERVICE_POOL_SIZE: int = 32
+    GOOGLE_SERVICE_IDLE_TTL: int = 3600
+    EMBEDDING_CACHE_PATH: str = "./vector_store/embedding_cache.sqlite"
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 4096
+    EMBEDDING_BATCH_SIZE: int = 100
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_REQUESTS_PER_MINUTE: int = 300
+    EMBEDDING_MAX_RETRIES: int = 6
+    INGEST_BATCH_SIZE: int = 1000
+    INGEST_WORKERS: int = 0
+    INGEST_CHECKPOINT_EVERY: int = 10
+    RAG_RETRIEVAL_MODE: str = "hybrid"
+    RAG_TOP_K: int = 4
+    RAG_FETCH_K: int = 20
+    RAG_RRF_K: int = 60
+    RAG_LEXICAL_CONFIDENCE: float = 1.0
+    RAG_INDEX_TYPE: str = "flat"
+    RAG_IVF_NLIST: int = 0
+    RAG_IVF_NPROBE: int = 16
+    RAG_PQ_M: int = 48
+    RAG_PQ_NBITS: int = 8
+    RAG_HNSW_M: int = 32
+    RAG_HNSW_EF_CONSTRUCTION: int = 200
+    RAG_HNSW_EF_SEARCH: int = 128
+    RAG_INDEX_TRAIN_SIZE: int = 100000
+    RAG_ANN_MIN_VECTORS: int = 10000
+    RAG_SHARDING: str = "none"
+    RAG_HASH_SHARDS: int = 4
+    RAG_SHARD_SEARCH_THREADS: int = 8
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 3600
+    RESPONSE_CACHE_SIMILARITY: float = 0.95
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_TTL: int = 60
+    TOOL_CACHE_STALE_TTL: int = 600
+    TOOL_CACHE_MAX_ENTRIES: int = 512
+    CALENDAR_LOCAL_STORE_ENABLED: bool = True
+    CALENDAR_STORE_PATH: str = "./data/calendar.sqlite"
+    CALENDAR_SYNC_INTERVAL: int = 60
+    GMAIL_LOCAL_INDEX_ENABLED: bool = True
+    GMAIL_STORE_PATH: str = "./data/gmail.sqlite"
+    GMAIL_SYNC_INTERVAL: int = 60
+    GMAIL_BACKFILL_LIMIT: int = 2000
+    GMAIL_LOCAL_MAX_RESULTS: int = 100
+    INTENT_CONFIDENCE_THRESHOLD: float = 0.6
+    INTENT_LLM_FALLBACK: bool = True
+    INTENT_MULTI_ENABLED: bool = True
+    HISTORY_WINDOW_TURNS: int = 6
+    HISTORY_MAX_TOKENS: int = 0
+    HISTORY_SUMMARY_TOKENS: int = 500
+    SESSION_STORE_BACKEND: str = "memory"
+    SESSION_STORE_PATH: str = "./data/sessions.sqlite"
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_TTL: int = 86400
+    SESSION_MAX_TURNS: int = 200
+    GEMINI_API_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    GEMINI_CONTEXT_CACHE_ENABLED: bool = True
+    GEMINI_CONTEXT_CACHE_TTL: int = 3600
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = 0
+    GEMINI_CONTEXT_CACHE_MIN_USES: int = 2
+    LLM_MAX_CONCURRENCY: int = 16
+    STARTUP_BACKGROUND_WARMUP: bool = True
 
     # .env 파일을 읽도록 설정
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
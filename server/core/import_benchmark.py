@@ -0,0 +1,80 @@
+# server/core/import_benchmark.py
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# server.main을 import할 때 불러오면 안 되는 무거운 패키지들입니다.
+# 이 패키지들은 백그라운드 준비 단계(또는 첫 요청)에서만 import되어야 합니다.
+HEAVY_PACKAGES = (
+    "langchain", "langchain_core", "langchain_community", "langchain_google_genai", "langgraph",
+    "googleapiclient", "google_auth_oauthlib", "faiss", "numpy",
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def parse_importtime(output):
+    """
+    python -X importtime의 출력을 [(모듈 이름, self_us, cumulative_us, 깊이), ...]로 변환합니다.
+    (헤더 줄 등 형식이 다른 줄은 건너뜁니다.)
+    """
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def measure(module):
+    """새 인터프리터에서 module을 import하고 importtime 결과 행 목록을 반환합니다."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+def main(module, repeat, top, max_ms):
+    """
+    module(기본 server.main)의 import 시간과 함께 import된 무거운 패키지를 확인합니다.
+    repeat번 측정하여 가장 빠른 결과를 사용하며(디스크 캐시 등 잡음 제거),
+    시간이 max_ms를 넘거나 HEAVY_PACKAGES가 import되면 종료 코드 1을 반환합니다. (CI 회귀 검사용)
+    """
+    best = None
+    for _ in range(repeat):
+        rows = measure(module)
+        total_us = next((cumulative for name, _, cumulative, _ in rows if name == module), 0)
+        if best is None or total_us < best[0]:
+            best = (total_us, rows)
+    total_us, rows = best
+    total_ms = total_us / 1000
+
+    print(f"import {module}: {total_ms:.1f} ms (best of {repeat})")
+    print(f"\n{'self_ms':>9} {'cumulative_ms':>14}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}  {name}")
+
+    heavy = sorted({name.split(".")[0] for name, _, _, _ in rows} & set(HEAVY_PACKAGES))
+    failed = False
+    if heavy:
+        print(f"\nFAIL: heavy packages imported at startup: {', '.join(heavy)}")
+        failed = True
+    if max_ms and total_ms > max_ms:
+        print(f"\nFAIL: import time {total_ms:.1f} ms exceeds {max_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="python -X importtime으로 서버 모듈의 import 시간을 측정하고 회귀를 검사합니다.")
+    parser.add_argument("--module", default="server.main", help="측정할 모듈")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 횟수 (가장 빠른 결과 사용)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 self 시간 상위 모듈 수")
+    parser.add_argument("--max-ms", type=float, default=1500, help="허용할 최대 import 시간(ms). 0이면 검사하지 않습니다.")
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.repeat, args.top, args.max_ms))
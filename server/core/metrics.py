@@ -0,0 +1,34 @@
+# server/core/metrics.py
+import threading
+from collections import defaultdict, deque
+
+class LatencyRecorder:
+    """
+    구간별 소요 시간(ms)을 최근 window개까지 보관하고 요약 통계를 계산합니다.
+    예: RAG 질문에서 문서 검색(retrieve)과 답변 생성(generate)에 걸린 시간 비교.
+    """
+
+    def __init__(self, window=1000):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed_ms):
+        with self._lock:
+            self._samples[name].append(elapsed_ms)
+
+    def summary(self):
+        """{구간 이름: {count, avg_ms, p50_ms, p95_ms}} 형태의 요약을 반환합니다."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        return {
+            name: {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 1),
+                "p50_ms": round(values[len(values) // 2], 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+            }
+            for name, values in samples.items() if values
+        }
+
+# 프로세스 전역에서 공유하는 지연 시간 기록기
+latency = LatencyRecorder()
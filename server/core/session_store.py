@@ -0,0 +1,152 @@
+# server/core/session_store.py
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.messages import AIMessage, HumanMessage
+
+class MemorySessionStore:
+    """
+    session_id별 대화 기록을 프로세스 메모리에 보관하는 LRU 저장소입니다.
+
+    클라이언트는 매 요청마다 전체 대화 기록을 보내는 대신 session_id와 새 메시지만 보내고,
+    서버는 여기에 보관한 메시지 객체를 그대로 재사용한 뒤 응답이 끝나면 한 턴만 추가합니다.
+
+    Args:
+        max_sessions (int): 보관할 최대 세션 수. 초과하면 가장 오래 사용하지 않은 세션부터 삭제합니다.
+        ttl (int): 마지막 사용 후 세션을 유지할 시간(초). 0이면 만료하지 않습니다.
+        max_turns (int): 세션마다 보관할 최대 턴 수. 프롬프트에는 HistoryManager가 다시 줄여서 넣습니다.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=86400, max_turns=200):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        # session_id -> [메시지 목록, 마지막 사용 시각]
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "appends": 0}
+
+    def get_messages(self, session_id):
+        """세션의 대화 기록(HumanMessage/AIMessage 목록)을 반환합니다. 없으면 빈 목록."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and self.ttl and time.time() - entry[1] > self.ttl:
+                del self._sessions[session_id]
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return []
+            self._stats["hits"] += 1
+            entry[1] = time.time()
+            self._sessions.move_to_end(session_id)
+            return list(entry[0])
+
+    def append(self, session_id, human, ai):
+        """한 턴(사용자 메시지, AI 응답)을 세션 끝에 추가합니다."""
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [[], time.time()])
+            entry[0] = (entry[0] + [HumanMessage(content=human), AIMessage(content=ai)])[-self.max_turns * 2:]
+            entry[1] = time.time()
+            self._sessions.move_to_end(session_id)
+            self._stats["appends"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._sessions)
+        return stats
+
+class SQLiteSessionStore(MemorySessionStore):
+    """
+    대화 기록을 SQLite에 영구 저장하고, 최근 사용한 세션은 메모리 LRU에서 바로 반환하는 저장소입니다.
+    서버를 재시작하거나 메모리에서 밀려난 세션도 디스크에서 다시 읽어 이어갈 수 있습니다.
+
+    Args:
+        path (str): SQLite 파일 경로.
+        (나머지는 MemorySessionStore와 같습니다.)
+    """
+
+    def __init__(self, path, max_sessions=1000, ttl=86400, max_turns=200):
+        super().__init__(max_sessions=max_sessions, ttl=ttl, max_turns=max_turns)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            " session_id TEXT NOT NULL,"
+            " turn INTEGER NOT NULL,"
+            " human TEXT NOT NULL,"
+            " ai TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, turn))"
+        )
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+
+    def get_messages(self, session_id):
+        messages = super().get_messages(session_id)
+        if messages:
+            return messages
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT human, ai, created_at FROM turns WHERE session_id = ? ORDER BY turn DESC LIMIT ?",
+                (session_id, self.max_turns),
+            ).fetchall()
+        if not rows or (self.ttl and time.time() - rows[0][2] > self.ttl):
+            return []
+        messages = []
+        for human, ai, _ in reversed(rows):
+            messages += [HumanMessage(content=human), AIMessage(content=ai)]
+        with self._lock:
+            self._sessions[session_id] = [messages, time.time()]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return list(messages)
+
+    def append(self, session_id, human, ai):
+        # 메모리에서 밀려난 세션이면 디스크의 기록을 먼저 불러와 이어 붙입니다.
+        with self._lock:
+            cached = session_id in self._sessions
+        if not cached:
+            self.get_messages(session_id)
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO turns (session_id, turn, human, ai, created_at)"
+                " SELECT ?, COALESCE(MAX(turn), -1) + 1, ?, ?, ? FROM turns WHERE session_id = ?",
+                (session_id, human, ai, time.time(), session_id),
+            )
+            self._conn.execute(
+                "DELETE FROM turns WHERE session_id = ?"
+                " AND turn <= (SELECT MAX(turn) FROM turns WHERE session_id = ?) - ?",
+                (session_id, session_id, self.max_turns),
+            )
+        super().append(session_id, human, ai)
+
+    def clear(self, session_id):
+        with self._db_lock, self._conn:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        super().clear(session_id)
+
+def create_session_store(settings):
+    """설정(SESSION_STORE_BACKEND)에 맞는 대화 기록 저장소를 만듭니다."""
+    options = dict(
+        max_sessions=settings.SESSION_MAX_SESSIONS,
+        ttl=settings.SESSION_TTL,
+        max_turns=settings.SESSION_MAX_TURNS,
+    )
+    if settings.SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionStore(settings.SESSION_STORE_PATH, **options)
+    if settings.SESSION_STORE_BACKEND != "memory":
+        raise ValueError(f"Unknown SESSION_STORE_BACKEND: {settings.SESSION_STORE_BACKEND}")
+    return MemorySessionStore(**options)
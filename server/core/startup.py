@@ -0,0 +1,56 @@
+# server/core/startup.py
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupReport:
+    """
+    서버 시작 단계별 소요 시간(ms)을 기록합니다.
+    예: server.main import, lifespan(포트 바인딩 전까지), 백그라운드 준비 단계별 시간.
+
+    ready는 백그라운드 준비가 모두 끝났는지를 나타냅니다. 준비 중에 들어온 요청도 처리되지만,
+    필요한 구성 요소를 그 요청이 직접 만들기 때문에 평소보다 느릴 수 있습니다.
+    """
+
+    def __init__(self):
+        self._phases = {}
+        self._failed = []
+        self._lock = threading.Lock()
+        self.ready = False
+
+    @contextmanager
+    def phase(self, name):
+        """with 블록의 실행 시간을 name 단계로 기록합니다. 예외가 발생하면 실패한 단계로 표시합니다."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._failed.append(name)
+            raise
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name, elapsed_ms):
+        with self._lock:
+            self._phases[name] = round(elapsed_ms, 1)
+
+    def mark_ready(self):
+        self.ready = True
+
+    def summary(self):
+        """{ready, phases: {단계: ms}, failed: [단계, ...]} 형태의 요약을 반환합니다."""
+        with self._lock:
+            return {"ready": self.ready, "phases": dict(self._phases), "failed": list(self._failed)}
+
+    def format(self):
+        """콘솔에 출력할 단계별 시간 표를 만듭니다."""
+        summary = self.summary()
+        lines = ["[startup] phase timings"]
+        for name, elapsed_ms in summary["phases"].items():
+            mark = " (failed)" if name in summary["failed"] else ""
+            lines.append(f"  {name:<32} {elapsed_ms:>9.1f} ms{mark}")
+        return "\n".join(lines)
+
+# 프로세스 전역에서 공유하는 시작 단계 기록기
+startup = StartupReport()
@@ -1,14 +1,93 @@
 # server/main.py
-import uvicorn
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from server.api import chat
+from server.api import chat, metrics
+from server.core.config import settings
+from server.core.startup import startup
+
+def _warm(name, func):
+    """준비 단계 하나를 실행하고 시간을 기록합니다. 실패해도 서버는 계속 실행되며, 해당 구성 요소는 첫 요청에서 다시 준비합니다."""
+    try:
+        with startup.phase(name):
+            func()
+    except Exception as e:
+        print(f"[startup] {name} failed: {e}")
+
+def _import_master_agent():
+    # LangChain, LangGraph, langchain_google_genai 등 무거운 모듈은 이 단계에서 처음 import됩니다.
+    from server.agents import master_agent  # noqa: F401
+
+def _build_agent_graph():
+    from server.agents.master_agent import get_agent_executor
+    get_agent_executor()
+
+def _build_agent_components():
+    # Google API 도구, 체인, 응답/컨텍스트 캐시를 만듭니다.
+    from server.agents.master_agent import get_agent_components
+    get_agent_components()
+
+def _train_intent_classifier():
+    # 의도 분류기를 미리 학습해 두어 첫 요청부터 LLM 없이 라우팅합니다.
+    from server.agents.intent import get_intent_classifier
+    get_intent_classifier()
+
+def _load_rag_retriever():
+    # RAG 질문의 첫 요청이 인덱스 로드 시간을 떠안지 않도록 Retriever를 미리 로드합니다.
+    from server.rag.retriever import warm_rag_retriever
+    warm_rag_retriever()
+
+def warm_up():
+    """
+    무거운 구성 요소를 단계별로 준비하고 단계별 시간을 기록합니다.
+    (LangGraph 워크플로우 컴파일, 도구/체인 생성, 의도 분류기 학습, RAG Retriever 로드)
+    """
+    started = time.perf_counter()
+    _warm("warmup.import_master_agent", _import_master_agent)
+    _warm("warmup.agent_graph", _build_agent_graph)
+    _warm("warmup.agent_components", _build_agent_components)
+    _warm("warmup.intent_classifier", _train_intent_classifier)
+    _warm("warmup.rag_retriever", _load_rag_retriever)
+    _warm("warmup.session_store", chat.get_session_store)
+    _warm("warmup.chat_agent", chat.load_agent)
+    startup.record("warmup", (time.perf_counter() - started) * 1000)
+    startup.mark_ready()
+    print(startup.format())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    서버 시작 시 LangGraph 워크플로우를 미리 컴파일하고 의도 분류기와 RAG Retriever를 준비해 둡니다.
+    이후 요청들은 컴파일된 그래프를 재사용하므로 요청마다 컴파일 비용이 들지 않습니다.
+
+    STARTUP_BACKGROUND_WARMUP이 켜져 있으면 준비 작업을 백그라운드 스레드에서 실행하고 바로 요청을 받기 시작하므로,
+    포트가 먼저 열리고 헬스 체크(/)가 즉시 응답합니다.
+    """
+    started = time.perf_counter()
+    # 동기 Google API 호출은 asyncio.to_thread로 기본 실행기에서 처리됩니다.
+    # 기본 크기(min(32, CPU+4))로는 동시 요청이 많을 때 병목이 되므로 크기를 늘립니다.
+    executor = ThreadPoolExecutor(max_workers=settings.BLOCKING_IO_THREADS)
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(executor)
+    if settings.STARTUP_BACKGROUND_WARMUP:
+        loop.run_in_executor(executor, warm_up)
+    else:
+        await loop.run_in_executor(executor, warm_up)
+    startup.record("lifespan", (time.perf_counter() - started) * 1000)
+    yield
+    executor.shutdown(wait=False)
 
 # FastAPI 애플리케이션 생성
 app = FastAPI(
     title="AI Assist Google - Backend",
     description="AI 업무 자동화 비서를 위한 백엔드 API 서버",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 미들웨어 설정
@@ -23,16 +102,20 @@ app.add_middleware(
 
 # API 라우터 포함
 app.include_router(chat.router, prefix="/api", tags=["Chat"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
 
 @app.get("/", tags=["Root"])
 async def read_root():
     """
     루트 엔드포인트. API 서버가 정상적으로 실행 중인지 확인합니다.
+    ready는 백그라운드 준비(그래프 컴파일, RAG 인덱스 로드 등)가 끝났는지를 나타냅니다.
     """
-    return {"message": "AI Assist Google Backend is running."}
+    return {"message": "AI Assist Google Backend is running.", "ready": startup.ready}
+
+startup.record("import.server.main", (time.perf_counter() - _import_started) * 1000)
 
 if __name__ == "__main__":
     # 이 파일을 직접 실행할 경우 Uvicorn 서버를 시작합니다.
     # 실제 배포 시에는 'uvicorn server.main:app --host 0.0.0.0 --port 8000' 명령어를 사용합니다.
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
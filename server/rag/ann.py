@@ -0,0 +1,163 @@
+# server/rag/ann.py
+import json
+import math
+import os
+import faiss
+import numpy as np
+
+# --- 근사 최근접 이웃(ANN) 검색 인덱스 ---
+# index.faiss (Flat)는 ingest의 원본 인덱스로 유지하고(증분 추가/삭제 가능),
+# 검색용 ANN 인덱스는 ingest가 끝날 때 Flat 인덱스의 벡터로 다시 만들어 별도 파일에 저장합니다.
+ANN_INDEX_FILE = "index.ann.faiss"
+ANN_META_FILE = "index.ann.json"
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# k-means 학습 시 클러스터당 최소 학습 벡터 수 (FAISS 권장 39개 이상)
+MIN_POINTS_PER_CENTROID = 39
+
+class AnnParams:
+    """
+    ANN 인덱스 생성/검색 파라미터입니다.
+
+    Attributes:
+        index_type (str): "flat", "ivf_flat", "ivf_pq", "hnsw" 중 하나.
+        nlist (int): IVF 클러스터 수. 0이면 벡터 수에 맞춰 4 × √N으로 정합니다.
+        nprobe (int): IVF 검색 시 탐색할 클러스터 수.
+        pq_m (int): PQ 서브벡터 수. (차원의 약수로 조정됨)
+        pq_nbits (int): PQ 서브벡터당 비트 수.
+        hnsw_m (int): HNSW 노드당 연결 수.
+        hnsw_ef_construction (int): HNSW 생성 시 탐색 폭.
+        hnsw_ef_search (int): HNSW 검색 시 탐색 폭.
+        train_size (int): IVF/PQ 학습에 사용할 최대 샘플 벡터 수.
+        min_vectors (int): 이보다 벡터가 적으면 ANN 대신 Flat 인덱스를 사용합니다.
+    """
+
+    def __init__(self, index_type="flat", nlist=0, nprobe=16, pq_m=48, pq_nbits=8,
+                 hnsw_m=32, hnsw_ef_construction=200, hnsw_ef_search=128,
+                 train_size=100000, min_vectors=10000):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 인덱스 타입입니다: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self.train_size = train_size
+        self.min_vectors = min_vectors
+
+    @classmethod
+    def from_settings(cls, settings, index_type=None):
+        return cls(
+            index_type=index_type or settings.RAG_INDEX_TYPE,
+            nlist=settings.RAG_IVF_NLIST,
+            nprobe=settings.RAG_IVF_NPROBE,
+            pq_m=settings.RAG_PQ_M,
+            pq_nbits=settings.RAG_PQ_NBITS,
+            hnsw_m=settings.RAG_HNSW_M,
+            hnsw_ef_construction=settings.RAG_HNSW_EF_CONSTRUCTION,
+            hnsw_ef_search=settings.RAG_HNSW_EF_SEARCH,
+            train_size=settings.RAG_INDEX_TRAIN_SIZE,
+            min_vectors=settings.RAG_ANN_MIN_VECTORS,
+        )
+
+    def resolve_nlist(self, ntotal):
+        """학습 가능한 범위로 IVF 클러스터 수를 정합니다."""
+        nlist = self.nlist or int(4 * math.sqrt(ntotal))
+        return max(1, min(nlist, ntotal // MIN_POINTS_PER_CENTROID))
+
+    def resolve_pq_m(self, dim):
+        """PQ 서브벡터 수를 차원의 약수 중 설정값 이하의 가장 큰 값으로 정합니다."""
+        return max(m for m in range(1, min(self.pq_m, dim) + 1) if dim % m == 0)
+
+def iter_flat_vectors(flat_index, batch_size=65536):
+    """IndexIDMap2(IndexFlat)에 저장된 (청크 ID 배열, 벡터 배열)을 배치 단위로 반환합니다."""
+    base = faiss.downcast_index(flat_index.index)
+    ids = faiss.vector_to_array(flat_index.id_map)
+    for start in range(0, flat_index.ntotal, batch_size):
+        count = min(batch_size, flat_index.ntotal - start)
+        yield ids[start:start + count], base.reconstruct_n(start, count)
+
+def sample_flat_vectors(flat_index, size, seed=1234):
+    """학습용 벡터를 전체에서 균등하게 무작위 추출합니다. (배치마다 같은 비율로 추출)"""
+    ntotal = flat_index.ntotal
+    if size >= ntotal:
+        return np.vstack([vectors for _, vectors in iter_flat_vectors(flat_index)])
+    rng = np.random.default_rng(seed)
+    ratio = size / ntotal
+    samples = []
+    for _, vectors in iter_flat_vectors(flat_index):
+        count = max(1, int(round(len(vectors) * ratio)))
+        samples.append(vectors[rng.choice(len(vectors), count, replace=False)])
+    return np.vstack(samples)
+
+def create_ann_index(params, dim, ntotal):
+    """학습 전의 빈 ANN 인덱스를 만듭니다. 청크 ID를 유지하도록 IndexIDMap으로 감쌉니다."""
+    if params.index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, params.hnsw_m)
+        base.hnsw.efConstruction = params.hnsw_ef_construction
+        return faiss.IndexIDMap(base)
+
+    nlist = params.resolve_nlist(ntotal)
+    quantizer = faiss.IndexFlatL2(dim)
+    if params.index_type == "ivf_pq":
+        # PQ 코드북(2^nbits개 중심) 학습에도 충분한 샘플이 필요하므로 비트 수를 함께 제한합니다.
+        nbits = max(1, min(params.pq_nbits, int(math.log2(max(2, ntotal // MIN_POINTS_PER_CENTROID)))))
+        base = faiss.IndexIVFPQ(quantizer, dim, nlist, params.resolve_pq_m(dim), nbits)
+    else:
+        base = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    return faiss.IndexIDMap(base)
+
+def build_ann_index(flat_index, params):
+    """
+    Flat 인덱스의 벡터로 ANN 인덱스를 만듭니다.
+    IVF 계열은 학습 샘플을 무작위 추출해 학습한 뒤 전체 벡터를 배치 단위로 추가합니다.
+
+    Returns:
+        faiss.Index | None: 생성된 인덱스. Flat을 그대로 사용해야 하면 None.
+    """
+    ntotal = flat_index.ntotal if flat_index is not None else 0
+    if params.index_type == "flat" or ntotal < params.min_vectors:
+        return None
+
+    index = create_ann_index(params, flat_index.d, ntotal)
+    if not index.is_trained:
+        index.train(sample_flat_vectors(flat_index, min(ntotal, params.train_size)))
+    for ids, vectors in iter_flat_vectors(flat_index):
+        index.add_with_ids(vectors, ids)
+    configure_search(index, params)
+    return index
+
+def configure_search(index, params):
+    """검색 시 파라미터(nprobe, efSearch)를 설정합니다."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(params.nprobe, base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = params.hnsw_ef_search
+
+def read_ann_meta(path):
+    """저장된 ANN 인덱스의 메타데이터를 읽습니다. 없으면 None을 반환합니다."""
+    meta_path = os.path.join(path, ANN_META_FILE)
+    if not os.path.exists(meta_path) or not os.path.exists(os.path.join(path, ANN_INDEX_FILE)):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_ann_meta(path, params, ntotal):
+    with open(os.path.join(path, ANN_META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"params": vars(params), "ntotal": ntotal}, f)
+
+def is_ann_current(path, params, ntotal):
+    """저장된 ANN 인덱스가 같은 파라미터와 같은 벡터 수로 만들어졌는지 확인합니다."""
+    meta = read_ann_meta(path)
+    return meta is not None and meta["params"] == vars(params) and meta["ntotal"] == ntotal
+
+def remove_ann_index(path):
+    """ANN 인덱스 파일을 삭제합니다. (Flat 인덱스로 검색)"""
+    for file_name in (ANN_META_FILE, ANN_INDEX_FILE):
+        file_path = os.path.join(path, file_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
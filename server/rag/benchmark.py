@@ -0,0 +1,93 @@
+# server/rag/benchmark.py
+import argparse
+import os
+import time
+import faiss
+import numpy as np
+from server.core.config import settings
+from server.rag.ann import INDEX_TYPES, AnnParams, build_ann_index, configure_search, sample_flat_vectors
+from server.rag.store import INDEX_FILE, read_index
+
+def search_all(index, queries, k):
+    """쿼리를 하나씩 검색하여 (결과 ID 배열, 쿼리별 지연 시간 ms 목록)을 반환합니다. (서버와 같은 단건 검색)"""
+    results = np.empty((len(queries), k), dtype=np.int64)
+    latencies = []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results[i] = ids[0]
+    return results, latencies
+
+def recall_at_k(results, ground_truth):
+    """정답(Flat 검색 결과) top-k 중 ANN 결과 top-k에 포함된 비율의 평균을 반환합니다."""
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, ground_truth))
+    return hits / ground_truth.size
+
+def index_size_mb(index):
+    return faiss.serialize_index(index).size / (1024 * 1024)
+
+def report(name, build_seconds, size_mb, recall, latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<28} {build_seconds:>8.1f} {size_mb:>10.1f} {recall:>10.3f} {p50:>9.3f} {p95:>9.3f}")
+
+def main(index_types, k, num_queries, nprobes, ef_searches):
+    """
+    저장된 Flat 인덱스를 정답으로 삼아, 인덱스 타입별 recall@k와 검색 지연 시간을 비교합니다.
+    쿼리는 저장된 벡터에서 무작위로 추출하고 약간의 잡음을 더해 사용합니다.
+    """
+    flat_index = read_index(os.path.join(settings.VECTOR_STORE_PATH, INDEX_FILE), mmap=False)
+    print(f"벡터 {flat_index.ntotal}개, {flat_index.d}차원, 쿼리 {num_queries}개, k={k}")
+
+    queries = sample_flat_vectors(flat_index, num_queries, seed=42)[:num_queries]
+    rng = np.random.default_rng(42)
+    queries = queries + rng.normal(0, queries.std() * 0.1, queries.shape).astype(np.float32)
+
+    print(f"{'index':<28} {'build(s)':>8} {'size(MB)':>10} {f'recall@{k}':>10} {'p50(ms)':>9} {'p95(ms)':>9}")
+    ground_truth, latencies = search_all(flat_index, queries, k)
+    report("flat", 0.0, index_size_mb(flat_index), 1.0, latencies)
+
+    for index_type in index_types:
+        if index_type == "flat":
+            continue
+        # 벤치마크에서는 벡터 수가 적어도 ANN 인덱스를 만듭니다.
+        params = AnnParams.from_settings(settings, index_type=index_type)
+        params.min_vectors = 0
+        started = time.monotonic()
+        index = build_ann_index(flat_index, params)
+        build_seconds = time.monotonic() - started
+        size_mb = index_size_mb(index)
+
+        # 검색 파라미터를 바꿔 가며 recall/지연 시간의 trade-off를 측정합니다.
+        sweep = nprobes if index_type.startswith("ivf") else ef_searches
+        for value in sweep:
+            if index_type.startswith("ivf"):
+                params.nprobe = value
+                name = f"{index_type} (nprobe={value})"
+            else:
+                params.hnsw_ef_search = value
+                name = f"{index_type} (efSearch={value})"
+            configure_search(index, params)
+            results, latencies = search_all(index, queries, k)
+            report(name, build_seconds, size_mb, recall_at_k(results, ground_truth), latencies)
+
+def parse_ints(value):
+    return [int(item) for item in value.split(",") if item]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN 인덱스 타입별 recall@k와 검색 지연 시간을 Flat 인덱스와 비교합니다.")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES[1:]), help="비교할 인덱스 타입 (쉼표 구분)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--nprobe", default="1,4,16,64", help="IVF nprobe 값 목록 (쉼표 구분)")
+    parser.add_argument("--ef-search", default="16,64,128,256", help="HNSW efSearch 값 목록 (쉼표 구분)")
+    args = parser.parse_args()
+    main(
+        [index_type for index_type in args.types.split(",") if index_type],
+        k=args.k,
+        num_queries=args.queries,
+        nprobes=parse_ints(args.nprobe),
+        ef_searches=parse_ints(args.ef_search),
+    )
@@ -0,0 +1,141 @@
+# server/rag/embedding_cache.py
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from server.rag.store import content_hash
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 결과를 디스크(SQLite)와 메모리(LRU)에 캐싱하는 Embeddings 래퍼입니다.
+
+    캐시 키는 (모델 이름, 용도, 텍스트 해시)입니다. Google 임베딩은 문서용(RETRIEVAL_DOCUMENT)과
+    쿼리용(RETRIEVAL_QUERY) 벡터가 다르므로 용도("document"/"query")를 키에 포함합니다.
+    벡터는 float32 바이트(BLOB)로 저장합니다.
+
+    Args:
+        underlying (Embeddings): 실제 임베딩을 수행할 모델.
+        model_name (str): 캐시 키에 사용할 임베딩 모델 이름.
+        path (str): 디스크 캐시(SQLite) 파일 경로.
+        memory_size (int): 메모리 LRU에 보관할 최대 벡터 수.
+    """
+
+    def __init__(self, underlying, model_name, path, memory_size=4096):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, kind, text_hash))"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "document", self.underlying.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda texts: [self.underlying.embed_query(texts[0])])[0]
+
+    def lookup(self, texts, kind="document"):
+        """캐시에 있는 벡터만 {텍스트 해시: 벡터} 형태로 반환합니다. (임베딩 API 호출 없음)"""
+        hashes = [content_hash(text) for text in texts]
+        with self._lock:
+            return self._lookup(hashes, kind)
+
+    def store(self, texts, vectors, kind="document"):
+        """외부에서 계산한 임베딩 결과를 캐시에 저장하고 즉시 커밋합니다."""
+        computed = {content_hash(text): vector for text, vector in zip(texts, vectors)}
+        with self._lock:
+            self._stats["misses"] += len(computed)
+            self._store(computed, kind)
+
+    def stats(self):
+        """캐시 적중 통계를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / total if total else 0.0
+        return stats
+
+    def _embed(self, texts, kind, embed_fn):
+        hashes = [content_hash(text) for text in texts]
+        with self._lock:
+            found = self._lookup(hashes, kind)
+
+        # 캐시에 없는 텍스트만 (중복 없이) 임베딩합니다.
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = text
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._stats["misses"] += len(computed)
+                self._store(computed, kind)
+            found.update(computed)
+
+        return [list(found[text_hash]) for text_hash in hashes]
+
+    def _lookup(self, hashes, kind):
+        """메모리 LRU를 먼저 확인하고, 없으면 디스크에서 찾습니다. 호출 측에서 잠금을 잡아야 합니다."""
+        found = {}
+        disk_keys = []
+        for text_hash in set(hashes):
+            key = (kind, text_hash)
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[text_hash] = self._memory[key]
+                self._stats["memory_hits"] += 1
+            else:
+                disk_keys.append(text_hash)
+
+        # SQLite 변수 개수 제한을 넘지 않도록 나누어 조회합니다.
+        for start in range(0, len(disk_keys), 500):
+            chunk = disk_keys[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings"
+                f" WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                [self.model_name, kind, *chunk],
+            ).fetchall()
+            for text_hash, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                found[text_hash] = vector
+                self._remember((kind, text_hash), vector)
+                self._stats["disk_hits"] += 1
+        return found
+
+    def _store(self, vectors_by_hash, kind):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, vector) VALUES (?, ?, ?, ?)",
+            [
+                (self.model_name, kind, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                for text_hash, vector in vectors_by_hash.items()
+            ],
+        )
+        self._conn.commit()
+        for text_hash, vector in vectors_by_hash.items():
+            self._remember((kind, text_hash), vector)
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
@@ -0,0 +1,189 @@
+# server/rag/embedding_pipeline.py
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from google.api_core import exceptions as google_exceptions
+from server.core.config import settings
+from server.rag.embedding_cache import CachedEmbeddings
+from server.rag.store import content_hash
+
+# 일시적인 오류로 보고 재시도할 예외 타입 (Google API 예외 + 네트워크 오류)
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    ConnectionError,
+    TimeoutError,
+)
+# 다른 예외 타입으로 감싸진 경우 상태 코드로 판별합니다. (HTTP 상태 코드, gRPC 상태 이름)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_GRPC_CODES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL"}
+
+def status_code(error):
+    """
+    예외에 담긴 상태 코드를 반환합니다. HTTP 상태 코드(int) 또는 gRPC 상태 이름(str), 없으면 None.
+    (google.api_core 예외의 code, grpc.RpcError의 code(), HTTP 클라이언트 예외의 status_code/response.status_code)
+    """
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            code = None
+    if code is None:
+        code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    if code is None:
+        return None
+    if hasattr(code, "name") and not isinstance(code, int):
+        return code.name
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error):
+    """
+    예외(및 원인 예외 체인)가 재시도할 만한 일시적인 오류인지 판별합니다.
+    langchain_google_genai는 원본 예외를 감싸서 다시 던지므로 원인 예외까지 확인합니다.
+    메시지 문자열은 보지 않습니다. ("batch size 500" 같은 문구 때문에 400 오류를 재시도하지 않도록)
+    """
+    while error is not None:
+        if isinstance(error, RETRYABLE_ERRORS):
+            return True
+        code = status_code(error)
+        if code in RETRYABLE_STATUS_CODES or code in RETRYABLE_GRPC_CODES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+class TokenBucket:
+    """
+    분당 요청 수를 제한하는 토큰 버킷입니다. 여러 스레드에서 공유할 수 있습니다.
+
+    Args:
+        rate_per_minute (float): 분당 허용 요청 수.
+        capacity (int, optional): 한 번에 몰아서 보낼 수 있는 최대 요청 수. (기본값: 동시 실행 수 수준)
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(self.rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기합니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class EmbeddingPipeline:
+    """
+    대량의 청크를 임베딩 API의 최대 배치 크기로 나누어, 제한된 수의 배치를 동시에 요청하는 파이프라인입니다.
+
+    - 토큰 버킷으로 분당 요청 수를 제한합니다.
+    - 할당량 초과/일시 장애는 지수 백오프(+지터)로 재시도합니다.
+    - 임베딩 캐시(CachedEmbeddings)를 사용하는 경우, 완료된 배치는 즉시 캐시에 커밋되어
+      체크포인트 역할을 합니다. 중간에 실패한 ingest를 다시 실행하면 이미 완료된 배치는
+      캐시에서 읽어오므로 중단된 지점부터 이어서 진행됩니다.
+
+    Args:
+        embeddings (Embeddings): get_embeddings()가 반환한 임베딩 모델.
+        batch_size (int): 요청 하나에 담을 최대 텍스트 수.
+        max_concurrency (int): 동시에 진행할 최대 배치 요청 수.
+        requests_per_minute (float): 분당 최대 요청 수.
+        max_retries (int): 배치 하나당 최대 재시도 횟수.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size=None,
+        max_concurrency=None,
+        requests_per_minute=None,
+        max_retries=None,
+    ):
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.max_concurrency = max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.EMBEDDING_MAX_RETRIES
+        self.bucket = TokenBucket(
+            requests_per_minute or settings.EMBEDDING_REQUESTS_PER_MINUTE,
+            capacity=self.max_concurrency,
+        )
+        if isinstance(embeddings, CachedEmbeddings):
+            self.cache = embeddings
+            self.model = embeddings.underlying
+        else:
+            self.cache = None
+            self.model = embeddings
+
+    def embed(self, texts, progress=None):
+        """
+        텍스트 목록을 임베딩하여 같은 순서의 벡터 목록을 반환합니다.
+
+        Args:
+            texts (list[str]): 임베딩할 텍스트 목록.
+            progress (Callable[[int, int], None], optional): (완료 수, 전체 수)를 받는 진행 상황 콜백.
+        """
+        hashes = [content_hash(text) for text in texts]
+        vectors_by_hash = self.cache.lookup(texts) if self.cache is not None else {}
+
+        # 캐시에 없는 텍스트만 중복 없이 모아 배치로 나눕니다.
+        pending = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in vectors_by_hash and text_hash not in pending:
+                pending[text_hash] = text
+        pending_items = list(pending.items())
+        batches = [
+            pending_items[start:start + self.batch_size]
+            for start in range(0, len(pending_items), self.batch_size)
+        ]
+
+        done = len(texts) - len(pending_items)
+        if progress:
+            progress(done, len(texts))
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self._embed_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                batch_vectors = future.result()
+                vectors_by_hash.update(batch_vectors)
+                done += len(batch_vectors)
+                if progress:
+                    progress(done, len(texts))
+
+        return [vectors_by_hash[text_hash] for text_hash in hashes]
+
+    def _embed_batch(self, batch):
+        texts = [text for _, text in batch]
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                vectors = self.model.embed_documents(texts)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                print(f"임베딩 요청 실패 ({e}). {delay:.1f}초 후 재시도합니다... ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+        # 완료된 배치는 즉시 캐시에 커밋하여 체크포인트로 사용합니다.
+        if self.cache is not None:
+            self.cache.store(texts, vectors)
+        return {text_hash: vector for (text_hash, _), vector in zip(batch, vectors)}
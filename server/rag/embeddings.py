@@ -0,0 +1,38 @@
+# server/rag/embeddings.py
+import threading
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from server.core.config import settings
+from server.rag.embedding_cache import CachedEmbeddings
+
+_lock = threading.Lock()
+_embeddings = None
+
+def get_embeddings():
+    """
+    프로세스 전역에서 공유하는 임베딩 클라이언트를 반환합니다.
+    ingest와 retriever가 같은 모델을 사용해야 하므로, 두 곳 모두 이 함수를 통해 가져옵니다.
+    EMBEDDING_CACHE_PATH가 설정되어 있으면 임베딩 캐시(CachedEmbeddings)로 감싸서 반환합니다.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                embeddings = GoogleGenerativeAIEmbeddings(
+                    model=f"models/{settings.EMBEDDING_MODEL_NAME}",
+                    google_api_key=settings.GOOGLE_API_KEY
+                )
+                if settings.EMBEDDING_CACHE_PATH:
+                    embeddings = CachedEmbeddings(
+                        embeddings,
+                        model_name=settings.EMBEDDING_MODEL_NAME,
+                        path=settings.EMBEDDING_CACHE_PATH,
+                        memory_size=settings.EMBEDDING_CACHE_MEMORY_SIZE,
+                    )
+                _embeddings = embeddings
+    return _embeddings
+
+def get_embedding_cache_stats():
+    """임베딩 캐시 적중 통계를 반환합니다. 캐시를 사용하지 않으면 None을 반환합니다."""
+    if isinstance(_embeddings, CachedEmbeddings):
+        return _embeddings.stats()
+    return None
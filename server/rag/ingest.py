@@ -1,52 +1,303 @@
 # server/rag/ingest.py
+import argparse
 import os
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+import shutil
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from langchain_community.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from server.core.config import settings
+from server.rag.embeddings import get_embeddings, get_embedding_cache_stats
+from server.rag.ann import AnnParams, is_ann_current, remove_ann_index
+from server.rag.embedding_pipeline import EmbeddingPipeline
+from server.rag.sharding import (
+    ROOT_SHARD, SHARDS_DIR, hash_shard_name, new_shard_manifest, read_shard_manifest, shard_for_source,
+    shard_path, update_shard_entry, write_shard_manifest,
+)
+from server.rag.store import VectorStore, LEGACY_DOCSTORE_FILE, CHUNK_SIZE, CHUNK_OVERLAP, content_hash
 
-def main():
+def iter_source_files(source_dir):
+    """원본 디렉토리의 .txt 파일 경로를 하나씩 반환합니다. (전체 목록을 메모리에 만들지 않음)"""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.endswith(".txt"):
+                yield os.path.join(root, file_name)
+
+def file_sha256(path):
+    """파일 내용의 SHA-256 해시를 반환합니다."""
+    with open(path, "rb") as f:
+        return content_hash(f.read())
+
+_text_splitter = None
+
+def load_and_split(path):
+    """하나의 파일을 로드하여 청크 목록으로 분할합니다."""
+    global _text_splitter
+    if _text_splitter is None:
+        # 텍스트를 의미 있는 단위로 분할합니다.
+        _text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    documents = TextLoader(path, encoding="utf-8").load()
+    return _text_splitter.split_documents(documents)
+
+def process_file(path, indexed_hash):
     """
-    'documents' 디렉토리의 문서를 로드, 분할, 임베딩하여 FAISS 벡터 저장소에 저장합니다.
+    파일 하나의 해시를 계산하고, 변경된 경우에만 로드/분할합니다. (프로세스 풀 워커에서 실행)
+
+    Returns:
+        tuple: (파일 경로, 파일 해시, 청크 목록 또는 변경이 없으면 None)
     """
-    print("문서 로드를 시작합니다...")
-    # DirectoryLoader를 사용하여 지정된 디렉토리의 모든 .txt 파일을 로드합니다.
-    loader = DirectoryLoader(
-        settings.DOCUMENT_SOURCE_DIR,
-        glob="**/*.txt",
-        loader_cls=TextLoader,
-        loader_kwargs={"encoding": "utf-8"}
-    )
-    documents = loader.load()
-    if not documents:
+    file_hash = file_sha256(path)
+    if file_hash == indexed_hash:
+        return path, file_hash, None
+    return path, file_hash, load_and_split(path)
+
+def bounded_map(executor, fn, items, window):
+    """
+    executor.map과 같지만, 한 번에 최대 window개의 작업만 제출하여 결과가 메모리에 쌓이지 않도록 합니다.
+    결과는 입력 순서대로 반환합니다.
+    """
+    pending = []
+    for args in items:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+def reset_vector_store(path):
+    """기존 벡터 저장소 파일을 모두 삭제합니다. (전체 재색인용)"""
+    os.makedirs(path, exist_ok=True)
+    for file_name in os.listdir(path):
+        if file_name.startswith(("index.faiss", "index.ann", "docstore.sqlite", LEGACY_DOCSTORE_FILE)):
+            os.remove(os.path.join(path, file_name))
+
+class IngestProgress:
+    """처리한 파일/청크 수와 경과 시간을 출력합니다."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.files = 0
+        self.changed_files = 0
+        self.embedded_chunks = 0
+        self.removed_chunks = 0
+
+    def report(self, force=False):
+        if force or self.files % 100 == 0:
+            elapsed = time.monotonic() - self.started
+            print(
+                f"  진행: 파일 {self.files}개 확인 (변경 {self.changed_files}개), "
+                f"청크 {self.embedded_chunks}개 임베딩, {self.removed_chunks}개 제거 - {elapsed:.1f}초"
+            )
+
+def ingest_store(path, sources, pipeline, full=False):
+    """
+    하나의 벡터 저장소(또는 샤드) 디렉토리에 sources의 문서를 증분 색인합니다.
+
+    Args:
+        path (str): 저장소 디렉토리 경로.
+        sources (Iterable[str]): 이 저장소에 속하는 원본 파일 경로.
+        pipeline (EmbeddingPipeline): 임베딩 파이프라인. (샤드 간 캐시/속도 제한 공유)
+        full (bool): True이면 기존 저장소를 지우고 모든 문서를 다시 임베딩합니다.
+
+    Returns:
+        int | None: 색인된 청크 수. 문서가 하나도 없으면 None.
+    """
+    if full:
+        print("전체 재색인을 위해 기존 벡터 저장소를 삭제합니다...")
+        reset_vector_store(path)
+
+    store = VectorStore.open_for_write(path)
+    indexed_files = store.docstore.get_file_hashes()
+    if not indexed_files and store.ntotal > 0:
+        # 매니페스트가 없는 이전 저장소는 증분 비교가 불가능하므로 전체 재색인합니다.
+        print("파일 매니페스트가 없는 저장소입니다. 전체 재색인을 진행합니다...")
+        store.close()
+        reset_vector_store(path)
+        store = VectorStore.open_for_write(path)
+
+    print("문서 변경 사항을 확인하며 인덱싱을 시작합니다...")
+    progress = IngestProgress()
+    seen_files = set()
+    buffer_docs = []
+    buffer_files = {}
+    flushes = 0
+
+    def flush():
+        """버퍼에 모인 청크를 임베딩하여 인덱스에 추가하고, 해당 파일의 해시를 기록합니다."""
+        nonlocal buffer_docs, buffer_files, flushes
+        if buffer_docs:
+            vectors = pipeline.embed([doc.page_content for doc in buffer_docs])
+            store.add(buffer_docs, vectors)
+            progress.embedded_chunks += len(buffer_docs)
+        for source, file_hash in buffer_files.items():
+            store.docstore.set_file_hash(source, file_hash)
+        buffer_docs, buffer_files = [], {}
+
+        # 주기적으로 인덱스와 매니페스트를 함께 저장하여, 중단되더라도 저장된 지점부터 이어서 진행합니다.
+        flushes += 1
+        if flushes % settings.INGEST_CHECKPOINT_EVERY == 0:
+            store.save()
+
+    tasks = ((source, indexed_files.get(source)) for source in sources)
+    workers = settings.INGEST_WORKERS or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for source, file_hash, docs in bounded_map(executor, process_file, tasks, window=workers * 2):
+            seen_files.add(source)
+            progress.files += 1
+            if docs is not None:
+                progress.changed_files += 1
+
+                # 청크 해시가 같은 기존 청크는 그대로 두고, 새로 생긴 청크만 임베딩 대상에 추가합니다.
+                existing = defaultdict(list)
+                for chunk_id, chunk_hash in store.docstore.get_chunk_hashes(source):
+                    existing[chunk_hash].append(chunk_id)
+                for doc in docs:
+                    reusable = existing.get(content_hash(doc.page_content))
+                    if reusable:
+                        reusable.pop()
+                    else:
+                        buffer_docs.append(doc)
+                stale_ids = [chunk_id for ids in existing.values() for chunk_id in ids]
+                store.remove(stale_ids)
+                progress.removed_chunks += len(stale_ids)
+                buffer_files[source] = file_hash
+
+                if len(buffer_docs) >= settings.INGEST_BATCH_SIZE:
+                    flush()
+            progress.report()
+
+    if not seen_files and not indexed_files:
         print("로드할 문서가 없습니다. 'documents' 디렉토리를 확인하세요.")
-        return
+        store.close()
+        return None
 
-    print(f"총 {len(documents)}개의 문서를 로드했습니다.")
+    # 원본에서 삭제된 파일의 벡터와 청크를 제거합니다.
+    for source in indexed_files:
+        if source not in seen_files:
+            stale_ids = store.docstore.delete_file(source)
+            store.remove(stale_ids)
+            progress.removed_chunks += len(stale_ids)
 
-    print("텍스트 분할을 시작합니다...")
-    # 텍스트를 의미 있는 단위로 분할합니다.
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    docs = text_splitter.split_documents(documents)
-    print(f"총 {len(docs)}개의 청크(chunk)로 분할되었습니다.")
+    # 남은 청크를 처리하고 병합된 인덱스를 저장합니다.
+    flush()
+    store.save()
+    progress.report(force=True)
 
-    print("임베딩 및 벡터 저장소 생성을 시작합니다...")
-    # Google의 임베딩 모델을 초기화합니다.
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model=f"models/{settings.EMBEDDING_MODEL_NAME}",
-        google_api_key=settings.GOOGLE_API_KEY
-    )
+    # 설정된 ANN 인덱스(IVF/HNSW)를 Flat 인덱스로부터 다시 만듭니다. (변경이 없으면 건너뜀)
+    ann_params = AnnParams.from_settings(settings)
+    if ann_params.index_type == "flat":
+        remove_ann_index(path)
+    elif progress.embedded_chunks or progress.removed_chunks or not is_ann_current(path, ann_params, store.ntotal):
+        started = time.monotonic()
+        if store.build_ann(ann_params):
+            print(f"'{ann_params.index_type}' ANN 인덱스를 생성했습니다. ({time.monotonic() - started:.1f}초)")
+        else:
+            print(f"청크 수가 RAG_ANN_MIN_VECTORS({ann_params.min_vectors}) 미만이라 Flat 인덱스를 사용합니다.")
+    store.close()
+    print(f"벡터 저장소가 '{path}' 경로에 성공적으로 저장되었습니다. (총 {store.ntotal}개 청크)")
+    return store.ntotal
 
-    # 분할된 문서와 임베딩 모델을 사용하여 FAISS 벡터 저장소를 생성합니다.
-    db = FAISS.from_documents(docs, embeddings)
+def discover_shards(source_dir, mode, hash_shards):
+    """원본 디렉토리 구성으로부터 샤드 이름 목록을 구합니다."""
+    if mode == "hash":
+        return [hash_shard_name(i) for i in range(hash_shards)]
+    subdirs = sorted(entry.name for entry in os.scandir(source_dir) if entry.is_dir())
+    return subdirs + [ROOT_SHARD]
 
-    # 생성된 벡터 저장소를 지정된 경로에 저장합니다.
-    if not os.path.exists(settings.VECTOR_STORE_PATH):
-        os.makedirs(settings.VECTOR_STORE_PATH)
-    db.save_local(settings.VECTOR_STORE_PATH)
-    print(f"벡터 저장소가 '{settings.VECTOR_STORE_PATH}' 경로에 성공적으로 저장되었습니다.")
+def iter_shard_sources(source_dir, name, mode, hash_shards):
+    """샤드에 속하는 원본 파일 경로를 하나씩 반환합니다."""
+    if mode == "directory" and name == ROOT_SHARD:
+        for file_name in sorted(os.listdir(source_dir)):
+            source = os.path.join(source_dir, file_name)
+            if file_name.endswith(".txt") and os.path.isfile(source):
+                yield source
+    elif mode == "directory":
+        yield from iter_source_files(os.path.join(source_dir, name))
+    else:
+        for source in iter_source_files(source_dir):
+            if shard_for_source(source, source_dir, mode, hash_shards) == name:
+                yield source
 
-if __name__ == "__main__":
-    main()
+def ingest_shards(pipeline, full=False, only_shard=None):
+    """
+    원본 문서를 샤드(하위 디렉토리 또는 경로 해시 기준)로 나누어, 샤드마다 독립된 저장소에 증분 색인합니다.
+    샤드별 청크 수와 갱신 시각은 shards.json 매니페스트에 기록하며, 샤드 하나가 끝날 때마다 갱신합니다.
+
+    Args:
+        only_shard (str | None): 지정하면 해당 샤드만 다시 색인합니다.
+    """
+    path = settings.VECTOR_STORE_PATH
+    source_dir = settings.DOCUMENT_SOURCE_DIR
+    mode, hash_shards = settings.RAG_SHARDING, settings.RAG_HASH_SHARDS
+    os.makedirs(path, exist_ok=True)
+
+    manifest = read_shard_manifest(path)
+    if manifest is None or manifest["mode"] != mode or manifest["hash_shards"] != hash_shards:
+        # 샤딩 방식이 바뀌면 문서가 속하는 샤드가 달라지므로 모든 샤드를 새로 만듭니다.
+        if manifest is not None:
+            print("샤딩 설정이 바뀌어 모든 샤드를 다시 만듭니다...")
+        shutil.rmtree(os.path.join(path, SHARDS_DIR), ignore_errors=True)
+        manifest = new_shard_manifest(mode, hash_shards)
+        only_shard = None
+
+    names = discover_shards(source_dir, mode, hash_shards)
+    for name in ([only_shard] if only_shard else names):
+        print(f"--- 샤드 '{name}' ---")
+        sources = iter_shard_sources(source_dir, name, mode, hash_shards)
+        ntotal = ingest_store(shard_path(path, name), sources, pipeline, full=full)
+        if ntotal:
+            update_shard_entry(manifest, name, ntotal)
+        else:
+            shutil.rmtree(shard_path(path, name), ignore_errors=True)
+            manifest["shards"].pop(name, None)
+        write_shard_manifest(path, manifest)
 
+    # 원본에서 사라진 하위 디렉토리의 샤드를 삭제합니다.
+    if not only_shard:
+        for name in list(manifest["shards"]):
+            if name not in names:
+                print(f"원본 디렉토리가 없어진 샤드 '{name}'를 삭제합니다.")
+                shutil.rmtree(shard_path(path, name), ignore_errors=True)
+                manifest["shards"].pop(name)
+        write_shard_manifest(path, manifest)
+    print(f"샤드 {len(manifest['shards'])}개, 총 {sum(entry['ntotal'] for entry in manifest['shards'].values())}개 청크")
+
+def main(full=False, shard=None):
+    """
+    'documents' 디렉토리의 문서를 로드, 분할, 임베딩하여 벡터 저장소(FAISS + SQLite)에 저장합니다.
+
+    기본적으로 증분(incremental) 모드로 동작합니다. 파일/청크 해시 매니페스트를 비교하여
+    새로 추가되거나 변경된 청크만 임베딩하고, 삭제된 파일의 벡터는 인덱스에서 제거한 뒤
+    기존 인덱스에 병합합니다.
+
+    대용량 문서 디렉토리를 위해 load → split → embed → add 단계를 스트리밍으로 처리합니다.
+    파일 읽기/분할은 프로세스 풀에서 병렬로 수행하고, 청크는 INGEST_BATCH_SIZE 단위로
+    임베딩하여 인덱스에 추가하므로 전체 문서를 한 번에 메모리에 올리지 않습니다.
+
+    RAG_SHARDING이 "directory" 또는 "hash"이면 샤드별 저장소로 나누어 색인합니다.
+
+    Args:
+        full (bool): True이면 기존 저장소를 지우고 모든 문서를 다시 임베딩합니다.
+        shard (str | None): 샤드 저장소에서 지정한 샤드만 다시 색인합니다.
+    """
+    pipeline = EmbeddingPipeline(get_embeddings())
+    if settings.RAG_SHARDING == "none":
+        ingest_store(settings.VECTOR_STORE_PATH, iter_source_files(settings.DOCUMENT_SOURCE_DIR), pipeline, full=full)
+    else:
+        ingest_shards(pipeline, full=full, only_shard=shard)
+
+    cache_stats = get_embedding_cache_stats()
+    if cache_stats:
+        print(
+            f"임베딩 캐시: 적중률 {cache_stats['hit_rate']:.1%} "
+            f"(메모리 {cache_stats['memory_hits']}, 디스크 {cache_stats['disk_hits']}, 미스 {cache_stats['misses']})"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="문서를 임베딩하여 벡터 저장소를 생성/갱신합니다.")
+    parser.add_argument("--full", action="store_true", help="기존 저장소를 지우고 전체 문서를 다시 임베딩합니다.")
+    parser.add_argument("--shard", help="샤드 저장소에서 지정한 샤드만 다시 색인합니다. (RAG_SHARDING 사용 시)")
+    args = parser.parse_args()
+    main(full=args.full, shard=args.shard)
@@ -0,0 +1,91 @@
+# server/rag/lexical.py
+import re
+
+# 한글 단어, 영문/숫자 토큰(프로젝트 코드 등 '-', '_', '.', '/' 포함)을 분리합니다.
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+# 한국어 단어 끝에 붙는 주요 조사. 어간을 색인/검색어에 함께 넣어 '회의록은'과 '회의록'이 매칭되도록 합니다.
+JOSA_SUFFIXES = (
+    "에서는", "으로는", "에게서", "이라고", "에서", "으로", "에게", "까지", "부터", "보다", "처럼", "하고",
+    "이나", "이랑", "라고", "은", "는", "이", "가", "을", "를", "에", "의", "와", "과", "도", "로", "만", "랑",
+)
+
+# 질문에 자주 붙지만 문서 내용과는 무관한 요청 표현. 신뢰도 계산에서 제외합니다.
+QUERY_STOPWORDS = {
+    "알려줘", "알려주세요", "알려", "요약해줘", "요약", "정리해줘", "찾아줘", "보여줘", "해줘",
+    "뭐야", "무엇", "뭐", "어떻게", "언제", "어디", "관련", "내용", "대해", "대해서", "대한", "있어", "있나요",
+}
+
+def strip_josa(word):
+    """한글 단어 끝의 조사를 한 번 제거한 어간을 반환합니다."""
+    for suffix in JOSA_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[: -len(suffix)]
+    return word
+
+def query_terms(text):
+    """
+    사용자 질문의 핵심 검색어 목록을 반환합니다. (조사를 제거한 단어 단위)
+    어휘 검색 결과의 신뢰도(질문 검색어가 문서에 얼마나 포함되는지)를 계산할 때 사용합니다.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        term = strip_josa(token) if "가" <= token[0] <= "힣" else token
+        if term not in terms and term not in QUERY_STOPWORDS:
+            terms.append(term)
+    return terms
+
+def tokenize(text):
+    """
+    BM25 색인용 한국어 토크나이저입니다.
+
+    - 한글 단어: 원형, 조사를 제거한 어간, 글자 bigram을 모두 토큰으로 사용합니다.
+      (형태소 분석기 없이도 '회의록에서'와 '회의록'처럼 활용형이 다른 단어가 매칭됩니다.)
+    - 영문/숫자: 소문자 토큰과, 코드 형태('prj-2025')인 경우 구성 요소('prj', '2025')를 함께 사용합니다.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "가" <= token[0] <= "힣":
+            stem = strip_josa(token)
+            if stem != token:
+                tokens.append(stem)
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif re.search(r"[-_./]", token):
+            tokens.extend(part for part in re.split(r"[-_./]", token) if part)
+    return tokens
+
+def fts_match_query(text):
+    """질문을 FTS5 MATCH 구문(토큰 OR 검색)으로 변환합니다. 토큰이 없으면 None을 반환합니다."""
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return None
+    return " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+
+def term_coverage(terms, text):
+    """질문 검색어 중 문서 본문에 포함된 비율(0~1)을 반환합니다."""
+    if not terms:
+        return 0.0
+    text = text.lower()
+    return sum(1 for term in terms if term in text) / len(terms)
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """
+    여러 검색 결과 순위를 Reciprocal Rank Fusion으로 합칩니다.
+    점수 = Σ 1 / (rrf_k + 순위). 점수 척도가 다른 BM25와 벡터 거리를 순위만으로 결합합니다.
+
+    Args:
+        rankings (list[list[int]]): 검색기(또는 샤드)별 청크 ID 순위 목록.
+
+    Returns:
+        list[int]: 융합 점수가 높은 순서의 청크 ID 목록.
+    """
+    return [chunk_id for chunk_id, _ in reciprocal_rank_scores(rankings, rrf_k)]
+
+def reciprocal_rank_scores(rankings, rrf_k=60):
+    """reciprocal_rank_fusion과 같지만 (청크 ID, 융합 점수) 목록을 반환합니다."""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -1,47 +1,175 @@
 # server/rag/retriever.py
 import os
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
+import threading
+from typing import List, Union
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from server.core.config import settings
+from server.rag.ann import AnnParams
+from server.rag.embeddings import get_embeddings
+from server.rag.lexical import query_terms, reciprocal_rank_fusion, term_coverage
+from server.rag.sharding import ShardedVectorStore, read_shard_manifest
+from server.rag.store import VectorStore, LEGACY_DOCSTORE_FILE
+
+class HybridRetriever(BaseRetriever):
+    """
+    로컬 VectorStore(FAISS + SQLite)에서 BM25(FTS5) 어휘 검색과 벡터 검색을 RRF로 결합하는 Retriever입니다.
+
+    문서에 정확한 이름/날짜/프로젝트 코드가 많아 어휘 검색이 빠르고 정확한 경우가 많으므로,
+    hybrid 모드에서는 BM25 상위 문서가 질문의 핵심 검색어를 충분히 포함하면(lexical_confidence 이상)
+    임베딩 API 호출 없이 어휘 검색 결과를 바로 반환합니다.
+
+    Attributes:
+        store (VectorStore | ShardedVectorStore): 검색 대상 벡터 저장소. (샤드 저장소면 샤드를 병렬 검색)
+        embeddings (Embeddings): 쿼리 임베딩에 사용할 모델. (ingest 시 사용한 모델과 동일해야 함)
+        k (int): 반환할 청크 수.
+        mode (str): "hybrid", "vector", "bm25" 중 하나.
+        fetch_k (int): 결합 전에 각 검색기에서 가져올 후보 수.
+        rrf_k (int): RRF 순위 보정 상수.
+        lexical_confidence (float): 임베딩 호출을 건너뛸 최소 검색어 포함 비율. (1보다 크면 사용 안 함)
+        index_generation (str): 로드한 인덱스의 저장 세대. ingest로 인덱스가 바뀌면 달라지므로 응답 캐시 키에 사용합니다.
+    """
+    store: Union[VectorStore, ShardedVectorStore]
+    embeddings: Embeddings
+    k: int = 4
+    mode: str = "hybrid"
+    fetch_k: int = 20
+    rrf_k: int = 60
+    lexical_confidence: float = 1.0
+    index_generation: str = ""
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self.mode == "vector":
+            vector = self.embeddings.embed_query(query)
+            return [doc for doc, _ in self.store.search(vector, self.k)]
+
+        lexical_ids = [chunk_id for chunk_id, _ in self.store.lexical_search(query, self.fetch_k)]
+        if self.mode == "bm25":
+            return self.store.get_documents(lexical_ids[:self.k])
+
+        if lexical_ids and self._is_lexically_confident(query, lexical_ids[0]):
+            return self.store.get_documents(lexical_ids[:self.k])
+
+        vector = self.embeddings.embed_query(query)
+        dense_ids = [chunk_id for chunk_id, _ in self.store.search_ids(vector, self.fetch_k)]
+        fused_ids = reciprocal_rank_fusion([lexical_ids, dense_ids], self.rrf_k)
+        return self.store.get_documents(fused_ids[:self.k])
+
+    def _is_lexically_confident(self, query, top_id):
+        """BM25 1위 청크가 질문의 핵심 검색어를 lexical_confidence 비율 이상 포함하는지 확인합니다."""
+        terms = query_terms(query)
+        if not terms or self.lexical_confidence > 1:
+            return False
+        top_documents = self.store.get_documents([top_id])
+        if not top_documents:
+            return False
+        return term_coverage(terms, top_documents[0].page_content) >= self.lexical_confidence
+
+def _load_legacy_retriever(embeddings):
+    """이전 형식(index.faiss + index.pkl)으로 저장된 인덱스를 LangChain FAISS로 로드합니다."""
+    from langchain_community.vectorstores import FAISS
+
+    print(
+        "이전 형식(pickle)의 벡터 저장소를 로드합니다. "
+        "mmap/SQLite 형식으로 변환하려면 'python -m server.rag.ingest'를 다시 실행하세요."
+    )
+    # allow_dangerous_deserialization=True는 pickle 기반으로 저장된
+    # FAISS 인덱스를 로드할 때 필요한 옵션입니다. 신뢰할 수 있는
+    # 인덱스 파일에만 사용해야 합니다.
+    db = FAISS.load_local(
+        settings.VECTOR_STORE_PATH,
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+    return db.as_retriever()
+
+# --- 프로세스 전역 Retriever 관리 ---
+# 인덱스는 프로세스당 한 번만 로드하여 재사용합니다. mmap으로 열기 때문에
+# 같은 서버의 여러 uvicorn 워커가 인덱스 페이지를 OS 캐시에서 공유합니다.
+_retriever_lock = threading.Lock()
+_retriever = None
 
 def get_rag_retriever():
     """
-    미리 생성된 FAISS 인덱스를 로컬 경로에서 불러와,
-    LangChain에서 사용할 수 있는 Retriever 객체를 생성하고 반환합니다.
+    미리 생성된 벡터 저장소를 로컬 경로에서 불러와,
+    LangChain에서 사용할 수 있는 Retriever 객체를 반환합니다.
+    최초 호출 시에만 로드하고, 이후에는 같은 Retriever를 반환합니다.
 
     Retriever는 사용자 쿼리가 주어졌을 때, 벡터 저장소에서 가장 유사한
     문서 청크(chunk)들을 검색하는 역할을 담당합니다.
 
     Returns:
-        langchain.schema.retriever.BaseRetriever: LangChain 호환 Retriever 객체.
+        langchain_core.retrievers.BaseRetriever: LangChain 호환 Retriever 객체.
 
     Raises:
         FileNotFoundError: 지정된 경로에 벡터 저장소 파일이 없을 경우 발생합니다.
                            이 경우, 'python -m server.rag.ingest'를 먼저 실행해야 합니다.
     """
-    # 벡터 저장소 경로 존재 여부 확인
-    if not os.path.exists(settings.VECTOR_STORE_PATH):
-        raise FileNotFoundError(
-            f"Vector store not found at {settings.VECTOR_STORE_PATH}. "
-            "Please run 'python -m server.rag.ingest' first to create it."
+    global _retriever
+    if _retriever is not None:
+        return _retriever
+
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = _load_retriever()
+    return _retriever
+
+def warm_rag_retriever():
+    """
+    서버 시작 시 Retriever(인덱스 + 임베딩 클라이언트)를 미리 로드합니다.
+    벡터 저장소가 없으면 경고만 출력하고 서버는 계속 시작합니다.
+
+    Returns:
+        bool: 로드에 성공했는지 여부.
+    """
+    try:
+        get_rag_retriever()
+        return True
+    except FileNotFoundError as e:
+        print(f"RAG Retriever를 로드하지 못했습니다: {e}")
+        return False
+
+def reload_rag_retriever():
+    """ingest로 인덱스를 다시 만든 뒤, 새 인덱스로 Retriever를 교체합니다."""
+    global _retriever
+    with _retriever_lock:
+        _retriever = _load_retriever()
+    return _retriever
+
+def _load_retriever():
+    path = settings.VECTOR_STORE_PATH
+    # 임베딩 모델은 ingest와 같은 공유 클라이언트를 사용합니다.
+    embeddings = get_embeddings()
+
+    ann_params = AnnParams.from_settings(settings)
+    store = None
+    if settings.RAG_SHARDING != "none" and read_shard_manifest(path) is not None:
+        store = ShardedVectorStore.load(
+            path, ann_params=ann_params, max_workers=settings.RAG_SHARD_SEARCH_THREADS, rrf_k=settings.RAG_RRF_K,
         )
+    elif VectorStore.exists(path):
+        store = VectorStore.load(path, mmap=True, read_only=True, ann_params=ann_params)
 
-    # 임베딩 모델 초기화 (ingest 시 사용했던 모델과 동일해야 함)
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model=f"models/{settings.EMBEDDING_MODEL_NAME}",
-        google_api_key=settings.GOOGLE_API_KEY
-    )
-    
-    # 로컬에 저장된 FAISS 인덱스를 메모리로 로드
-    # allow_dangerous_deserialization=True는 pickle 기반으로 저장된
-    # FAISS 인덱스를 로드할 때 필요한 옵션입니다. 신뢰할 수 있는
-    # 인덱스 파일에만 사용해야 합니다.
-    db = FAISS.load_local(
-        settings.VECTOR_STORE_PATH, 
-        embeddings,
-        allow_dangerous_deserialization=True
+    if store is not None:
+        return HybridRetriever(
+            store=store,
+            embeddings=embeddings,
+            k=settings.RAG_TOP_K,
+            mode=settings.RAG_RETRIEVAL_MODE,
+            fetch_k=settings.RAG_FETCH_K,
+            rrf_k=settings.RAG_RRF_K,
+            lexical_confidence=settings.RAG_LEXICAL_CONFIDENCE,
+            index_generation=str(store.generation),
+        )
+
+    if os.path.exists(os.path.join(path, LEGACY_DOCSTORE_FILE)):
+        return _load_legacy_retriever(embeddings)
+
+    raise FileNotFoundError(
+        f"Vector store not found at {path}. "
+        "Please run 'python -m server.rag.ingest' first to create it."
     )
-    
-    # 로드된 벡터 저장소를 LangChain의 Retriever로 변환하여 반환
-    # as_retriever()는 기본적으로 유사도 검색을 수행합니다.
-    return db.as_retriever()
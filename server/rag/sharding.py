@@ -0,0 +1,155 @@
+# server/rag/sharding.py
+import hashlib
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from server.rag.lexical import reciprocal_rank_scores
+from server.rag.store import VectorStore
+
+# --- 샤드 저장소 구성 ---
+# VECTOR_STORE_PATH/shards.json      : 샤드 매니페스트 (샤딩 방식, 샤드별 청크 수/갱신 시각)
+# VECTOR_STORE_PATH/shards/<이름>/   : 샤드마다 독립된 VectorStore (index.faiss + docstore.sqlite)
+SHARD_MANIFEST_FILE = "shards.json"
+SHARDS_DIR = "shards"
+SHARDING_MODES = ("none", "directory", "hash")
+# directory 방식에서 원본 디렉토리 최상위에 있는 파일이 속하는 샤드
+ROOT_SHARD = "_root"
+
+def shard_path(path, name):
+    return os.path.join(path, SHARDS_DIR, name)
+
+def hash_shard_name(index):
+    return f"hash-{index:02d}"
+
+def shard_for_source(source, source_dir, mode, hash_shards):
+    """
+    원본 파일이 속할 샤드 이름을 반환합니다.
+
+    - directory: 원본 디렉토리 바로 아래 하위 디렉토리(팀/부서) 이름. 최상위 파일은 ROOT_SHARD.
+    - hash: 상대 경로의 해시로 hash_shards개 중 하나에 고르게 분배.
+    """
+    relative = os.path.relpath(source, source_dir)
+    if mode == "directory":
+        parts = relative.split(os.sep)
+        return parts[0] if len(parts) > 1 else ROOT_SHARD
+    digest = hashlib.sha1(relative.replace(os.sep, "/").encode("utf-8")).hexdigest()
+    return hash_shard_name(int(digest, 16) % hash_shards)
+
+def read_shard_manifest(path):
+    """샤드 매니페스트를 읽습니다. 샤드 저장소가 아니면 None을 반환합니다."""
+    manifest_path = os.path.join(path, SHARD_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_shard_manifest(path, manifest):
+    """매니페스트를 임시 파일에 쓴 뒤 교체합니다. (서버가 읽는 도중에도 안전)"""
+    manifest_path = os.path.join(path, SHARD_MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def new_shard_manifest(mode, hash_shards):
+    return {"mode": mode, "hash_shards": hash_shards, "shards": {}}
+
+def update_shard_entry(manifest, name, ntotal):
+    manifest["shards"][name] = {"ntotal": ntotal, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+class ShardedVectorStore:
+    """
+    여러 샤드(VectorStore)를 하나의 저장소처럼 검색합니다.
+
+    검색은 샤드마다 스레드에서 병렬로 실행하고(FAISS 검색과 SQLite 조회는 GIL을 놓음),
+    샤드별 상위 결과를 병합하여 전체 top-k를 반환합니다. 벡터 거리는 샤드 사이에서 비교할 수 있지만,
+    BM25 점수는 샤드마다 IDF와 평균 문서 길이가 달라 척도가 다르므로 샤드별 순위를 RRF로 합칩니다.
+    청크 ID는 샤드마다 따로 부여되므로 (샤드 이름, 청크 ID) 튜플을 청크 식별자로 사용합니다.
+
+    Args:
+        shards (dict[str, VectorStore]): 샤드 이름 → 샤드 저장소.
+        max_workers (int): 병렬 검색에 사용할 최대 스레드 수.
+        rrf_k (int): 샤드별 BM25 순위를 합칠 때 사용할 RRF 순위 보정 상수.
+    """
+
+    def __init__(self, shards, max_workers=8, rrf_k=60):
+        self.shards = shards
+        self.rrf_k = rrf_k
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(shards))), thread_name_prefix="shard-search"
+        )
+
+    @classmethod
+    def load(cls, path, ann_params=None, max_workers=8, rrf_k=60):
+        """매니페스트에 기록된 샤드를 모두 검색 전용(mmap)으로 엽니다."""
+        manifest = read_shard_manifest(path)
+        shards = {}
+        for name in manifest["shards"]:
+            if VectorStore.exists(shard_path(path, name)):
+                shards[name] = VectorStore.load(shard_path(path, name), mmap=True, read_only=True, ann_params=ann_params)
+        return cls(shards, max_workers=max_workers, rrf_k=rrf_k)
+
+    @property
+    def ntotal(self):
+        return sum(store.ntotal for store in self.shards.values())
+
+    @property
+    def generation(self):
+        """샤드별 저장 세대 번호를 이은 문자열. 어느 샤드든 다시 저장되거나 샤드 구성이 바뀌면 달라집니다."""
+        return ",".join(f"{name}={store.generation}" for name, store in sorted(self.shards.items()))
+
+    def _fan_out(self, fn):
+        """모든 샤드에 fn(store)을 병렬로 실행하고 [(샤드 이름, 결과)] 목록을 반환합니다."""
+        if len(self.shards) == 1:
+            return [(name, fn(store)) for name, store in self.shards.items()]
+        futures = [(name, self._executor.submit(fn, store)) for name, store in self.shards.items()]
+        return [(name, future.result()) for name, future in futures]
+
+    def search_ids(self, vector, k=4):
+        """모든 샤드에서 가장 가까운 청크 k개를 ((샤드 이름, 청크 ID), 거리) 목록으로 반환합니다."""
+        hits = [
+            ((name, chunk_id), distance)
+            for name, shard_hits in self._fan_out(lambda store: store.search_ids(vector, k))
+            for chunk_id, distance in shard_hits
+        ]
+        return heapq.nsmallest(k, hits, key=lambda hit: hit[1])
+
+    def lexical_search(self, query, k=20):
+        """
+        모든 샤드의 BM25 순위를 RRF로 합쳐 상위 청크 k개를 ((샤드 이름, 청크 ID), RRF 점수) 목록으로 반환합니다.
+        원점수를 그대로 비교하면 문서가 적거나 드문 단어가 많은 샤드의 결과가 항상 위로 올라옵니다.
+        """
+        rankings = [
+            [(name, chunk_id) for chunk_id, _ in shard_hits]
+            for name, shard_hits in self._fan_out(lambda store: store.lexical_search(query, k))
+        ]
+        return reciprocal_rank_scores(rankings, self.rrf_k)[:k]
+
+    def get_documents(self, ids):
+        """(샤드 이름, 청크 ID) 순서대로 Document 목록을 반환합니다. (삭제된 청크는 건너뜀)"""
+        documents = self._get_document_map(ids)
+        return [documents[key] for key in ids if key in documents]
+
+    def _get_document_map(self, ids):
+        by_shard = {}
+        for name, chunk_id in ids:
+            by_shard.setdefault(name, []).append(chunk_id)
+        documents = {}
+        for name, chunk_ids in by_shard.items():
+            if name in self.shards:
+                for chunk_id, doc in self.shards[name].docstore.get(chunk_ids).items():
+                    documents[(name, chunk_id)] = doc
+        return documents
+
+    def search(self, vector, k=4):
+        """모든 샤드에서 가장 가까운 청크 k개를 (Document, 거리) 목록으로 반환합니다."""
+        hits = self.search_ids(vector, k)
+        documents = self._get_document_map([key for key, _ in hits])
+        return [(documents[key], distance) for key, distance in hits if key in documents]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for store in self.shards.values():
+            store.close()
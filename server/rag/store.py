@@ -0,0 +1,433 @@
+# server/rag/store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from server.rag.ann import (
+    ANN_INDEX_FILE, build_ann_index, configure_search, read_ann_meta, remove_ann_index, write_ann_meta,
+)
+from server.rag.lexical import tokenize, fts_match_query
+
+# --- 저장소 파일 구성 ---
+# index.faiss      : FAISS 인덱스 (IndexIDMap2로 감싸 청크 ID를 그대로 벡터 ID로 사용)
+# index.ann.faiss  : 검색용 ANN 인덱스 (IVF/HNSW, 선택 사항. ann.py 참고)
+# docstore.sqlite  : 청크 ID -> 본문/메타데이터 (pickle 대신 SQLite 사용)
+#                    + 증분 ingest를 위한 파일/청크 해시 매니페스트
+#                    + BM25 어휘 검색을 위한 FTS5 역색인(chunks_fts)
+#                    + 저장 세대 번호 등 저장소 메타데이터(meta)
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
+# 문서 분할 크기(문자 수). ingest가 청크를 만들 때와 RAG 프롬프트의 최대 길이를 어림할 때 함께 사용합니다.
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+def content_hash(text):
+    """텍스트의 SHA-256 해시를 반환합니다. 청크/파일 변경 감지에 사용합니다."""
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    return hashlib.sha256(text).hexdigest()
+
+class SQLiteDocstore:
+    """
+    청크 본문과 메타데이터를 SQLite에 저장하는 문서 저장소입니다.
+    pickle과 달리 전체를 메모리에 올리지 않고, 검색된 청크만 조회합니다.
+
+    증분 ingest를 위해 원본 파일별 해시(files)와 청크별 해시/원본 경로(chunks.source,
+    chunks.chunk_hash)를 함께 기록합니다.
+
+    청크를 추가할 때 한국어 토크나이저(lexical.tokenize)로 만든 토큰을 FTS5 테이블에
+    함께 색인하여, 임베딩 호출 없이 BM25 어휘 검색을 할 수 있게 합니다.
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            # WAL 모드에서는 ingest가 쓰는 동안에도 다른 프로세스가 읽을 수 있습니다.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id INTEGER PRIMARY KEY,"
+                " page_content TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " source TEXT,"
+                " chunk_hash TEXT)"
+            )
+            # 해시 컬럼이 없던 이전 저장소는 컬럼을 추가합니다. (기존 청크는 다음 ingest에서 다시 기록됨)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+            for column in ("source", "chunk_hash"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " source TEXT PRIMARY KEY,"
+                " content_hash TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL)"
+            )
+            # 토큰은 lexical.tokenize로 미리 분리해 공백으로 이어 저장합니다.
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5("
+                "tokens, tokenize=\"unicode61 tokenchars '-_./'\")"
+            )
+            self._backfill_fts()
+            self._conn.commit()
+        # FTS 색인이 없는 이전 저장소를 읽기 전용으로 연 경우 어휘 검색은 빈 결과를 반환합니다.
+        self.has_lexical_index = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+        ).fetchone() is not None
+        self._lock = threading.Lock()
+
+    def add(self, ids, documents):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, page_content, metadata, source, chunk_hash)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        int(chunk_id),
+                        doc.page_content,
+                        json.dumps(doc.metadata, ensure_ascii=False),
+                        doc.metadata.get("source"),
+                        content_hash(doc.page_content),
+                    )
+                    for chunk_id, doc in zip(ids, documents)
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks_fts (rowid, tokens) VALUES (?, ?)",
+                [(int(chunk_id), " ".join(tokenize(doc.page_content))) for chunk_id, doc in zip(ids, documents)],
+            )
+
+    def delete(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(int(chunk_id),) for chunk_id in ids])
+            self._conn.executemany("DELETE FROM chunks_fts WHERE rowid = ?", [(int(chunk_id),) for chunk_id in ids])
+
+    def lexical_search(self, query, k=20):
+        """
+        FTS5 BM25로 질문과 어휘적으로 일치하는 청크를 검색합니다.
+
+        Returns:
+            list[tuple[int, float]]: (청크 ID, BM25 점수) 목록. 점수가 높을수록 관련도가 높습니다.
+        """
+        match = fts_match_query(query)
+        if match is None or not self.has_lexical_index:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, bm25(chunks_fts) FROM chunks_fts WHERE chunks_fts MATCH ?"
+                " ORDER BY bm25(chunks_fts) LIMIT ?",
+                (match, k),
+            ).fetchall()
+        # SQLite의 bm25()는 관련도가 높을수록 더 작은(음수) 값을 반환하므로 부호를 바꿉니다.
+        return [(chunk_id, -score) for chunk_id, score in rows]
+
+    def _backfill_fts(self):
+        """FTS 색인이 없던 이전 저장소의 청크를 색인합니다."""
+        indexed = self._conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0]
+        total = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if indexed >= total:
+            return
+        rows = self._conn.execute("SELECT id, page_content FROM chunks").fetchall()
+        self._conn.execute("DELETE FROM chunks_fts")
+        self._conn.executemany(
+            "INSERT INTO chunks_fts (rowid, tokens) VALUES (?, ?)",
+            [(chunk_id, " ".join(tokenize(page_content))) for chunk_id, page_content in rows],
+        )
+
+    def get(self, ids):
+        """주어진 ID들의 Document를 {id: Document} 형태로 반환합니다."""
+        ids = [int(chunk_id) for chunk_id in ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, page_content, metadata FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {
+            chunk_id: Document(page_content=page_content, metadata=json.loads(metadata))
+            for chunk_id, page_content, metadata in rows
+        }
+
+    def get_file_hashes(self):
+        """{원본 파일 경로: 파일 해시} 매니페스트를 반환합니다."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT source, content_hash FROM files").fetchall())
+
+    def set_file_hash(self, source, file_hash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (source, content_hash) VALUES (?, ?)", (source, file_hash)
+            )
+
+    def delete_file(self, source):
+        """파일 매니페스트에서 원본 파일을 제거하고, 해당 파일의 청크 ID 목록을 반환합니다."""
+        chunk_ids = [chunk_id for chunk_id, _ in self.get_chunk_hashes(source)]
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE source = ?", (source,))
+        return chunk_ids
+
+    def get_chunk_hashes(self, source):
+        """원본 파일에 속한 청크들의 (청크 ID, 청크 해시) 목록을 반환합니다."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, chunk_hash FROM chunks WHERE source = ? ORDER BY id", (source,)
+            ).fetchall()
+
+    def clear_file_hashes(self, sources):
+        """원본 파일들의 해시를 매니페스트에서 지워, 다음 ingest에서 변경된 파일로 다시 처리되게 합니다."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM files WHERE source = ?", [(source,) for source in sources])
+
+    def ids(self):
+        """저장된 모든 청크 ID 집합을 반환합니다."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM chunks")}
+
+    def sources_of(self, ids):
+        """청크 ID들이 속한 원본 파일 경로 집합을 반환합니다."""
+        ids = [int(chunk_id) for chunk_id in ids]
+        sources = set()
+        with self._lock:
+            # SQLite의 바인딩 변수 수 제한을 넘지 않도록 나누어 조회합니다.
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                sources.update(
+                    row[0] for row in self._conn.execute(
+                        f"SELECT DISTINCT source FROM chunks WHERE id IN ({placeholders})", batch
+                    )
+                )
+        sources.discard(None)
+        return sources
+
+    def get_meta(self, key):
+        """저장소 메타데이터 값을 반환합니다. 없으면(또는 meta 테이블이 없는 이전 저장소이면) None을 반환합니다."""
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def max_id(self):
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM chunks").fetchone()
+        return row[0] if row[0] is not None else -1
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def read_index(path, mmap=True):
+    """
+    FAISS 인덱스를 읽어옵니다. mmap=True이면 파일을 메모리 매핑하여,
+    같은 인덱스를 여는 여러 워커 프로세스가 OS 페이지 캐시를 공유합니다.
+    mmap을 지원하지 않는 인덱스 타입/FAISS 버전이면 일반 로드로 대체합니다.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            print(f"FAISS mmap 로드를 지원하지 않아 일반 로드로 대체합니다: {e}")
+    return faiss.read_index(path)
+
+def write_index(index, path):
+    """
+    FAISS 인덱스를 임시 파일에 쓴 뒤 교체합니다.
+    이미 mmap으로 열어둔 프로세스는 이전 파일을 계속 사용하므로 안전합니다.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+class VectorStore:
+    """
+    FAISS 인덱스와 SQLite 문서 저장소를 묶은 로컬 벡터 저장소입니다.
+
+    Args:
+        path (str): 저장소 디렉토리 경로.
+        index (faiss.Index | None): 벡터 ID가 청크 ID와 같은 FAISS 인덱스. (비어 있으면 첫 add 시 생성)
+        docstore (SQLiteDocstore): 청크 본문 저장소.
+    """
+
+    def __init__(self, path, index, docstore):
+        self.path = path
+        self.index = index
+        self.docstore = docstore
+
+    @classmethod
+    def exists(cls, path):
+        return os.path.exists(os.path.join(path, INDEX_FILE)) and os.path.exists(os.path.join(path, DOCSTORE_FILE))
+
+    @classmethod
+    def load(cls, path, mmap=True, read_only=True, ann_params=None):
+        """
+        저장된 벡터 저장소를 엽니다. 검색 전용이면 mmap/읽기 전용으로 엽니다.
+        ann_params의 인덱스 타입으로 만든 ANN 인덱스가 있으면 Flat 인덱스 대신 ANN 인덱스로 검색합니다.
+        """
+        index = None
+        if read_only and ann_params is not None and ann_params.index_type != "flat":
+            meta = read_ann_meta(path)
+            if meta is not None and meta["params"]["index_type"] == ann_params.index_type:
+                index = read_index(os.path.join(path, ANN_INDEX_FILE), mmap=mmap)
+                configure_search(index, ann_params)
+            else:
+                print(
+                    f"'{ann_params.index_type}' ANN 인덱스가 없어 Flat 인덱스로 검색합니다. "
+                    "(벡터 수가 RAG_ANN_MIN_VECTORS 미만이거나 ingest를 다시 실행해야 합니다)"
+                )
+        if index is None:
+            index = read_index(os.path.join(path, INDEX_FILE), mmap=mmap and read_only)
+        docstore = SQLiteDocstore(os.path.join(path, DOCSTORE_FILE), read_only=read_only)
+        return cls(path, index, docstore)
+
+    @classmethod
+    def open_for_write(cls, path):
+        """쓰기용으로 저장소를 엽니다. 저장소가 없으면 빈 저장소를 만듭니다."""
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, INDEX_FILE)
+        index = faiss.read_index(index_path) if cls.exists(path) else None
+        docstore = SQLiteDocstore(os.path.join(path, DOCSTORE_FILE))
+        store = cls(path, index, docstore)
+        store.reconcile()
+        return store
+
+    @property
+    def generation(self):
+        """save()가 커밋될 때마다 1씩 늘어나는 저장 세대 번호. (한 번도 저장하지 않았으면 0)"""
+        return int(self.docstore.get_meta("index_generation") or 0)
+
+    def reconcile(self):
+        """
+        문서 저장소와 인덱스 파일 사이의 불일치를 복구합니다.
+
+        save()는 문서 저장소를 먼저 커밋한 뒤 인덱스 파일을 교체하므로, 그 사이에 프로세스가 중단되면
+        문서 저장소만 앞서 있을 수 있습니다. 이 상태로 이어서 ingest하면 파일은 색인된 것으로 기록되어 있는데
+        벡터는 없어 영영 다시 임베딩되지 않으므로, 쓰기용으로 열 때 청크 ID를 비교해 바로잡습니다.
+            - 인덱스에만 있는 벡터(삭제가 커밋된 청크): 인덱스에서 제거합니다.
+            - 벡터가 없는 청크: 청크를 삭제하고 원본 파일의 해시를 지워 다음 ingest에서 다시 임베딩합니다.
+
+        Returns:
+            bool: 불일치를 발견해 복구했는지 여부.
+        """
+        index_ids = set(faiss.vector_to_array(self.index.id_map).tolist()) if self.index is not None else set()
+        chunk_ids = self.docstore.ids()
+        orphan_ids = sorted(index_ids - chunk_ids)
+        missing_ids = sorted(chunk_ids - index_ids)
+        if not orphan_ids and not missing_ids:
+            return False
+
+        print(
+            f"저장소 '{self.path}'의 인덱스와 문서 저장소가 일치하지 않아 복구합니다. "
+            f"(고아 벡터 {len(orphan_ids)}개 제거, 벡터 없는 청크 {len(missing_ids)}개 재색인 예정)"
+        )
+        if orphan_ids:
+            self.index.remove_ids(np.asarray(orphan_ids, dtype=np.int64))
+        if missing_ids:
+            self.docstore.clear_file_hashes(self.docstore.sources_of(missing_ids))
+            self.docstore.delete(missing_ids)
+        self.save()
+        return True
+
+    @property
+    def ntotal(self):
+        return self.index.ntotal if self.index is not None else 0
+
+    def add(self, documents, vectors):
+        """청크와 임베딩 벡터를 추가하고, 부여된 청크 ID 목록을 반환합니다."""
+        if not documents:
+            return []
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+
+        start = self.docstore.max_id() + 1
+        ids = np.arange(start, start + len(documents), dtype=np.int64)
+        self.index.add_with_ids(vectors, ids)
+        self.docstore.add(ids, documents)
+        return ids.tolist()
+
+    def remove(self, ids):
+        """청크 ID에 해당하는 벡터와 문서를 삭제합니다."""
+        if not ids or self.index is None:
+            return
+        self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        self.docstore.delete(ids)
+
+    def search_ids(self, vector, k=4):
+        """쿼리 벡터와 가장 가까운 청크 k개를 (청크 ID, 거리) 목록으로 반환합니다."""
+        if self.ntotal == 0:
+            return []
+        query = np.asarray([vector], dtype=np.float32)
+        distances, ids = self.index.search(query, k)
+        return [(int(chunk_id), float(distance)) for chunk_id, distance in zip(ids[0], distances[0]) if chunk_id != -1]
+
+    def lexical_search(self, query, k=20):
+        """BM25로 질문과 어휘적으로 일치하는 청크를 (청크 ID, 점수) 목록으로 반환합니다."""
+        return self.docstore.lexical_search(query, k)
+
+    def get_documents(self, ids):
+        """청크 ID 순서대로 Document 목록을 반환합니다. (삭제된 청크는 건너뜀)"""
+        documents = self.docstore.get(ids)
+        return [documents[chunk_id] for chunk_id in ids if chunk_id in documents]
+
+    def search(self, vector, k=4):
+        """쿼리 벡터와 가장 가까운 청크 k개를 (Document, 거리) 목록으로 반환합니다."""
+        hits = self.search_ids(vector, k)
+        documents = self.docstore.get([chunk_id for chunk_id, _ in hits])
+        # 인덱스 교체 중에 삭제된 청크는 건너뜁니다.
+        return [(documents[chunk_id], distance) for chunk_id, distance in hits if chunk_id in documents]
+
+    def save(self):
+        """
+        문서 저장소를 커밋하고 인덱스를 파일로 저장합니다.
+
+        세대 번호와 함께 문서 저장소를 먼저 커밋한 뒤 인덱스를 임시 파일에 써서 교체합니다. (write_index)
+        두 쓰기 사이에 중단되면 다음 open_for_write의 reconcile()이 불일치를 복구합니다.
+        """
+        self.docstore.set_meta("index_generation", self.generation + 1)
+        self.docstore.commit()
+        if self.index is not None:
+            write_index(self.index, os.path.join(self.path, INDEX_FILE))
+
+    def build_ann(self, params):
+        """
+        현재 Flat 인덱스로 검색용 ANN 인덱스를 다시 만들어 저장합니다.
+        Flat 타입이거나 벡터 수가 적으면 기존 ANN 인덱스를 삭제하고 Flat 인덱스로 검색하게 합니다.
+
+        Returns:
+            bool: ANN 인덱스를 저장했는지 여부.
+        """
+        ann_index = build_ann_index(self.index, params)
+        if ann_index is None:
+            remove_ann_index(self.path)
+            return False
+        write_index(ann_index, os.path.join(self.path, ANN_INDEX_FILE))
+        write_ann_meta(self.path, params, self.ntotal)
+        return True
+
+    def close(self):
+        self.docstore.close()
@@ -0,0 +1,225 @@
+# server/tools/calendar_store.py
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from googleapiclient.errors import HttpError
+
+# 종일 일정('date'만 있는 일정)은 이 시간대의 자정 기준으로 저장합니다.
+KST = timezone(timedelta(hours=9))
+
+# 동기화 시 필요한 필드만 요청하여 응답 크기를 줄입니다.
+EVENT_FIELDS = "items(id,status,summary,location,start,end),nextPageToken,nextSyncToken"
+
+def event_time(value):
+    """Calendar 이벤트의 start/end 값을 (UTC ISO 문자열, 종일 여부)로 변환합니다."""
+    if "dateTime" in value:
+        moment = datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+        return moment.astimezone(timezone.utc).isoformat(), False
+    day = datetime.fromisoformat(value["date"]).replace(tzinfo=KST)
+    return day.astimezone(timezone.utc).isoformat(), True
+
+def list_events(service, start, end):
+    """
+    로컬 저장소 없이 Calendar API로 [start, end) 기간의 일정을 직접 조회합니다. (반복 일정은 개별 일정으로 펼침)
+    CALENDAR_LOCAL_STORE_ENABLED가 꺼져 있을 때 사용하며, CalendarStore.query와 같은 형식의 목록을 반환합니다.
+    """
+    events, page_token = [], None
+    while True:
+        result = service.events().list(
+            calendarId='primary', singleEvents=True, orderBy='startTime', maxResults=2500,
+            timeMin=start.isoformat(), timeMax=end.isoformat(), pageToken=page_token, fields=EVENT_FIELDS,
+        ).execute()
+        events.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+    return [
+        {
+            "summary": event.get("summary", "(제목 없음)"),
+            "location": event.get("location"),
+            "start": event["start"].get("dateTime", event["start"].get("date")),
+            "all_day": "dateTime" not in event["start"],
+        }
+        for event in events
+        if event.get("status") != "cancelled"
+    ]
+
+class CalendarStore:
+    """
+    사용자별 Calendar 일정과 syncToken을 저장하는 로컬 SQLite 저장소입니다.
+    일정은 UTC 시작/종료 시각으로 색인하여 임의의 기간을 API 호출 없이 조회합니다.
+
+    Args:
+        path (str): SQLite 파일 경로.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " user TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " summary TEXT,"
+            " location TEXT,"
+            " start_utc TEXT NOT NULL,"
+            " end_utc TEXT NOT NULL,"
+            " all_day INTEGER NOT NULL,"
+            " start_local TEXT NOT NULL,"
+            " PRIMARY KEY (user, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_start ON events (user, start_utc)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " user TEXT PRIMARY KEY,"
+            " sync_token TEXT,"
+            " synced_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_sync_state(self, user):
+        """(syncToken, 마지막 동기화 시각)을 반환합니다. 동기화한 적이 없으면 (None, 0)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token, synced_at FROM sync_state WHERE user = ?", (user,)
+            ).fetchone()
+        return row if row is not None else (None, 0.0)
+
+    def apply(self, user, events, sync_token, replace=False):
+        """
+        동기화 결과를 하나의 트랜잭션으로 반영합니다.
+        취소된(cancelled) 일정은 삭제하고, 나머지는 추가/갱신합니다.
+
+        Args:
+            replace (bool): True이면 사용자의 기존 일정을 모두 지우고 반영합니다. (전체 동기화)
+        """
+        upserts, deletes = [], []
+        for event in events:
+            if event.get("status") == "cancelled":
+                deletes.append((user, event["id"]))
+                continue
+            start_utc, all_day = event_time(event["start"])
+            end_utc, _ = event_time(event["end"])
+            start_local = event["start"].get("dateTime", event["start"].get("date"))
+            upserts.append((
+                user, event["id"], event.get("summary", "(제목 없음)"), event.get("location"),
+                start_utc, end_utc, int(all_day), start_local,
+            ))
+
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM events WHERE user = ?", (user,))
+            self._conn.executemany("DELETE FROM events WHERE user = ? AND id = ?", deletes)
+            self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (user, sync_token, synced_at) VALUES (?, ?, ?)",
+                (user, sync_token, time.time()),
+            )
+
+    def query(self, user, start, end):
+        """
+        [start, end) 기간과 겹치는 일정을 시작 시각 순으로 반환합니다.
+
+        Args:
+            start (datetime), end (datetime): 시간대 정보가 있는 조회 기간.
+
+        Returns:
+            list[dict]: summary, location, start(로컬 시각 문자열), all_day를 가진 일정 목록.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT summary, location, start_local, all_day FROM events"
+                " WHERE user = ? AND start_utc < ? AND end_utc > ? ORDER BY start_utc",
+                (user, end.astimezone(timezone.utc).isoformat(), start.astimezone(timezone.utc).isoformat()),
+            ).fetchall()
+        return [
+            {"summary": summary, "location": location, "start": start_local, "all_day": bool(all_day)}
+            for summary, location, start_local, all_day in rows
+        ]
+
+class CalendarSync:
+    """
+    primary 캘린더를 CalendarStore로 동기화합니다.
+
+    처음에는 전체 일정을 내려받고(full sync), 이후에는 syncToken으로 변경분만 가져옵니다.
+    syncToken이 만료되면(410 Gone) 저장된 일정을 지우고 전체 동기화를 다시 수행합니다.
+    마지막 동기화 후 interval초 이내의 조회는 API를 호출하지 않고 로컬 저장소만 사용합니다.
+
+    Args:
+        store (CalendarStore): 로컬 일정 저장소.
+        get_service (Callable[[], Resource]): Calendar v3 서비스 클라이언트를 반환하는 함수.
+        interval (float): 동기화 최소 간격(초).
+    """
+
+    def __init__(self, store, get_service, interval=60):
+        self.store = store
+        self._get_service = get_service
+        self.interval = interval
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._stats = {"local_reads": 0, "full_syncs": 0, "incremental_syncs": 0}
+
+    def ensure_fresh(self, user):
+        """동기화 간격이 지났으면 변경분을 동기화합니다. 실패해도 이전에 동기화한 일정이 있으면 그대로 사용합니다."""
+        _, synced_at = self.store.get_sync_state(user)
+        if time.time() - synced_at < self.interval:
+            self._stats["local_reads"] += 1
+            return
+        try:
+            self.sync(user)
+        except Exception as e:
+            if synced_at == 0:
+                raise
+            print(f"Calendar sync failed, serving local events: {e}")
+
+    def sync(self, user):
+        with self._user_lock(user):
+            sync_token, _ = self.store.get_sync_state(user)
+            service = self._get_service()
+            if sync_token is None:
+                self._full_sync(user, service)
+                return
+            try:
+                self._incremental_sync(user, service, sync_token)
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                print("Calendar syncToken expired, running full sync")
+                self._full_sync(user, service)
+
+    def stats(self):
+        return dict(self._stats)
+
+    def _full_sync(self, user, service):
+        events, sync_token = self._list_all(service)
+        self.store.apply(user, events, sync_token, replace=True)
+        self._stats["full_syncs"] += 1
+
+    def _incremental_sync(self, user, service, sync_token):
+        events, next_token = self._list_all(service, sync_token)
+        self.store.apply(user, events, next_token)
+        self._stats["incremental_syncs"] += 1
+
+    @staticmethod
+    def _list_all(service, sync_token=None):
+        """모든 페이지의 일정과 다음 syncToken을 반환합니다. (반복 일정은 개별 일정으로 펼침)"""
+        events, page_token = [], None
+        while True:
+            result = service.events().list(
+                calendarId='primary', singleEvents=True, maxResults=2500,
+                syncToken=sync_token, pageToken=page_token, fields=EVENT_FIELDS,
+            ).execute()
+            events.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return events, result.get('nextSyncToken')
+
+    def _user_lock(self, user):
+        with self._locks_guard:
+            return self._locks.setdefault(user, threading.Lock())
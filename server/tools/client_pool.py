@@ -0,0 +1,133 @@
+# server/tools/client_pool.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import httplib2
+import google_auth_httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+def credential_identity(creds):
+    """
+    Credentials 객체를 식별하는 짧은 해시를 반환합니다.
+    토큰 자체가 로그나 키에 노출되지 않도록 client_id와 refresh_token의 해시를 사용합니다.
+    """
+    raw = f"{getattr(creds, 'client_id', '')}:{getattr(creds, 'refresh_token', '') or getattr(creds, 'token', '')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+class GoogleServicePool:
+    """
+    Google API 서비스 클라이언트(discovery.build 결과)와 Credentials를 프로세스 단위로 캐싱하는 풀입니다.
+
+    - discovery 문서 파싱은 (서비스, 버전, 사용자) 조합당 한 번만 수행합니다.
+    - Credentials는 최초 한 번만 로드하고, 만료된 경우에만 갱신(refresh)합니다.
+    - googleapiclient의 httplib2 객체는 스레드 안전하지 않으므로, 요청마다 새 Http 객체를
+      만드는 requestBuilder를 사용하여 하나의 서비스 객체를 여러 스레드에서 공유할 수 있게 합니다.
+    - 오래 사용하지 않은 클라이언트는 idle_ttl이 지나거나 max_size를 넘으면 제거(LRU)됩니다.
+
+    Args:
+        credentials_loader (Callable[[list], Credentials]): 서비스 이름 목록을 받아
+            Credentials를 반환하는 함수. 캐시 미스일 때만 호출됩니다.
+        on_refresh (Callable[[Credentials], None], optional): 토큰을 갱신한 뒤 호출되는 함수.
+            갱신된 토큰을 파일에 저장하는 용도로 사용합니다.
+        max_size (int): 보관할 최대 서비스 클라이언트 수.
+        idle_ttl (float): 마지막 사용 후 클라이언트를 보관할 시간(초).
+    """
+
+    def __init__(self, credentials_loader, on_refresh=None, max_size=32, idle_ttl=3600):
+        self._credentials_loader = credentials_loader
+        self._on_refresh = on_refresh
+        self._max_size = max_size
+        self._idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._credentials = {}
+        # 서비스 조합 -> Credentials 로드/갱신을 직렬화하는 잠금
+        self._key_locks = {}
+        self._services = OrderedDict()
+
+    def get_credentials(self, service_names):
+        """
+        캐시된 Credentials를 반환하고, 만료된 경우 갱신합니다.
+        로드(브라우저 인증이 필요할 수 있음)와 갱신은 조합별 잠금 안에서 수행하므로,
+        한 조합의 인증을 기다리는 동안에도 다른 조합과 캐시된 서비스 조회는 막히지 않습니다.
+        """
+        key = tuple(sorted(service_names))
+        with self._lock:
+            creds = self._credentials.get(key)
+            if creds is not None and not self._needs_refresh(creds):
+                return creds
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 잠금을 기다리는 동안 다른 스레드가 이미 로드하거나 갱신했을 수 있습니다.
+            with self._lock:
+                creds = self._credentials.get(key)
+            if creds is None:
+                creds = self._credentials_loader(list(service_names))
+                with self._lock:
+                    self._credentials[key] = creds
+            elif self._needs_refresh(creds):
+                # 만료된 토큰은 사용하는 시점에만 갱신합니다.
+                creds.refresh(Request())
+                if self._on_refresh is not None:
+                    self._on_refresh(creds)
+            return creds
+
+    def get_service(self, service_name, version, service_names=None):
+        """
+        (서비스, 버전, 사용자) 조합에 해당하는 서비스 클라이언트를 반환합니다.
+        캐시에 없으면 새로 생성하여 등록합니다.
+        """
+        creds = self.get_credentials(service_names or [service_name])
+        key = (service_name, version, credential_identity(creds))
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._services.get(key)
+            if entry is not None:
+                self._services.move_to_end(key)
+                entry["last_used"] = now
+                return entry["service"]
+
+        # discovery 문서 파싱은 느리므로 잠금 밖에서 수행합니다.
+        service = self._build_service(service_name, version, creds)
+
+        with self._lock:
+            entry = self._services.setdefault(key, {"service": service, "last_used": now})
+            self._services.move_to_end(key)
+            while len(self._services) > self._max_size:
+                self._services.popitem(last=False)
+            return entry["service"]
+
+    def invalidate(self):
+        """캐시된 모든 Credentials와 서비스 클라이언트를 제거합니다. (예: 재인증 후)"""
+        with self._lock:
+            self._credentials.clear()
+            self._services.clear()
+
+    @staticmethod
+    def _needs_refresh(creds):
+        return not creds.valid and creds.expired and creds.refresh_token
+
+    def _evict_expired(self, now):
+        expired = [key for key, entry in self._services.items() if now - entry["last_used"] > self._idle_ttl]
+        for key in expired:
+            del self._services[key]
+
+    @staticmethod
+    def _build_service(service_name, version, creds):
+        def build_request(http, *args, **kwargs):
+            # 요청마다 독립된 Http 객체를 사용하여 스레드 간 공유 문제를 피합니다.
+            new_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            return HttpRequest(new_http, *args, **kwargs)
+
+        authorized_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        return build(
+            service_name, version,
+            http=authorized_http,
+            requestBuilder=build_request,
+            cache_discovery=False,
+        )
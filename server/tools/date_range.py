@@ -0,0 +1,120 @@
+# server/tools/date_range.py
+import re
+from datetime import date, timedelta
+
+WEEKDAY_NAMES = "월화수목금토일"
+RELATIVE_DAYS = {"어제": -1, "오늘": 0, "내일": 1, "모레": 2}
+
+class InvalidDateError(ValueError):
+    """질문의 날짜 표현이 존재하지 않는 날짜(예: 13월 40일, 2024-02-30)일 때 발생합니다."""
+
+def _month_range(year, month):
+    start = date(year, month, 1)
+    end = date(year + (month // 12), month % 12 + 1, 1)
+    return start, end
+
+def _week_range(day):
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=7)
+
+def resolve_date_range(text, today):
+    """
+    사용자 질문에서 조회할 날짜 범위를 찾습니다. 날짜 표현이 없으면 오늘로 봅니다.
+
+    Returns:
+        tuple[date, date, str]: (시작일, 종료일(미포함), 범위 설명)
+    """
+    return find_date_range(text, today) or (today, today + timedelta(days=1), "오늘")
+
+def find_date_range(text, today):
+    """
+    사용자 질문에서 날짜 범위 표현을 찾습니다.
+
+    지원하는 표현: 오늘/내일/모레/어제, 이번 주/다음 주/지난 주, 이번 달/다음 달/지난 달,
+    앞으로 N일, YYYY-MM-DD(또는 YYYY.MM.DD, YYYY/MM/DD), M/D, N월 M일, N월.
+    "오늘이랑 내일"처럼 상대 날짜가 여럿이면 모두 포함하는 범위를 반환합니다.
+
+    Returns:
+        tuple[date, date, str] | None: (시작일, 종료일(미포함), 범위 설명). 날짜 표현이 없으면 None.
+
+    Raises:
+        InvalidDateError: 존재하지 않는 날짜를 지정한 경우.
+    """
+    text = text or ""
+    compact = text.replace(" ", "")
+
+    match = re.search(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})", text)
+    if match:
+        day = _make_date(int(match.group(1)), int(match.group(2)), int(match.group(3)), match.group(0))
+        return day, day + timedelta(days=1), day.isoformat()
+
+    match = re.search(r"(?<![\d./-])(\d{1,2})/(\d{1,2})(?![\d/])", text)
+    if match:
+        day = _make_date(today.year, int(match.group(1)), int(match.group(2)), match.group(0))
+        return day, day + timedelta(days=1), day.isoformat()
+
+    match = re.search(r"(\d{1,2})월(\d{1,2})일", compact)
+    if match:
+        day = _make_date(today.year, int(match.group(1)), int(match.group(2)), f"{match.group(1)}월 {match.group(2)}일")
+        return day, day + timedelta(days=1), day.isoformat()
+
+    match = re.search(r"앞으로(\d{1,3})일", compact)
+    if match:
+        # '앞으로 0일'도 최소 오늘 하루는 조회합니다.
+        days = max(1, int(match.group(1)))
+        return today, today + timedelta(days=days), f"앞으로 {days}일"
+
+    # '내일모레'는 모레를 뜻하므로 내일과 모레를 함께 말한 것으로 보지 않습니다.
+    keywords = [keyword for keyword in RELATIVE_DAYS if keyword in compact.replace("내일모레", "모레")]
+    if keywords:
+        first, last = keywords[0], keywords[-1]
+        label = first if first == last else f"{first}~{last}"
+        return today + timedelta(days=RELATIVE_DAYS[first]), today + timedelta(days=RELATIVE_DAYS[last] + 1), label
+
+    weeks = {"이번주": 0, "금주": 0, "다음주": 1, "차주": 1, "지난주": -1, "저번주": -1}
+    for keyword, offset in weeks.items():
+        if keyword in compact:
+            start, end = _week_range(today + timedelta(weeks=offset))
+            return start, end, f"{keyword[:-1]} 주"
+
+    months = {"이번달": 0, "다음달": 1, "지난달": -1, "저번달": -1}
+    for keyword, offset in months.items():
+        if keyword in compact:
+            month_index = today.year * 12 + today.month - 1 + offset
+            start, end = _month_range(month_index // 12, month_index % 12 + 1)
+            return start, end, f"{keyword[:-1]} 달"
+
+    match = re.search(r"(\d{1,2})월", compact)
+    if match and 1 <= int(match.group(1)) <= 12:
+        start, end = _month_range(today.year, int(match.group(1)))
+        return start, end, f"{start.month}월"
+
+    return None
+
+def _make_date(year, month, day, text):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        raise InvalidDateError(f"잘못된 날짜입니다: {text}") from None
+
+def format_day(day):
+    """날짜를 '10/17 (금)' 형식으로 표시합니다."""
+    return f"{day.month}/{day.day} ({WEEKDAY_NAMES[day.weekday()]})"
+
+# 날짜 범위 표현을 이루는 단어. 날짜 범위를 해석한 뒤 검색어에서 제외할 때 사용합니다.
+DATE_WORDS = {"오늘", "내일", "모레", "어제", "이번", "다음", "지난", "저번", "금주", "차주", "주", "달", "앞으로"}
+DATE_TERM_PATTERN = re.compile(r"^(\d+(월|일|주)|\d{4}[-./]\d{1,2}[-./]\d{1,2}|\d{1,2}/\d{1,2})$")
+
+# 질문 안의 날짜 범위 표현 자체(문자열)를 찾는 패턴. find_date_range가 지원하는 표현과 같습니다.
+DATE_PHRASE_PATTERN = re.compile(
+    r"\d{4}[-./]\d{1,2}[-./]\d{1,2}|(?<![\d./-])\d{1,2}/\d{1,2}(?![\d/])|\d{1,2}월(?:\s*\d{1,2}일)?|앞으로\s*\d{1,3}일"
+    r"|(?:이번|다음|지난|저번)\s*(?:주|달)|금주|차주|내일모레|어제|오늘|내일|모레"
+)
+
+def find_date_phrases(text):
+    """질문에 나온 날짜 범위 표현을 나온 순서대로 반환합니다. 예: '10/17 일정이랑 메일' -> ['10/17']"""
+    return [match.group(0) for match in DATE_PHRASE_PATTERN.finditer(text or "")]
+
+def strip_date_terms(terms):
+    """검색어 목록에서 날짜 표현(오늘, 이번 주, 10월, 20일 등)을 제외합니다."""
+    return [term for term in terms if term not in DATE_WORDS and not DATE_TERM_PATTERN.match(term)]
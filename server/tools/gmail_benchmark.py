@@ -0,0 +1,104 @@
+# server/tools/gmail_benchmark.py
+import argparse
+import time
+from server.core.config import settings
+from server.tools.google_services import GMAIL_METADATA_HEADERS, fetch_gmail_metadata
+
+class FakeGmailService:
+    """
+    Gmail v1 서비스 클라이언트 중 messages().get과 batch 요청만 흉내 내는 로컬 가짜 서버입니다.
+
+    HTTP 왕복 하나마다 rtt_ms, 메시지 하나를 처리할 때마다 item_ms(format='full'이면 full_ms)를 기다립니다.
+    batch 요청은 왕복 한 번에 여러 메시지를 처리하므로, N+1 순차 조회와의 차이를 왕복 수로 확인할 수 있습니다.
+    """
+
+    def __init__(self, rtt_ms=50, item_ms=1, full_ms=5):
+        self.rtt_ms = rtt_ms
+        self.item_ms = item_ms
+        self.full_ms = full_ms
+        self.round_trips = 0
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, format='full', metadataHeaders=None):
+        return FakeRequest(self, id, format, metadataHeaders or [])
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def round_trip(self, requests):
+        self.round_trips += 1
+        time.sleep((self.rtt_ms + sum(self.full_ms if r.format == 'full' else self.item_ms for r in requests)) / 1000)
+
+class FakeRequest:
+    def __init__(self, service, message_id, format, headers):
+        self.service = service
+        self.message_id = message_id
+        self.format = format
+        self.headers = headers
+
+    def response(self):
+        names = self.headers or ['Subject', 'From', 'To', 'Date']
+        values = {'Subject': f"회의 자료 {self.message_id}", 'From': "team@example.com", 'To': "me@example.com",
+                  'Date': "Fri, 17 Oct 2025 10:00:00 +0900"}
+        message = {'id': self.message_id, 'snippet': "다음 주 회의 자료를 공유드립니다.",
+                   'payload': {'headers': [{'name': name, 'value': values[name]} for name in names]}}
+        if self.format == 'full':
+            message['payload']['body'] = {'data': "x" * 4000}
+        return message
+
+    def execute(self):
+        self.service.round_trip([self])
+        return self.response()
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.round_trip([request for _, request in self.requests])
+        for request_id, request in self.requests:
+            self.callback(request_id, request.response(), None)
+
+def sequential_fetch(service, message_ids):
+    """기존 방식: 메일마다 messages().get(format='full')을 순차 호출합니다. (N+1 왕복)"""
+    return [service.users().messages().get(userId='me', id=message_id).execute() for message_id in message_ids]
+
+def batched_fetch(service, message_ids):
+    """현재 방식: fetch_gmail_metadata로 GMAIL_BATCH_SIZE개씩 묶어 metadata만 조회합니다."""
+    return fetch_gmail_metadata(service, message_ids, GMAIL_METADATA_HEADERS)
+
+def main(sizes, rtt_ms, item_ms, full_ms):
+    """메일 수(N)가 늘어날 때 순차 조회와 batch 조회의 지연 시간과 HTTP 왕복 수를 비교합니다."""
+    print(f"rtt={rtt_ms}ms, metadata={item_ms}ms/msg, full={full_ms}ms/msg, batch size={settings.GMAIL_BATCH_SIZE}")
+    print(f"{'N':>5} {'sequential_ms':>14} {'trips':>6} {'batched_ms':>11} {'trips':>6} {'speedup':>8}")
+    for size in sizes:
+        message_ids = [f"m{i:05d}" for i in range(size)]
+        row = []
+        for fetch in (sequential_fetch, batched_fetch):
+            service = FakeGmailService(rtt_ms, item_ms, full_ms)
+            started = time.perf_counter()
+            messages = fetch(service, message_ids)
+            assert len(messages) == size
+            row.append(((time.perf_counter() - started) * 1000, service.round_trips))
+        (sequential_ms, sequential_trips), (batched_ms, batched_trips) = row
+        print(f"{size:>5} {sequential_ms:>14.0f} {sequential_trips:>6} {batched_ms:>11.0f} {batched_trips:>6} "
+              f"{sequential_ms / batched_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 Gmail 서버로 메일 메타데이터 순차 조회와 batch 조회의 지연 시간을 비교합니다.")
+    parser.add_argument("--sizes", default="1,5,10,25,50,100", help="조회할 메일 수 (쉼표 구분)")
+    parser.add_argument("--rtt-ms", type=float, default=50, help="HTTP 왕복 지연 시간(ms)")
+    parser.add_argument("--item-ms", type=float, default=1, help="metadata 형식 메시지 하나의 처리 시간(ms)")
+    parser.add_argument("--full-ms", type=float, default=5, help="full 형식 메시지 하나의 처리/전송 시간(ms)")
+    args = parser.parse_args()
+    main(sorted({int(value) for value in args.sizes.split(",")}), args.rtt_ms, args.item_ms, args.full_ms)
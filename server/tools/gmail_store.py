@@ -0,0 +1,289 @@
+# server/tools/gmail_store.py
+import os
+import sqlite3
+import threading
+import time
+from googleapiclient.errors import HttpError
+from server.rag.lexical import tokenize, fts_match_query
+
+# 로컬 색인에 저장할 메일 헤더
+GMAIL_INDEX_HEADERS = ['Subject', 'From', 'Date']
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+# 검색 결과에서 제외할 라벨. Gmail API 검색(messages.list, includeSpamTrash=False)과 같은 결과를 내기 위함입니다.
+# 메시지는 색인에 남겨 두므로, 휴지통/스팸에서 복원되면(labelsRemoved) 다시 검색됩니다.
+HIDDEN_LABELS = ['TRASH', 'SPAM']
+
+def get_header(message, name, default=""):
+    """메시지 리소스에서 지정한 헤더 값을 찾아 반환합니다."""
+    headers = message.get('payload', {}).get('headers', [])
+    return next((header['value'] for header in headers if header['name'] == name), default)
+
+class GmailStore:
+    """
+    사용자별 Gmail 메타데이터(제목, 보낸 사람, 스니펫, 수신 시각, 라벨)를 저장하는 로컬 SQLite 색인입니다.
+
+    제목/보낸 사람/스니펫은 한국어 토크나이저(lexical.tokenize)로 분리하여 FTS5에 색인하므로,
+    자주 쓰는 검색은 Gmail API 왕복 없이 BM25로 처리합니다.
+
+    Args:
+        path (str): SQLite 파일 경로.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " rowid INTEGER PRIMARY KEY,"
+            " user TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " subject TEXT,"
+            " sender TEXT,"
+            " snippet TEXT,"
+            " received_ms INTEGER NOT NULL,"
+            " labels TEXT,"
+            " UNIQUE (user, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_received ON messages (user, received_ms)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+            "tokens, labels, tokenize=\"unicode61 tokenchars '-_./@'\")"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " user TEXT PRIMARY KEY,"
+            " history_id TEXT,"
+            " synced_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_sync_state(self, user):
+        """(historyId, 마지막 동기화 시각)을 반환합니다. 백필 전이면 (None, 0)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history_id, synced_at FROM sync_state WHERE user = ?", (user,)
+            ).fetchone()
+        return row if row is not None else (None, 0.0)
+
+    def apply(self, user, messages, deleted_ids, history_id, replace=False):
+        """
+        메시지 메타데이터 추가/갱신과 삭제, historyId 갱신을 하나의 트랜잭션으로 반영합니다.
+
+        Args:
+            messages (list[dict]): format='metadata'로 조회한 메시지 리소스.
+            deleted_ids (Iterable[str]): 삭제된 메시지 ID.
+            replace (bool): True이면 사용자의 기존 색인을 모두 지우고 반영합니다. (백필)
+        """
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute(
+                    "DELETE FROM messages_fts WHERE rowid IN (SELECT rowid FROM messages WHERE user = ?)", (user,)
+                )
+                self._conn.execute("DELETE FROM messages WHERE user = ?", (user,))
+            for message_id in deleted_ids:
+                self._delete(user, message_id)
+            for message in messages:
+                self._upsert(user, message)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (user, history_id, synced_at) VALUES (?, ?, ?)",
+                (user, history_id, time.time()),
+            )
+
+    def search(self, user, terms=None, after_ms=None, before_ms=None, limit=50):
+        """
+        로컬 색인에서 메일을 검색합니다.
+        검색어가 있으면 BM25 순, 없으면 최신순으로 반환합니다. 휴지통/스팸(HIDDEN_LABELS)의 메일은 제외합니다.
+
+        Returns:
+            list[dict]: id, subject, sender, snippet, received_ms, labels를 가진 메일 목록.
+        """
+        match = fts_match_query(" ".join(terms)) if terms else None
+        conditions, params = ["m.user = ?"], [user]
+        for label in HIDDEN_LABELS:
+            conditions.append("(' ' || COALESCE(m.labels, '') || ' ') NOT LIKE ?")
+            params.append(f"% {label} %")
+        if after_ms is not None:
+            conditions.append("m.received_ms >= ?")
+            params.append(after_ms)
+        if before_ms is not None:
+            conditions.append("m.received_ms < ?")
+            params.append(before_ms)
+
+        columns = "m.id, m.subject, m.sender, m.snippet, m.received_ms, m.labels"
+        if match:
+            sql = (
+                f"SELECT {columns} FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid"
+                f" WHERE messages_fts MATCH ? AND {' AND '.join(conditions)}"
+                " ORDER BY bm25(messages_fts), m.received_ms DESC LIMIT ?"
+            )
+            params = [match] + params
+        else:
+            sql = f"SELECT {columns} FROM messages m WHERE {' AND '.join(conditions)} ORDER BY m.received_ms DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [
+            {"id": message_id, "subject": subject, "sender": sender, "snippet": snippet,
+             "received_ms": received_ms, "labels": labels.split() if labels else []}
+            for message_id, subject, sender, snippet, received_ms, labels in rows
+        ]
+
+    def count(self, user):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages WHERE user = ?", (user,)).fetchone()[0]
+
+    def _delete(self, user, message_id):
+        row = self._conn.execute("SELECT rowid FROM messages WHERE user = ? AND id = ?", (user, message_id)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM messages_fts WHERE rowid = ?", row)
+            self._conn.execute("DELETE FROM messages WHERE rowid = ?", row)
+
+    def _upsert(self, user, message):
+        subject = get_header(message, 'Subject', '제목 없음')
+        sender = get_header(message, 'From', '발신자 불명')
+        snippet = message.get('snippet', '')
+        labels = " ".join(message.get('labelIds', []))
+        self._delete(user, message['id'])
+        cursor = self._conn.execute(
+            "INSERT INTO messages (user, id, subject, sender, snippet, received_ms, labels) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user, message['id'], subject, sender, snippet, int(message.get('internalDate', 0)), labels),
+        )
+        self._conn.execute(
+            "INSERT INTO messages_fts (rowid, tokens, labels) VALUES (?, ?, ?)",
+            (cursor.lastrowid, " ".join(tokenize(f"{subject} {sender} {snippet}")), labels.lower()),
+        )
+
+class GmailSync:
+    """
+    Gmail 메일함을 GmailStore로 동기화합니다.
+
+    처음에는 최근 backfill_limit개의 메일 메타데이터를 batch 요청으로 내려받고(백필),
+    이후에는 users.history.list로 마지막 historyId 이후의 변경분(추가/삭제/라벨 변경)만 반영합니다.
+    historyId가 너무 오래되어 기록이 없으면(404) 다시 백필합니다.
+
+    백필은 시간이 걸리므로 백그라운드 스레드에서 실행하며, 완료 전에는 ready가 아니라고 응답하여
+    호출 측이 Gmail API 검색으로 대체하도록 합니다.
+
+    Args:
+        store (GmailStore): 로컬 메타데이터 색인.
+        get_service (Callable[[], Resource]): Gmail v1 서비스 클라이언트를 반환하는 함수.
+        fetch_metadata (Callable[[Resource, list, list], list]): 메시지 ID 목록의 메타데이터를 일괄 조회하는 함수.
+        interval (float): 증분 동기화 최소 간격(초).
+        backfill_limit (int): 백필할 최근 메일 수.
+    """
+
+    def __init__(self, store, get_service, fetch_metadata, interval=60, backfill_limit=2000):
+        self.store = store
+        self._get_service = get_service
+        self._fetch_metadata = fetch_metadata
+        self.interval = interval
+        self.backfill_limit = backfill_limit
+        self._locks = {}
+        self._backfilling = set()
+        self._guard = threading.Lock()
+        self._stats = {"local_reads": 0, "backfills": 0, "incremental_syncs": 0}
+
+    def ensure_fresh(self, user):
+        """
+        로컬 색인을 사용할 수 있게 준비합니다.
+
+        Returns:
+            bool: 로컬 색인으로 검색할 수 있으면 True. 백필 중이면 False.
+        """
+        history_id, synced_at = self.store.get_sync_state(user)
+        if history_id is None:
+            self._start_backfill(user)
+            return False
+        if time.time() - synced_at >= self.interval:
+            try:
+                self.sync(user)
+            except Exception as e:
+                print(f"Gmail history sync failed, serving local index: {e}")
+        self._stats["local_reads"] += 1
+        return True
+
+    def sync(self, user):
+        """마지막 historyId 이후의 변경분을 반영합니다."""
+        with self._user_lock(user):
+            history_id, _ = self.store.get_sync_state(user)
+            if history_id is None:
+                return
+            service = self._get_service()
+            try:
+                added, deleted, latest_id = self._list_history(service, history_id)
+            except HttpError as error:
+                if error.resp.status != 404:
+                    raise
+                print("Gmail historyId expired, running backfill")
+                self._backfill(user, service)
+                return
+            messages = self._fetch_metadata(service, sorted(added - deleted), GMAIL_INDEX_HEADERS) if added else []
+            self.store.apply(user, messages, deleted, latest_id)
+            self._stats["incremental_syncs"] += 1
+
+    def backfill(self, user):
+        """최근 backfill_limit개의 메일로 색인을 새로 만듭니다."""
+        with self._user_lock(user):
+            self._backfill(user, self._get_service())
+
+    def stats(self):
+        return dict(self._stats)
+
+    def _start_backfill(self, user):
+        with self._guard:
+            if user in self._backfilling:
+                return
+            self._backfilling.add(user)
+
+        def run():
+            try:
+                self.backfill(user)
+            except Exception as e:
+                print(f"Gmail backfill failed: {e}")
+            finally:
+                with self._guard:
+                    self._backfilling.discard(user)
+
+        threading.Thread(target=run, name="gmail-backfill", daemon=True).start()
+
+    def _backfill(self, user, service):
+        # 목록 조회 전에 historyId를 먼저 받아 두어, 백필 도중의 변경도 다음 증분 동기화에서 반영합니다.
+        history_id = service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+        message_ids, page_token = [], None
+        while len(message_ids) < self.backfill_limit:
+            result = service.users().messages().list(
+                userId='me', maxResults=min(500, self.backfill_limit - len(message_ids)),
+                pageToken=page_token, fields='messages(id),nextPageToken'
+            ).execute()
+            message_ids.extend(message['id'] for message in result.get('messages', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        messages = self._fetch_metadata(service, message_ids, GMAIL_INDEX_HEADERS)
+        self.store.apply(user, messages, [], history_id, replace=True)
+        self._stats["backfills"] += 1
+        print(f"Gmail backfill complete: {len(messages)} messages indexed")
+
+    @staticmethod
+    def _list_history(service, history_id):
+        """historyId 이후 추가/라벨 변경된 메시지 ID와 삭제된 메시지 ID, 최신 historyId를 반환합니다."""
+        added, deleted, page_token, latest_id = set(), set(), None, history_id
+        while True:
+            result = service.users().history().list(
+                userId='me', startHistoryId=history_id, historyTypes=HISTORY_TYPES, pageToken=page_token
+            ).execute()
+            for record in result.get('history', []):
+                for key in ('messagesAdded', 'labelsAdded', 'labelsRemoved'):
+                    added.update(item['message']['id'] for item in record.get(key, []))
+                deleted.update(item['message']['id'] for item in record.get('messagesDeleted', []))
+            latest_id = result.get('historyId', latest_id)
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return added, deleted, latest_id
+
+    def _user_lock(self, user):
+        with self._guard:
+            return self._locks.setdefault(user, threading.Lock())
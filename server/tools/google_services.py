@@ -1,14 +1,23 @@
 # server/tools/google_services.py
 import os
-from langchain.tools import tool
+import asyncio
+import threading
+from typing import Optional
+from langchain.tools import StructuredTool
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from server.core.config import settings
+from server.rag.lexical import query_terms
+from server.tools.calendar_store import KST, CalendarStore, CalendarSync, list_events
+from server.tools.client_pool import GoogleServicePool, credential_identity
+from server.tools.date_range import InvalidDateError, resolve_date_range, find_date_range, format_day, strip_date_terms
+from server.tools.gmail_store import GmailStore, GmailSync, get_header
+from server.tools.tool_cache import ToolResultCache
 import base64
 import email
+import re
 
 # --- Google API 연동 설정 ---
 # 필요한 권한 범위(SCOPES)를 정의합니다.
@@ -44,91 +53,308 @@ def get_credentials(service_names):
             )
             creds = flow.run_local_server(port=0)
         
-        with open(token_path, 'w') as token:
-            token.write(creds.to_json())
+        save_credentials(creds)
     return creds
 
+def save_credentials(creds):
+    """Credentials를 토큰 파일에 저장합니다."""
+    with open(settings.TOKEN_PATH, 'w') as token:
+        token.write(creds.to_json())
+
+# --- 서비스 클라이언트 풀 ---
+# 도구 호출마다 토큰 파일을 읽고 discovery 문서를 파싱하지 않도록,
+# Credentials와 서비스 클라이언트를 프로세스 전역에서 재사용합니다.
+service_pool = GoogleServicePool(
+    credentials_loader=get_credentials,
+    on_refresh=save_credentials,
+    max_size=settings.GOOGLE_SERVICE_POOL_SIZE,
+    idle_ttl=settings.GOOGLE_SERVICE_IDLE_TTL,
+)
+
+def get_service(service_name, version):
+    """풀에서 Google API 서비스 클라이언트를 가져옵니다."""
+    return service_pool.get_service(service_name, version, [service_name])
+
+# --- 도구 결과 캐시 ---
+# Gmail API로 검색하는 경우(검색 연산자가 있거나 로컬 색인이 준비되기 전) 같은 질문이 반복되면
+# API를 다시 호출하지 않고 캐시된 결과를 반환합니다.
+# 유효 시간이 지나면 이전 결과를 먼저 반환하고 백그라운드에서 갱신합니다. (stale-while-revalidate)
+tool_cache = ToolResultCache(
+    ttl=settings.TOOL_CACHE_TTL,
+    stale_ttl=settings.TOOL_CACHE_STALE_TTL,
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+) if settings.TOOL_CACHE_ENABLED else None
+
+def get_tool_cache_stats():
+    """도구 결과 캐시 통계를 반환합니다. 캐시를 사용하지 않으면 None을 반환합니다."""
+    return tool_cache.stats() if tool_cache is not None else None
+
+def current_user(service_name):
+    """현재 인증된 사용자를 식별하는 해시를 반환합니다. (캐시 키에 사용)"""
+    return credential_identity(service_pool.get_credentials([service_name]))
+
+def today_bucket():
+    """캐시 시간 구간으로 사용할 오늘 날짜(KST)를 반환합니다."""
+    from datetime import datetime, timezone, timedelta
+    return datetime.now(timezone(timedelta(hours=9))).date().isoformat()
+
+def gmail_history_id():
+    """
+    사용자 메일함의 현재 historyId를 반환합니다.
+    메일이 추가/삭제/변경되면 값이 바뀌므로, 검색을 다시 하지 않고도 변경 여부를 확인할 수 있습니다.
+    (도구 결과 캐시의 백그라운드 갱신에서만 호출됩니다.)
+    """
+    service = get_service('gmail', 'v1')
+    return service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+
+# --- Calendar 로컬 일정 저장소 ---
+# 일정은 syncToken 증분 동기화로 로컬 SQLite에 유지하고, 조회는 로컬 저장소에서 처리합니다.
+# 저장소는 모듈을 import할 때가 아니라 일정을 처음 조회할 때 엽니다.
+_calendar_sync = None
+_calendar_sync_lock = threading.Lock()
+
+def get_calendar_sync():
+    """
+    프로세스 전역에서 공유하는 CalendarSync를 반환합니다. 처음 호출될 때 로컬 저장소를 엽니다.
+    CALENDAR_LOCAL_STORE_ENABLED가 꺼져 있으면 None을 반환하며, 일정은 Calendar API로 직접 조회합니다.
+    """
+    global _calendar_sync
+    if not settings.CALENDAR_LOCAL_STORE_ENABLED:
+        return None
+    if _calendar_sync is None:
+        with _calendar_sync_lock:
+            if _calendar_sync is None:
+                _calendar_sync = CalendarSync(
+                    CalendarStore(settings.CALENDAR_STORE_PATH),
+                    get_service=lambda: get_service('calendar', 'v3'),
+                    interval=settings.CALENDAR_SYNC_INTERVAL,
+                )
+    return _calendar_sync
+
+def get_calendar_sync_stats():
+    """Calendar 로컬 조회/동기화 횟수를 반환합니다. 로컬 저장소를 아직 열지 않았거나 사용하지 않으면 None을 반환합니다."""
+    return _calendar_sync.stats() if _calendar_sync is not None else None
+
+# --- Gmail 메타데이터 일괄 조회 ---
+# 제목/보낸 사람만 필요하므로 전체 본문 대신 메타데이터 헤더만 요청합니다.
+GMAIL_METADATA_HEADERS = ['Subject', 'From']
+
+def fetch_gmail_metadata(service, message_ids, metadata_headers=GMAIL_METADATA_HEADERS):
+    """
+    여러 메일의 메타데이터를 Gmail batch HTTP 요청으로 한 번에 가져옵니다.
+    메일마다 messages().get을 순차 호출하는 대신 GMAIL_BATCH_SIZE개씩 묶어
+    한 번의 HTTP 왕복으로 처리합니다.
+
+    Returns:
+        list[dict]: message_ids와 같은 순서의 메시지 리소스 목록. (조회 실패한 메일은 제외)
+    """
+    results = {}
+    failed_ids = []
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            failed_ids.append(request_id)
+        else:
+            results[request_id] = response
+
+    for start in range(0, len(message_ids), settings.GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for message_id in message_ids[start:start + settings.GMAIL_BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(
+                    userId='me', id=message_id,
+                    format='metadata', metadataHeaders=metadata_headers
+                ),
+                request_id=message_id,
+            )
+        batch.execute()
+
+    # batch 내부에서 개별 요청이 실패한 경우(예: 일시적인 rate limit) 개별 요청으로 한 번 더 시도합니다.
+    for message_id in failed_ids:
+        try:
+            results[message_id] = service.users().messages().get(
+                userId='me', id=message_id,
+                format='metadata', metadataHeaders=metadata_headers
+            ).execute()
+        except HttpError as error:
+            print(f"Gmail message {message_id} metadata fetch failed: {error}")
+
+    return [results[message_id] for message_id in message_ids if message_id in results]
+
+# --- Gmail 메타데이터 로컬 색인 ---
+# 처음 한 번 최근 메일을 백필한 뒤 history.list 증분 동기화로 유지하고,
+# 일반 검색은 API 왕복 없이 로컬 FTS5 색인에서 처리합니다.
+gmail_sync = GmailSync(
+    GmailStore(settings.GMAIL_STORE_PATH),
+    get_service=lambda: get_service('gmail', 'v1'),
+    fetch_metadata=fetch_gmail_metadata,
+    interval=settings.GMAIL_SYNC_INTERVAL,
+    backfill_limit=settings.GMAIL_BACKFILL_LIMIT,
+) if settings.GMAIL_LOCAL_INDEX_ENABLED else None
+
+def get_gmail_sync_stats():
+    """Gmail 로컬 색인 조회/동기화 횟수를 반환합니다. 로컬 색인을 사용하지 않으면 None을 반환합니다."""
+    return gmail_sync.stats() if gmail_sync is not None else None
+
+# 'from:', 'label:', 'is:unread' 같은 Gmail 검색 연산자가 있으면 API 검색으로 처리합니다.
+GMAIL_OPERATOR_PATTERN = re.compile(r"(^|\s)-?[a-z_]+:\S", re.IGNORECASE)
+# 검색 대상이 아니라 '메일을 찾아 달라'는 요청을 나타내는 단어
+GMAIL_QUERY_STOPWORDS = {"메일", "이메일", "gmail", "지메일", "편지함", "받은", "온", "온거", "최근", "최신", "관련", "내용", "요약", "새", "새로", "같이", "함께"}
+
 # --- LangChain Tool 정의 ---
 
-@tool
-def search_gmail(query: str) -> str:
+def _search_gmail(query: str, max_results: Optional[int] = None) -> str:
     """
-    "주어진 쿼리로 Gmail을 검색하여 최근 5개 메일의 제목과 보낸 사람 목록을 반환합니다.
-    예: 'AI 관련 최신 뉴스'
+    "주어진 쿼리로 Gmail을 검색하여 메일의 제목과 보낸 사람 목록을 반환합니다.
+    일반 검색어와 기간(오늘, 이번 주 등)은 로컬 색인에서 최대 100개까지 찾고,
+    Gmail 검색 연산자(from:, label: 등)가 있으면 Gmail API로 최근 메일(기본 5개)을 검색합니다.
+    예: 'AI 관련 최신 뉴스', '이번 주 받은 회의 메일'
     """
     try:
-        creds = get_credentials(['gmail'])
-        service = build('gmail', 'v1', credentials=creds)
-        
-        # '오늘' 키워드가 포함된 경우, 날짜 검색 쿼리로 변환
-        if '오늘' in query:
-            from datetime import date, timedelta
-            today = date.today()
-            yesterday = today - timedelta(days=1)
-            query = f'after:{yesterday.strftime("%Y/%m/%d")} before:{today.strftime("%Y/%m/%d")}'
-
-        results = service.users().messages().list(userId='me', q=query, maxResults=5).execute()
-        messages = results.get('messages', [])
-
-        if not messages:
-            return "해당 쿼리에 대한 메일을 찾을 수 없습니다."
-
-        email_list = []
-        for msg in messages:
-            msg_data = service.users().messages().get(userId='me', id=msg['id']).execute()
-            headers = msg_data['payload']['headers']
-            subject = next(header['value'] for header in headers if header['name'] == 'Subject')
-            sender = next(header['value'] for header in headers if header['name'] == 'From')
-            email_list.append(f"제목: {subject}\n보낸 사람: {sender}\n---")
-        
-        return "\n".join(email_list)
+        if gmail_sync is not None and not GMAIL_OPERATOR_PATTERN.search(query):
+            user = current_user('gmail')
+            if gmail_sync.ensure_fresh(user):
+                return _search_local_gmail(user, query, max_results or settings.GMAIL_LOCAL_MAX_RESULTS)
+        max_results = max_results or settings.GMAIL_MAX_RESULTS
+        if tool_cache is None:
+            return _fetch_gmail(query, max_results)
+        user = current_user('gmail')
+        key = (user, 'search_gmail', (" ".join(query.lower().split()), max_results), today_bucket())
+        return tool_cache.get(key, lambda: _fetch_gmail(query, max_results), version=gmail_history_id)
     except HttpError as error:
         return f"Gmail API 호출 중 오류 발생: {error}"
+    except InvalidDateError as error:
+        return str(error)
     except Exception as e:
         return f"알 수 없는 오류 발생: {e}"
 
-@tool
-def get_today_calendar_events(query: str = "") -> str:
+def _search_local_gmail(user, query, max_results):
+    """로컬 메타데이터 색인에서 질문의 기간과 검색어에 맞는 메일을 찾습니다."""
+    from datetime import datetime, time
+
+    now = datetime.now(KST)
+    after_ms = before_ms = None
+    label = None
+    date_range = find_date_range(query, now.date())
+    if date_range is not None:
+        start_day, end_day, label = date_range
+        after_ms = int(datetime.combine(start_day, time.min, tzinfo=KST).timestamp() * 1000)
+        before_ms = int(datetime.combine(end_day, time.min, tzinfo=KST).timestamp() * 1000)
+
+    terms = [term for term in strip_date_terms(query_terms(query)) if term not in GMAIL_QUERY_STOPWORDS]
+    messages = gmail_sync.store.search(user, terms, after_ms, before_ms, limit=max_results)
+    if not messages:
+        return "해당 쿼리에 대한 메일을 찾을 수 없습니다."
+
+    email_list = [f"{label} 받은 메일 {len(messages)}개입니다:" if label else f"메일 {len(messages)}개를 찾았습니다:"]
+    for message in messages:
+        received = datetime.fromtimestamp(message['received_ms'] / 1000, KST)
+        snippet = message['snippet'][:120]
+        email_list.append(
+            f"제목: {message['subject']}\n보낸 사람: {message['sender']}\n"
+            f"받은 시각: {format_day(received.date())} {received.strftime('%H:%M')}\n내용: {snippet}\n---"
+        )
+    return "\n".join(email_list)
+
+def _fetch_gmail(query, max_results):
+    """Gmail을 검색하여 결과 문자열을 만듭니다. 오류는 캐싱되지 않도록 그대로 전파합니다."""
+    service = get_service('gmail', 'v1')
+
+    # '오늘' 키워드가 포함된 경우, 날짜 검색 쿼리로 변환
+    if '오늘' in query:
+        from datetime import date, timedelta
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        query = f'after:{yesterday.strftime("%Y/%m/%d")} before:{today.strftime("%Y/%m/%d")}'
+
+    results = service.users().messages().list(
+        userId='me', q=query, maxResults=max_results
+    ).execute()
+    messages = results.get('messages', [])
+
+    if not messages:
+        return "해당 쿼리에 대한 메일을 찾을 수 없습니다."
+
+    email_list = []
+    for msg_data in fetch_gmail_metadata(service, [msg['id'] for msg in messages]):
+        subject = get_header(msg_data, 'Subject', '제목 없음')
+        sender = get_header(msg_data, 'From', '발신자 불명')
+        email_list.append(f"제목: {subject}\n보낸 사람: {sender}\n---")
+
+    return "\n".join(email_list)
+
+def _get_calendar_events(query: str = "") -> str:
     """
-    "오늘의 Google Calendar 일정을 모두 가져와 요약해서 반환합니다."
+    "Google Calendar 일정을 기간별로 가져와 요약해서 반환합니다.
+    질문에 포함된 기간(오늘, 내일, 이번 주, 다음 달, 10월 20일 등)을 해석하며, 기간이 없으면 오늘 일정을 반환합니다.
     """
-    # 이 함수는 인자가 필요 없습니다.
-    # 실제 구현에서는 날짜를 인자로 받을 수 있도록 확장할 수 있습니다.
-    from datetime import datetime, time, timezone, timedelta
-
     try:
-        creds = get_credentials(['calendar'])
-        service = build('calendar', 'v3', credentials=creds)
-
-        # 'Z'는 UTC를 의미합니다. 한국 시간(KST)에 맞게 조정합니다.
-        KST = timezone(timedelta(hours=9))
-        now = datetime.now(KST)
-        time_min = datetime.combine(now.date(), time.min, tzinfo=KST).isoformat()
-        time_max = datetime.combine(now.date(), time.max, tzinfo=KST).isoformat()
-
-        events_result = service.events().list(
-            calendarId='primary', timeMin=time_min, timeMax=time_max,
-            singleEvents=True, orderBy='startTime'
-        ).execute()
-        events = events_result.get('items', [])
-
-        if not events:
-            return "오늘 예정된 일정이 없습니다."
-
-        event_list = ["오늘의 일정입니다:"]
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            # 시간 포맷팅
-            start_dt = datetime.fromisoformat(start)
-            start_str = start_dt.strftime('%H:%M') if 'dateTime' in event['start'] else '하루 종일'
-            event_list.append(f"- {start_str}: {event['summary']}")
-        
-        return "\n".join(event_list)
+        return _fetch_calendar_events(query)
     except HttpError as error:
         return f"Calendar API 호출 중 오류 발생: {error}"
+    except InvalidDateError as error:
+        return str(error)
     except Exception as e:
         return f"알 수 없는 오류 발생: {e}"
 
+def _fetch_calendar_events(query):
+    """
+    로컬 일정 저장소를 필요할 때만 동기화한 뒤, 질문의 기간에 해당하는 일정을 조회합니다.
+    로컬 저장소를 사용하지 않으면 Calendar API로 그 기간의 일정을 직접 조회합니다.
+    """
+    from datetime import datetime, time
+
+    # 기간은 한국 시간(KST) 기준으로 해석합니다.
+    now = datetime.now(KST)
+    start_day, end_day, label = resolve_date_range(query, now.date())
+
+    start = datetime.combine(start_day, time.min, tzinfo=KST)
+    end = datetime.combine(end_day, time.min, tzinfo=KST)
+    calendar_sync = get_calendar_sync()
+    if calendar_sync is None:
+        events = list_events(get_service('calendar', 'v3'), start, end)
+    else:
+        user = current_user('calendar')
+        calendar_sync.ensure_fresh(user)
+        events = calendar_sync.store.query(user, start, end)
+
+    if not events:
+        return f"{label} 예정된 일정이 없습니다."
+
+    single_day = (end_day - start_day).days == 1
+    event_list = [f"{label}의 일정입니다:"]
+    for event in events:
+        start_dt = datetime.fromisoformat(event['start'])
+        # 시간 포맷팅
+        start_str = '하루 종일' if event['all_day'] else start_dt.strftime('%H:%M')
+        if not single_day:
+            start_str = f"{format_day(start_dt.date())} {start_str}"
+        location = f" ({event['location']})" if event['location'] else ""
+        event_list.append(f"- {start_str}: {event['summary']}{location}")
+
+    return "\n".join(event_list)
+
+# --- 비동기(async) 버전 ---
+# Google API 클라이언트(googleapiclient)는 동기 HTTP만 지원하므로,
+# 스레드 풀에서 실행하여 이벤트 루프가 블로킹되지 않도록 합니다.
+async def _asearch_gmail(query: str, max_results: Optional[int] = None) -> str:
+    return await asyncio.to_thread(_search_gmail, query, max_results)
+
+async def _aget_calendar_events(query: str = "") -> str:
+    return await asyncio.to_thread(_get_calendar_events, query)
+
+# 동기(invoke)와 비동기(ainvoke) 호출을 모두 지원하는 도구로 등록합니다.
+search_gmail = StructuredTool.from_function(
+    func=_search_gmail,
+    coroutine=_asearch_gmail,
+    name="search_gmail",
+)
+get_calendar_events = StructuredTool.from_function(
+    func=_get_calendar_events,
+    coroutine=_aget_calendar_events,
+    name="get_calendar_events",
+)
+
 
 def get_google_services_tools(services: list):
     """요청된 서비스에 따라 관련된 도구 리스트를 반환합니다."""
@@ -136,5 +362,5 @@ def get_google_services_tools(services: list):
     if 'gmail' in services:
         tools.append(search_gmail)
     if 'calendar' in services:
-        tools.append(get_today_calendar_events)
+        tools.append(get_calendar_events)
     return tools
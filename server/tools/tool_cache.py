@@ -0,0 +1,120 @@
+# server/tools/tool_cache.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class ToolResultCache:
+    """
+    Gmail API 검색 결과를 캐싱하고, stale-while-revalidate 방식으로 갱신합니다.
+    Calendar 조회와 일반 Gmail 검색은 로컬 저장소(CalendarStore, GmailStore)에서 처리하므로,
+    현재는 Gmail 검색 연산자(from:, label: 등)가 있는 검색과 Gmail 로컬 색인이 준비되기 전의 검색만 이 캐시를 거칩니다.
+
+    키는 호출 측에서 (사용자, 도구, 정규화된 인자, 시간 구간)으로 만듭니다.
+    시간 구간(예: 오늘 날짜)이 바뀌면 키가 달라지므로 '오늘' 기준 결과가 다음 날로 이어지지 않습니다.
+
+    - ttl 이내: 캐시된 결과를 그대로 반환합니다.
+    - ttl ~ stale_ttl: 캐시된 결과를 즉시 반환하고, 백그라운드에서 갱신합니다.
+      이때 version 함수(Gmail historyId 등 가벼운 변경 확인)의 값이
+      저장 당시와 같으면 API를 다시 조회하지 않고 유효 시간만 연장합니다.
+    - stale_ttl 이후 또는 캐시 없음: 동기로 조회합니다. 이때는 version을 확인하지 않으므로
+      캐시 미스가 API 호출을 하나 더 늘리지 않습니다. (버전은 첫 백그라운드 갱신에서 기록합니다.)
+
+    Args:
+        ttl (float): 결과를 그대로 사용할 시간(초).
+        stale_ttl (float): 백그라운드 갱신을 전제로 이전 결과를 반환할 최대 시간(초).
+        max_entries (int): 보관할 최대 결과 수. (LRU)
+        max_workers (int): 백그라운드 갱신 스레드 수.
+    """
+
+    def __init__(self, ttl=60, stale_ttl=600, max_entries=512, max_workers=4):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        # key -> [결과, 버전, 조회 시각]
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-cache")
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "revalidated": 0, "refreshed": 0}
+
+    def get(self, key, fetch, version=None):
+        """
+        캐시된 결과를 반환하거나 fetch()로 조회합니다.
+
+        Args:
+            key (tuple): 캐시 키.
+            fetch (Callable[[], Any]): 실제 API를 조회하는 함수. 예외가 발생하면 캐싱하지 않습니다.
+            version (Callable[[], Any] | None): 데이터 변경 여부를 가볍게 확인하는 함수. 백그라운드 갱신에서만 호출합니다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[2]
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                if age < self.stale_ttl:
+                    self._stats["stale_hits"] += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._revalidate, key, fetch, version)
+                    return entry[0]
+            self._stats["misses"] += 1
+
+        value = fetch()
+        self._store(key, value, None)
+        return value
+
+    def invalidate(self, predicate=None):
+        """predicate(key)가 참인 항목을 삭제합니다. None이면 전체 삭제."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate is None or predicate(key)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        total = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / total if total else 0.0
+        return stats
+
+    def _fetch(self, fetch, version):
+        # 조회 도중 바뀐 내용을 놓치지 않도록 버전을 먼저 확인한 뒤 조회합니다.
+        token = version() if version is not None else None
+        return fetch(), token
+
+    def _store(self, key, value, token):
+        with self._lock:
+            self._entries[key] = [value, token, time.monotonic()]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key, fetch, version):
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+                cached_token = entry[1] if entry is not None else None
+            if version is not None and cached_token is not None:
+                token = version()
+                if token == cached_token:
+                    # 변경이 없으면 다시 조회하지 않고 유효 시간만 연장합니다.
+                    with self._lock:
+                        if key in self._entries:
+                            self._entries[key][2] = time.monotonic()
+                        self._stats["revalidated"] += 1
+                    return
+            value, token = self._fetch(fetch, version)
+            self._store(key, value, token)
+            with self._lock:
+                self._stats["refreshed"] += 1
+        except Exception as e:
+            print(f"Tool cache background refresh failed for {key[:2]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
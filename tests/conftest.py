@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# 저장소 루트에서 'pytest'로 실행해도 server 패키지를 import할 수 있게 합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 모듈 import 시 만들어지는 로컬 저장소가 작업 디렉토리의 data/를 건드리지 않도록 임시 디렉토리를 사용합니다.
+_data_dir = tempfile.mkdtemp(prefix="ai-assist-tests-")
+os.environ.setdefault("GMAIL_STORE_PATH", os.path.join(_data_dir, "gmail.sqlite"))
+os.environ.setdefault("CALENDAR_STORE_PATH", os.path.join(_data_dir, "calendar.sqlite"))
+os.environ.setdefault("SESSION_STORE_PATH", os.path.join(_data_dir, "sessions.sqlite"))
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
@@ -0,0 +1,90 @@
+# tests/fake_gemini.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class FakeGeminiServer:
+    """
+    테스트용 로컬 Gemini REST 엔드포인트입니다. cachedContents의 생성(POST), TTL 연장(PATCH), 삭제(DELETE)를 흉내 냅니다.
+
+    받은 요청은 requests에 (메서드, 경로, 쿼리, 본문) 형태로 기록되며,
+    fail_status를 지정하면 모든 요청에 그 상태 코드로 응답합니다. (등록 실패 확인용)
+    with 문으로 사용하면 임의의 빈 포트에서 서버를 시작하고 끝나면 종료합니다.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.caches = {}
+        self.fail_status = None
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1beta"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def calls(self, method):
+        with self._lock:
+            return [request for request in self.requests if request[0] == method]
+
+    def wait_for(self, method, count=1, timeout=5):
+        """method 요청이 count개 이상 도착할 때까지 기다립니다. (백그라운드 등록/연장/삭제 확인용)"""
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: sum(1 for request in self.requests if request[0] == method) >= count, timeout
+            )
+        assert ready, f"{method} 요청 {count}개를 기다리다 시간이 초과되었습니다: {self.requests}"
+
+    def _record(self, method, path, query, body):
+        with self._condition:
+            self.requests.append((method, path, query, body))
+            self._condition.notify_all()
+            if self.fail_status is not None:
+                return self.fail_status, {"error": {"code": self.fail_status, "message": "fake failure"}}
+            if method == "POST" and path == "/v1beta/cachedContents":
+                name = f"cachedContents/fake-{len(self.caches) + 1}"
+                self.caches[name] = body
+                return 200, {"name": name, "model": body.get("model"), "ttl": body.get("ttl")}
+            name = path.removeprefix("/v1beta/")
+            if name not in self.caches:
+                return 404, {"error": {"code": 404, "message": f"{name} not found"}}
+            if method == "PATCH":
+                self.caches[name] = {**self.caches[name], **body}
+                return 200, {"name": name, "ttl": body.get("ttl")}
+            del self.caches[name]
+            return 200, {}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                status, payload = server._record(self.command, url.path, parse_qs(url.query), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_POST = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
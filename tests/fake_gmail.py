@@ -0,0 +1,166 @@
+# tests/fake_gmail.py
+from types import SimpleNamespace
+from googleapiclient.errors import HttpError
+
+class FakeGmail:
+    """
+    테스트용 가짜 Gmail v1 서비스입니다. 메일함 상태와 history 기록을 메모리에 유지합니다.
+
+    users().getProfile, messages().list/get, history().list, new_batch_http_request를 지원하며,
+    메일 추가/삭제/라벨 변경은 실제 Gmail처럼 history 레코드를 남기고 historyId를 올립니다.
+    expire_history()를 호출하면 이전 historyId로 history.list를 호출할 때 404를 반환합니다.
+
+    Args:
+        page_size (int): messages.list, history.list 한 페이지의 최대 항목 수. (페이지 처리 확인용)
+    """
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.messages = {}
+        self.history = []
+        self.history_id = 100
+        self.oldest_history_id = 100
+        self.calls = []
+
+    # --- 메일함 조작 ---
+    def add_message(self, message_id, subject, sender="team@example.com", snippet="", labels=("INBOX",),
+                    received_ms=None):
+        self.messages[message_id] = {
+            'id': message_id,
+            'snippet': snippet,
+            'labelIds': list(labels),
+            'internalDate': str(received_ms if received_ms is not None else 1_700_000_000_000 + len(self.messages)),
+            'payload': {'headers': [{'name': 'Subject', 'value': subject}, {'name': 'From', 'value': sender}]},
+        }
+        self._record('messagesAdded', message_id)
+
+    def delete_message(self, message_id):
+        del self.messages[message_id]
+        self._record('messagesDeleted', message_id)
+
+    def add_labels(self, message_id, *labels):
+        label_ids = self.messages[message_id]['labelIds']
+        label_ids.extend(label for label in labels if label not in label_ids)
+        self._record('labelsAdded', message_id)
+
+    def remove_labels(self, message_id, *labels):
+        self.messages[message_id]['labelIds'] = [
+            label for label in self.messages[message_id]['labelIds'] if label not in labels
+        ]
+        self._record('labelsRemoved', message_id)
+
+    def expire_history(self):
+        """지금까지의 history 기록을 버립니다. 이후 현재보다 이전의 historyId로 history.list를 호출하면 404가 됩니다."""
+        self.history = []
+        self.oldest_history_id = self.history_id
+
+    def _record(self, key, message_id):
+        self.history_id += 1
+        self.history.append({'id': str(self.history_id), key: [{'message': {'id': message_id}}]})
+
+    # --- Gmail v1 API ---
+    def users(self):
+        return FakeUsers(self)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def _messages_page(self, max_results, page_token):
+        # 최신 메일부터 반환합니다.
+        ordered = sorted(self.messages.values(), key=lambda message: int(message['internalDate']), reverse=True)
+        start = int(page_token or 0)
+        end = start + min(max_results, self.page_size)
+        result = {'messages': [{'id': message['id']} for message in ordered[start:end]]}
+        if end < len(ordered):
+            result['nextPageToken'] = str(end)
+        return result
+
+    def _history_page(self, start_history_id, page_token):
+        if start_history_id < self.oldest_history_id:
+            raise HttpError(SimpleNamespace(status=404, reason="Not Found"), b"")
+        records = [record for record in self.history if int(record['id']) > start_history_id]
+        start = int(page_token or 0)
+        end = start + self.page_size
+        result = {'history': records[start:end], 'historyId': str(self.history_id)}
+        if end < len(records):
+            result['nextPageToken'] = str(end)
+        return result
+
+    def _message(self, message_id):
+        if message_id not in self.messages:
+            raise HttpError(SimpleNamespace(status=404, reason="Not Found"), b"")
+        message = self.messages[message_id]
+        return {**message, 'labelIds': list(message['labelIds'])}
+
+class FakeUsers:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def getProfile(self, userId, fields=None):
+        return FakeRequest(self.gmail, 'getProfile', lambda: {'historyId': str(self.gmail.history_id)})
+
+    def messages(self):
+        return FakeMessages(self.gmail)
+
+    def history(self):
+        return FakeHistory(self.gmail)
+
+class FakeMessages:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def list(self, userId, maxResults=100, pageToken=None, fields=None, q=None):
+        return FakeRequest(self.gmail, 'messages.list', lambda: self.gmail._messages_page(maxResults, pageToken))
+
+    def get(self, userId, id, format='full', metadataHeaders=None):
+        return FakeRequest(self.gmail, 'messages.get', lambda: self.gmail._message(id))
+
+class FakeHistory:
+    def __init__(self, gmail):
+        self.gmail = gmail
+
+    def list(self, userId, startHistoryId, historyTypes=None, pageToken=None):
+        return FakeRequest(
+            self.gmail, 'history.list', lambda: self.gmail._history_page(int(startHistoryId), pageToken)
+        )
+
+class FakeRequest:
+    def __init__(self, gmail, name, handler):
+        self.gmail = gmail
+        self.name = name
+        self.handler = handler
+
+    def execute(self):
+        self.gmail.calls.append(self.name)
+        return self.handler()
+
+class FakeBatch:
+    def __init__(self, gmail, callback):
+        self.gmail = gmail
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.gmail.calls.append('batch')
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.handler(), None)
+            except HttpError as error:
+                self.callback(request_id, None, error)
+
+def fetch_metadata(service, message_ids, metadata_headers=None):
+    """fetch_gmail_metadata와 같은 방식으로 batch 요청 하나에 메타데이터를 조회합니다. (없는 메일은 제외)"""
+    results = {}
+
+    def on_response(request_id, response, exception):
+        if exception is None:
+            results[request_id] = response
+
+    batch = service.new_batch_http_request(callback=on_response)
+    for message_id in message_ids:
+        batch.add(service.users().messages().get(userId='me', id=message_id, format='metadata'), request_id=message_id)
+    batch.execute()
+    return [results[message_id] for message_id in message_ids if message_id in results]
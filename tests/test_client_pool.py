@@ -0,0 +1,85 @@
+# tests/test_client_pool.py
+import threading
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from server.tools import client_pool
+from server.tools.client_pool import GoogleServicePool
+
+class FakeCredentials:
+    def __init__(self, name, expired=False):
+        self.name = name
+        self.expired = expired
+        self.refresh_token = "refresh"
+        self.refreshed = 0
+
+    @property
+    def valid(self):
+        return not self.expired
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.expired = False
+
+def test_slow_login_does_not_block_other_service_sets():
+    # 한 조합의 인증(run_local_server)이 끝나지 않아도 다른 조합은 바로 로드되어야 합니다.
+    login_started = threading.Event()
+    finish_login = threading.Event()
+
+    def loader(service_names):
+        if service_names == ["gmail"]:
+            login_started.set()
+            assert finish_login.wait(5)
+        return FakeCredentials(service_names[0])
+
+    pool = GoogleServicePool(loader)
+    slow = threading.Thread(target=pool.get_credentials, args=(["gmail"],))
+    slow.start()
+    assert login_started.wait(5)
+
+    result = {}
+    fast = threading.Thread(target=lambda: result.setdefault("creds", pool.get_credentials(["calendar"])))
+    fast.start()
+    fast.join(2)
+    finish_login.set()
+    slow.join(5)
+    assert not fast.is_alive()
+    assert result["creds"].name == "calendar"
+
+def test_concurrent_requests_load_credentials_once():
+    calls = []
+    start = threading.Barrier(8)
+
+    def loader(service_names):
+        calls.append(service_names)
+        return FakeCredentials(service_names[0])
+
+    pool = GoogleServicePool(loader)
+    results = []
+
+    def get():
+        start.wait(5)
+        results.append(pool.get_credentials(["gmail", "calendar"]))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len({id(creds) for creds in results}) == 1
+
+def test_expired_credentials_are_refreshed_once(monkeypatch):
+    monkeypatch.setattr(client_pool, "Request", lambda: None)
+    creds = FakeCredentials("gmail")
+    refreshed = []
+    pool = GoogleServicePool(lambda service_names: creds, on_refresh=refreshed.append)
+
+    assert pool.get_credentials(["gmail"]) is creds
+    creds.expired = True
+    assert pool.get_credentials(["gmail"]) is creds
+    assert pool.get_credentials(["gmail"]) is creds
+    assert creds.refreshed == 1
+    assert refreshed == [creds]
@@ -0,0 +1,207 @@
+# tests/test_context_cache.py
+import time
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("langchain_core")
+
+from server.agents.context_cache import GeminiContextCache, create_context_cache, model_cache_min_tokens
+from tests.fake_gemini import FakeGeminiServer
+
+SYSTEM = "당신은 사내 문서를 바탕으로 답변하는 AI 비서입니다."
+CONTEXT_A = "회의록 " * 50
+CONTEXT_B = "배포 일정 " * 50
+
+def wait_until(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "조건을 기다리다 시간이 초과되었습니다"
+        time.sleep(0.01)
+
+@pytest.fixture
+def gemini():
+    with FakeGeminiServer() as server:
+        yield server
+
+def make_cache(gemini, **kwargs):
+    options = dict(api_key="test-key", model="gemini-2.0-flash-001", base_url=gemini.base_url,
+                   ttl=3600, min_tokens=10, min_uses=2)
+    options.update(kwargs)
+    return GeminiContextCache(**options)
+
+def create(cache, context=CONTEXT_A):
+    """min_uses번 조회하여 캐시를 등록하고 등록된 이름을 반환합니다."""
+    for _ in range(cache.min_uses):
+        cache.lookup(SYSTEM, context)
+    wait_until(lambda: cache.stats()["created"] >= 1 and not cache._entries[cache._key(SYSTEM, context)]["pending"])
+    return cache.lookup(SYSTEM, context)
+
+def test_registers_cache_after_min_uses(gemini):
+    cache = make_cache(gemini, min_uses=3)
+
+    assert cache.lookup(SYSTEM, CONTEXT_A) is None
+    assert cache.lookup(SYSTEM, CONTEXT_A) is None
+    assert gemini.calls("POST") == []
+
+    cache.lookup(SYSTEM, CONTEXT_A)
+    gemini.wait_for("POST")
+    wait_until(lambda: cache.stats()["created"] == 1)
+
+    assert cache.lookup(SYSTEM, CONTEXT_A) == "cachedContents/fake-1"
+    _, path, query, body = gemini.calls("POST")[0]
+    assert path == "/v1beta/cachedContents"
+    assert query["key"] == ["test-key"]
+    assert body["model"] == "models/gemini-2.0-flash-001"
+    assert body["ttl"] == "3600s"
+    assert body["systemInstruction"]["parts"][0]["text"] == SYSTEM
+    assert body["contents"][0]["parts"][0]["text"] == CONTEXT_A
+    assert cache.stats()["hits"] == 1
+
+def test_skips_prefixes_below_min_tokens(gemini):
+    cache = make_cache(gemini, min_tokens=100_000)
+
+    for _ in range(3):
+        assert cache.lookup(SYSTEM, CONTEXT_A) is None
+    time.sleep(0.1)
+
+    assert gemini.calls("POST") == []
+
+def test_refreshes_ttl_when_close_to_expiry(gemini):
+    # ttl=1이면 만료 0.5초 전부터(refresh_margin) 다시 사용될 때 TTL을 연장합니다.
+    cache = make_cache(gemini, ttl=1)
+    name = create(cache)
+    assert gemini.calls("PATCH") == []
+
+    time.sleep(0.6)
+    assert cache.lookup(SYSTEM, CONTEXT_A) == name
+    gemini.wait_for("PATCH")
+    wait_until(lambda: cache.stats()["refreshed"] == 1)
+
+    _, path, query, body = gemini.calls("PATCH")[0]
+    assert path == f"/v1beta/{name}"
+    assert query["updateMask"] == ["ttl"]
+    assert body == {"ttl": "1s"}
+    # 연장된 TTL로 계속 사용합니다.
+    time.sleep(0.6)
+    assert cache.lookup(SYSTEM, CONTEXT_A) == name
+
+def test_evicted_cache_is_deleted(gemini):
+    cache = make_cache(gemini, max_entries=1)
+    name = create(cache, CONTEXT_A)
+
+    cache.lookup(SYSTEM, CONTEXT_B)
+    gemini.wait_for("DELETE")
+
+    assert gemini.calls("DELETE")[0][1] == f"/v1beta/{name}"
+    assert name not in gemini.caches
+    assert cache.stats()["active"] == 0
+
+def test_registration_failure_backs_off(gemini):
+    cache = make_cache(gemini, retry_after=0.5)
+    gemini.fail_status = 500
+
+    cache.lookup(SYSTEM, CONTEXT_A)
+    cache.lookup(SYSTEM, CONTEXT_A)
+    gemini.wait_for("POST")
+    wait_until(lambda: cache.stats()["failures"] == 1)
+
+    # retry_after 동안은 등록을 다시 시도하지 않습니다.
+    gemini.fail_status = None
+    for _ in range(3):
+        assert cache.lookup(SYSTEM, CONTEXT_A) is None
+    time.sleep(0.1)
+    assert len(gemini.calls("POST")) == 1
+
+    time.sleep(0.5)
+    cache.lookup(SYSTEM, CONTEXT_A)
+    gemini.wait_for("POST", count=2)
+    wait_until(lambda: cache.stats()["created"] == 1)
+    assert cache.lookup(SYSTEM, CONTEXT_A) == "cachedContents/fake-1"
+
+def test_invalidate_stops_using_cache_and_backs_off(gemini):
+    cache = make_cache(gemini, retry_after=60)
+    name = create(cache)
+
+    cache.invalidate(name)
+
+    assert cache.lookup(SYSTEM, CONTEXT_A) is None
+    time.sleep(0.1)
+    assert len(gemini.calls("POST")) == 1
+    assert cache.stats()["fallbacks"] == 1
+
+def test_generate_rag_answer_falls_back_when_cached_generation_fails(gemini, monkeypatch):
+    pytest.importorskip("langgraph")
+    pytest.importorskip("langchain_google_genai")
+    from server.agents import master_agent
+
+    cache = make_cache(gemini, retry_after=60)
+    name = create(cache, CONTEXT_A)
+    used = []
+
+    class FailingCachedChain:
+        def invoke(self, inputs):
+            used.append("cached")
+            raise RuntimeError("cachedContent not found")
+
+    class RagChain:
+        def invoke(self, inputs):
+            used.append("full")
+            assert inputs["context"] == CONTEXT_A
+            return "문서를 함께 보낸 답변"
+
+    monkeypatch.setattr(master_agent, "_components", SimpleNamespace(context_cache=cache, rag_chain=RagChain()))
+    monkeypatch.setattr(master_agent, "get_cached_rag_chain", lambda cache_name: FailingCachedChain())
+    monkeypatch.setattr(master_agent, "RAG_SYSTEM_INSTRUCTION", SYSTEM)
+
+    answer = master_agent._generate_rag_answer("회의록 요약해줘", [], CONTEXT_A)
+
+    assert answer == "문서를 함께 보낸 답변"
+    assert used == ["cached", "full"]
+    assert cache.stats()["fallbacks"] == 1
+    # 실패한 캐시는 더 이상 사용하지 않고 바로 문서를 함께 보냅니다.
+    used.clear()
+    assert master_agent._generate_rag_answer("회의록 요약해줘", [], CONTEXT_A) == "문서를 함께 보낸 답변"
+    assert used == ["full"]
+    assert name in gemini.caches
+
+def test_model_cache_min_tokens_requires_versioned_models():
+    assert model_cache_min_tokens("gemini-2.0-flash-001") == (4096, None)
+    assert model_cache_min_tokens("models/gemini-2.5-flash") == (1024, None)
+    assert model_cache_min_tokens("gemini-1.5-flash-latest")[0] is None
+    assert model_cache_min_tokens("gemini-2.0-flash")[0] is None
+    assert model_cache_min_tokens("unknown-model")[0] is None
+
+def settings_for(model, **overrides):
+    values = dict(
+        GEMINI_CONTEXT_CACHE_ENABLED=True, GEMINI_MODEL_NAME=model, GEMINI_CONTEXT_CACHE_MIN_TOKENS=0,
+        GOOGLE_API_KEY="test-key", GEMINI_API_BASE_URL="http://127.0.0.1:9/v1beta",
+        GEMINI_CONTEXT_CACHE_TTL=3600, GEMINI_CONTEXT_CACHE_MIN_USES=2,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+def test_create_context_cache_uses_model_minimum(capsys):
+    cache = create_context_cache(settings_for("gemini-2.5-flash"), SYSTEM, max_context_chars=4000)
+
+    assert cache is not None
+    assert cache.min_tokens == 1024
+
+def test_create_context_cache_reports_why_it_is_disabled(capsys):
+    assert create_context_cache(settings_for("gemini-1.5-flash-latest"), SYSTEM, 4000) is None
+    assert "별칭 모델" in capsys.readouterr().out
+
+    assert create_context_cache(settings_for("gemini-2.0-flash-001"), SYSTEM, 1000) is None
+    assert "캐시 최소 크기(4096토큰)" in capsys.readouterr().out
+
+    assert create_context_cache(settings_for("gemini-2.5-flash", GEMINI_CONTEXT_CACHE_ENABLED=False), SYSTEM, 4000) is None
+
+def test_default_model_enables_context_cache():
+    pytest.importorskip("faiss")
+    from server.core.config import Settings
+    from server.rag.store import CHUNK_SIZE
+
+    defaults = Settings(_env_file=None, GOOGLE_API_KEY="test-key")
+    cache = create_context_cache(defaults, SYSTEM, max_context_chars=defaults.RAG_TOP_K * CHUNK_SIZE)
+
+    assert cache is not None
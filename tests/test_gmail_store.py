@@ -0,0 +1,119 @@
+# tests/test_gmail_store.py
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from server.tools.gmail_store import GmailStore, GmailSync
+from tests.fake_gmail import FakeGmail, fetch_metadata
+
+USER = "user@example.com"
+
+@pytest.fixture
+def gmail():
+    gmail = FakeGmail(page_size=2)
+    gmail.add_message("m1", "주간 회의 안건", received_ms=1_000)
+    gmail.add_message("m2", "배포 일정 공유", received_ms=2_000)
+    gmail.add_message("m3", "회의록 정리", received_ms=3_000)
+    return gmail
+
+@pytest.fixture
+def sync(gmail, tmp_path):
+    store = GmailStore(str(tmp_path / "gmail.sqlite"))
+    return GmailSync(store, get_service=lambda: gmail, fetch_metadata=fetch_metadata, interval=0, backfill_limit=10)
+
+def indexed_ids(sync, terms=None):
+    return sorted(message["id"] for message in sync.store.search(USER, terms))
+
+def test_backfill_indexes_recent_messages_and_history_id(gmail, sync):
+    sync.backfill(USER)
+
+    assert indexed_ids(sync) == ["m1", "m2", "m3"]
+    assert indexed_ids(sync, ["회의"]) == ["m1", "m3"]
+    assert sync.store.get_sync_state(USER)[0] == str(gmail.history_id)
+    # 목록은 페이지(page_size=2)를 따라가며 모으고, 메타데이터는 batch 한 번으로 조회합니다.
+    assert gmail.calls.count("messages.list") == 2
+    assert gmail.calls.count("batch") == 1
+
+def test_backfill_limit_keeps_newest_messages(gmail, tmp_path):
+    store = GmailStore(str(tmp_path / "gmail.sqlite"))
+    sync = GmailSync(store, get_service=lambda: gmail, fetch_metadata=fetch_metadata, backfill_limit=2)
+    sync.backfill(USER)
+
+    assert indexed_ids(sync) == ["m2", "m3"]
+
+def test_incremental_sync_applies_added_and_deleted_messages(gmail, sync):
+    sync.backfill(USER)
+    gmail.add_message("m4", "새 회의 초대", received_ms=4_000)
+    gmail.delete_message("m1")
+    # 동기화 사이에 추가되었다가 삭제된 메일은 조회하지 않습니다.
+    gmail.add_message("m5", "임시 메일", received_ms=5_000)
+    gmail.delete_message("m5")
+    gmail.calls.clear()
+
+    sync.sync(USER)
+
+    assert indexed_ids(sync) == ["m2", "m3", "m4"]
+    assert indexed_ids(sync, ["회의"]) == ["m3", "m4"]
+    assert sync.store.get_sync_state(USER)[0] == str(gmail.history_id)
+    assert "messages.list" not in gmail.calls
+    assert gmail.calls.count("history.list") == 2
+    assert sync.stats()["incremental_syncs"] == 1
+
+def test_incremental_sync_applies_label_changes(gmail, sync):
+    sync.backfill(USER)
+    gmail.add_labels("m1", "IMPORTANT")
+    gmail.remove_labels("m2", "INBOX")
+
+    sync.sync(USER)
+
+    labels = {message["id"]: message["labels"] for message in sync.store.search(USER)}
+    assert labels["m1"] == ["INBOX", "IMPORTANT"]
+    assert labels["m2"] == []
+
+def test_trash_and_spam_are_hidden_until_restored(gmail, sync):
+    sync.backfill(USER)
+    gmail.add_labels("m1", "TRASH")
+    gmail.add_labels("m3", "SPAM")
+    sync.sync(USER)
+
+    assert indexed_ids(sync) == ["m2"]
+    assert indexed_ids(sync, ["회의"]) == []
+    # 색인에는 남아 있으므로 휴지통에서 복원되면 다시 검색됩니다.
+    assert sync.store.count(USER) == 3
+
+    gmail.remove_labels("m1", "TRASH")
+    sync.sync(USER)
+
+    assert indexed_ids(sync, ["회의"]) == ["m1"]
+
+def test_expired_history_id_runs_backfill_again(gmail, sync):
+    sync.backfill(USER)
+    gmail.add_message("m4", "만료 후 메일", received_ms=4_000)
+    gmail.delete_message("m2")
+    gmail.expire_history()
+
+    sync.sync(USER)
+
+    assert indexed_ids(sync) == ["m1", "m3", "m4"]
+    assert sync.stats()["backfills"] == 2
+    assert sync.stats()["incremental_syncs"] == 0
+    assert sync.store.get_sync_state(USER)[0] == str(gmail.history_id)
+
+    # 새 historyId로는 다시 증분 동기화합니다.
+    gmail.add_message("m5", "다음 메일", received_ms=5_000)
+    sync.sync(USER)
+    assert indexed_ids(sync) == ["m1", "m3", "m4", "m5"]
+    assert sync.stats()["incremental_syncs"] == 1
+
+def test_ensure_fresh_serves_local_index_after_backfill(gmail, sync):
+    sync.backfill(USER)
+    gmail.add_message("m4", "회의 취소", received_ms=4_000)
+
+    assert sync.ensure_fresh(USER) is True
+    assert indexed_ids(sync, ["회의"]) == ["m1", "m3", "m4"]
+
+def test_users_are_isolated(gmail, sync):
+    sync.backfill(USER)
+
+    assert sync.store.search("other@example.com") == []
+    assert sync.store.get_sync_state("other@example.com") == (None, 0.0)
@@ -0,0 +1,116 @@
+# tests/test_google_services.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_oauthlib")
+
+from server.tools import google_services
+from server.tools.calendar_store import KST
+from server.tools.gmail_store import GmailStore, GmailSync
+from tests.fake_gmail import FakeGmail, fetch_metadata
+
+USER = "user@example.com"
+
+@pytest.fixture
+def gmail():
+    return FakeGmail()
+
+@pytest.fixture
+def local_gmail(gmail, tmp_path, monkeypatch):
+    """가짜 Gmail 서비스로 동기화하는 로컬 색인을 google_services.gmail_sync 대신 사용합니다."""
+    store = GmailStore(str(tmp_path / "gmail.sqlite"))
+    sync = GmailSync(store, get_service=lambda: gmail, fetch_metadata=fetch_metadata)
+    monkeypatch.setattr(google_services, "gmail_sync", sync)
+    return sync
+
+def ms(moment):
+    return int(moment.timestamp() * 1000)
+
+def test_search_local_gmail_excludes_trash_and_spam(gmail, local_gmail):
+    now = datetime.now(KST)
+    gmail.add_message("inbox", "분기 회의 안내", received_ms=ms(now))
+    gmail.add_message("trash", "취소된 회의 안내", labels=("TRASH",), received_ms=ms(now))
+    gmail.add_message("spam", "회의 초대 당첨", labels=("SPAM",), received_ms=ms(now))
+    local_gmail.backfill(USER)
+
+    result = google_services._search_local_gmail(USER, "회의 메일 찾아줘", 10)
+
+    assert "메일 1개를 찾았습니다" in result
+    assert "분기 회의 안내" in result
+    assert "취소된 회의 안내" not in result
+    assert "회의 초대 당첨" not in result
+
+def test_search_local_gmail_applies_date_range(gmail, local_gmail):
+    now = datetime.now(KST)
+    gmail.add_message("today", "오늘 보고서", received_ms=ms(now))
+    gmail.add_message("old", "지난 보고서", received_ms=ms(now - timedelta(days=3)))
+    local_gmail.backfill(USER)
+
+    result = google_services._search_local_gmail(USER, "오늘 받은 보고서 메일", 10)
+
+    assert "오늘 받은 메일 1개입니다" in result
+    assert "오늘 보고서" in result
+    assert "지난 보고서" not in result
+
+def test_search_local_gmail_reports_no_match(gmail, local_gmail):
+    gmail.add_message("trash", "휴지통 회의", labels=("TRASH",), received_ms=ms(datetime.now(KST)))
+    local_gmail.backfill(USER)
+
+    assert google_services._search_local_gmail(USER, "회의", 10) == "해당 쿼리에 대한 메일을 찾을 수 없습니다."
+
+class FakeCalendar:
+    """events().list만 흉내 내는 가짜 Calendar v3 서비스입니다. 받은 요청 인자를 requests에 기록합니다."""
+
+    def __init__(self, items, page_size=1):
+        self.items = items
+        self.page_size = page_size
+        self.requests = []
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        self.requests.append(kwargs)
+        start = int(kwargs.get('pageToken') or 0)
+        end = start + self.page_size
+        result = {'items': self.items[start:end]}
+        if end < len(self.items):
+            result['nextPageToken'] = str(end)
+        return SimpleNamespace(execute=lambda: result)
+
+def test_calendar_store_is_opened_on_first_use(tmp_path, monkeypatch):
+    path = tmp_path / "calendar.sqlite"
+    monkeypatch.setattr(google_services, "_calendar_sync", None)
+    monkeypatch.setattr(google_services.settings, "CALENDAR_STORE_PATH", str(path))
+
+    assert google_services.get_calendar_sync_stats() is None
+    assert not path.exists()
+    sync = google_services.get_calendar_sync()
+    assert path.exists()
+    assert google_services.get_calendar_sync() is sync
+
+def test_disabled_calendar_store_queries_the_api_directly(tmp_path, monkeypatch):
+    today = datetime.now(KST).date().isoformat()
+    calendar = FakeCalendar([
+        {'id': "standup", 'summary': "주간 회의", 'location': "3층", 'start': {'dateTime': f"{today}T10:00:00+09:00"},
+         'end': {'dateTime': f"{today}T11:00:00+09:00"}},
+        {'id': "holiday", 'summary': "창립기념일", 'start': {'date': today}, 'end': {'date': today}},
+    ])
+    path = tmp_path / "calendar.sqlite"
+    monkeypatch.setattr(google_services, "_calendar_sync", None)
+    monkeypatch.setattr(google_services.settings, "CALENDAR_LOCAL_STORE_ENABLED", False)
+    monkeypatch.setattr(google_services.settings, "CALENDAR_STORE_PATH", str(path))
+    monkeypatch.setattr(google_services, "get_service", lambda name, version: calendar)
+
+    result = google_services._fetch_calendar_events("오늘 일정 알려줘")
+
+    assert google_services.get_calendar_sync() is None
+    assert not path.exists()
+    assert "- 10:00: 주간 회의 (3층)" in result
+    assert "- 하루 종일: 창립기념일" in result
+    # 페이지를 모두 읽고, 질문의 기간만 요청합니다.
+    assert len(calendar.requests) == 2
+    assert calendar.requests[0]['timeMin'].startswith(today)
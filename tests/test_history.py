@@ -0,0 +1,71 @@
+# tests/test_history.py
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from server.agents.history import HistoryManager, estimate_tokens
+
+def conversation(turns, words=40):
+    messages = []
+    for index in range(turns):
+        messages.append(HumanMessage(content=f"질문 {index} " + "내용 " * words))
+        messages.append(AIMessage(content=f"답변 {index} " + "설명 " * words))
+    return messages
+
+def folding_summarizer(calls):
+    def summarize(summary, text):
+        calls.append(text)
+        return f"요약 {len(calls)}"
+    return summarize
+
+def test_cold_cache_folds_old_turns_in_bounded_chunks():
+    calls = []
+    manager = HistoryManager(summarize=folding_summarizer(calls), max_tokens=2000, summary_tokens=500)
+    messages = conversation(200)
+
+    manager.prepare(messages)
+    assert len(calls) > 1
+    assert all(estimate_tokens(text) <= manager.max_tokens - manager.summary_tokens for text in calls)
+    # 윈도우 밖의 모든 턴이 순서대로 한 번씩 요약에 들어갑니다.
+    joined = "\n".join(calls)
+    assert joined.startswith("사용자: 질문 0 ")
+    assert "사용자: 질문 193 " in joined and "질문 194 " not in joined
+    assert manager.stats()["summarized_turns"] == 194
+
+    # 다음 턴에는 캐시된 요약에 새로 밀려난 턴 하나만 접어 넣습니다.
+    calls.clear()
+    manager.prepare(messages + conversation(201)[-2:])
+    assert len(calls) == 1
+    assert calls[0].startswith("사용자: 질문 194 ")
+
+def test_oversized_turn_is_truncated_to_the_chunk_budget():
+    calls = []
+    manager = HistoryManager(summarize=folding_summarizer(calls), window_turns=1, max_tokens=1000, summary_tokens=200)
+    messages = conversation(1, words=2000) + conversation(1)
+
+    manager.prepare(messages)
+    assert len(calls) == 1
+    assert estimate_tokens(calls[0]) <= 800
+
+def test_failed_chunk_keeps_progress_from_earlier_chunks():
+    calls = []
+
+    async def asummarize(summary, text):
+        calls.append(text)
+        if len(calls) == 2:
+            raise RuntimeError("quota")
+        return f"요약 {len(calls)}"
+
+    manager = HistoryManager(asummarize=asummarize, max_tokens=2000, summary_tokens=500)
+    messages = conversation(100)
+    prepared = asyncio.run(manager.aprepare(messages))
+    assert prepared[0].content.endswith("요약 1")
+    assert manager.stats()["summary_failures"] == 1
+
+    # 다시 요청하면 첫 묶음은 캐시에서 이어받고 실패한 묶음부터 요약합니다.
+    failed_chunk = calls[1]
+    calls.clear()
+    asyncio.run(manager.aprepare(messages))
+    assert calls[0] == failed_chunk
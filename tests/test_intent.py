@@ -0,0 +1,26 @@
+# tests/test_intent.py
+import pytest
+from server.agents.intent import INTENT_EVAL_FILE, INTENT_TRAIN_FILE, IntentClassifier, load_intent_examples
+from server.core.config import settings
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier().fit(load_intent_examples(INTENT_TRAIN_FILE))
+
+def test_confident_predictions_on_eval_set_are_correct(classifier):
+    # 임계값 이상이면 LLM 라우터 없이 그대로 라우팅하므로, 이 구간에서는 오분류가 없어야 합니다.
+    wrong = []
+    for text, expected in load_intent_examples(INTENT_EVAL_FILE):
+        label, confidence = classifier.predict(text)
+        if confidence >= settings.INTENT_CONFIDENCE_THRESHOLD and label != expected:
+            wrong.append((text, label, round(confidence, 2)))
+    assert wrong == []
+
+@pytest.mark.parametrize("text", ["저녁 뭐 먹을까?", "오늘 너무 피곤하다", "내일 뭐 먹지", "주말에 뭐 할까", "오늘 기분 어때"])
+def test_chit_chat_with_time_words_is_not_routed_to_calendar(classifier, text):
+    label, confidence = classifier.predict(text)
+    assert label != "calendar_node" or confidence < settings.INTENT_CONFIDENCE_THRESHOLD
+
+@pytest.mark.parametrize("text", ["오늘 저녁 약속 있어?", "내일 오전 일정 알려줘", "주말에 잡힌 일정 있어?"])
+def test_schedule_questions_with_time_words_stay_on_calendar(classifier, text):
+    assert classifier.predict(text)[0] == "calendar_node"
@@ -0,0 +1,81 @@
+# tests/test_llm.py
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_google_genai")
+
+from langchain_core.runnables.config import run_in_executor
+from server.agents.llm import ConcurrencyLimiter
+
+def test_async_slot_is_reentrant_for_sync_fallback():
+    # 비동기 구현이 없는 모델처럼 aslot 안에서 동기 slot을 실행기에서 다시 잡아도 교착되지 않아야 합니다.
+    limiter = ConcurrencyLimiter(2)
+
+    def generate():
+        with limiter.slot():
+            return limiter.stats()["active"]
+
+    async def agenerate():
+        async with limiter.aslot():
+            return await run_in_executor(None, generate)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(agenerate() for _ in range(4))), timeout=5)
+
+    assert all(1 <= active <= 2 for active in asyncio.run(main()))
+    stats = limiter.stats()
+    assert stats["active"] == 0
+    assert stats["max_active"] == 2
+
+def test_sync_stream_fallback_holds_one_slot():
+    # BaseChatModel._astream 기본 구현처럼 제너레이터 생성과 next()를 각각 실행기에서 호출합니다.
+    limiter = ConcurrencyLimiter(1)
+
+    def stream():
+        with limiter.slot():
+            yield from range(3)
+
+    async def astream():
+        async with limiter.aslot():
+            iterator = await run_in_executor(None, stream)
+            done = object()
+            items = []
+            while (item := await run_in_executor(None, next, iterator, done)) is not done:
+                items.append(item)
+            return items
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(astream(), astream()), timeout=5)
+
+    assert asyncio.run(main()) == [[0, 1, 2], [0, 1, 2]]
+    assert limiter.stats()["active"] == 0
+
+def test_separate_threads_still_share_the_limit():
+    limiter = ConcurrencyLimiter(1)
+    inside = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with limiter.slot():
+            inside.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert inside.wait(5)
+
+    def wait():
+        with limiter.slot():
+            pass
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    release.set()
+    holder.join(5)
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert limiter.stats()["max_active"] == 1
@@ -0,0 +1,66 @@
+# tests/test_response_cache.py
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("faiss")
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from server.agents import master_agent
+from server.agents.response_cache import ResponseCache
+from server.rag.sharding import ShardedVectorStore
+from server.rag.store import VectorStore
+
+@pytest.fixture
+def rag(monkeypatch):
+    """응답 캐시만 켠 컴포넌트와, 호출마다 현재 인덱스 세대를 답변에 담는 가짜 RAG를 설치합니다."""
+    retriever = SimpleNamespace(index_generation="1")
+    answers = []
+
+    def rag_answer(state, current):
+        answers.append(current.index_generation)
+        return {"messages": [AIMessage(content=f"세대 {current.index_generation} 문서로 만든 답변")]}
+
+    monkeypatch.setattr(master_agent, "_components", SimpleNamespace(response_cache=ResponseCache(similarity_threshold=2)))
+    monkeypatch.setattr(master_agent, "get_rag_retriever", lambda: retriever)
+    monkeypatch.setattr(master_agent, "_rag_answer", rag_answer)
+    return retriever, answers
+
+def ask(question="휴가 규정 알려줘"):
+    state = {"messages": [HumanMessage(content=question)], "user_id": "user-1"}
+    return master_agent.rag_node(state)["messages"][-1].content
+
+def test_rag_answers_are_reused_within_one_index_generation(rag):
+    _, answers = rag
+    assert ask() == ask() == "세대 1 문서로 만든 답변"
+    assert answers == ["1"]
+
+def test_reingested_index_does_not_serve_answers_from_old_documents(rag):
+    retriever, answers = rag
+    ask()
+    # ingest로 인덱스가 다시 저장된 뒤 Retriever를 다시 로드한 상태입니다.
+    retriever.index_generation = "2"
+    assert ask() == "세대 2 문서로 만든 답변"
+    assert answers == ["1", "2"]
+
+def test_store_generation_changes_on_every_save(tmp_path):
+    store = VectorStore.open_for_write(str(tmp_path))
+    assert store.generation == 0
+    store.add([Document(page_content="휴가 규정", metadata={"source": "a.md"})], [[0.1, 0.2]])
+    store.save()
+    store.save()
+    store.close()
+    loaded = VectorStore.load(str(tmp_path))
+    assert loaded.generation == 2
+    loaded.close()
+
+def test_sharded_generation_changes_when_any_shard_is_saved():
+    shards = {name: SimpleNamespace(generation=1, close=lambda: None) for name in ("a", "b")}
+    store = ShardedVectorStore(shards, max_workers=1)
+    before = store.generation
+    shards["b"].generation = 2
+    assert store.generation != before
+    store.close()
@@ -0,0 +1,29 @@
+# tests/test_sharding.py
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_core")
+
+from server.rag.sharding import ShardedVectorStore
+
+def fake_shard(lexical_hits):
+    return SimpleNamespace(lexical_search=lambda query, k: lexical_hits[:k], close=lambda: None)
+
+def test_lexical_search_fuses_shards_by_rank_not_raw_bm25_score():
+    # 작은 샤드는 IDF가 커서 관련도가 낮은 청크도 원점수가 큰 샤드보다 높게 나옵니다.
+    store = ShardedVectorStore({
+        "small": fake_shard([(1, 40.0), (2, 35.0), (3, 30.0)]),
+        "large": fake_shard([(7, 9.0), (8, 5.0), (9, 1.0)]),
+    }, max_workers=2, rrf_k=60)
+    hits = store.lexical_search("휴가 규정", k=4)
+    store.close()
+
+    # 각 샤드의 1위가 먼저 오고, 한 샤드의 결과가 상위를 독차지하지 않습니다.
+    assert [key for key, _ in hits] == [("small", 1), ("large", 7), ("small", 2), ("large", 8)]
+    assert hits[0][1] == pytest.approx(1 / 61)
+
+def test_lexical_search_with_one_shard_keeps_bm25_order():
+    store = ShardedVectorStore({"only": fake_shard([(3, 2.0), (1, 1.5), (2, 0.5)])}, rrf_k=60)
+    assert [key for key, _ in store.lexical_search("회의록", k=2)] == [("only", 3), ("only", 1)]
+    store.close()